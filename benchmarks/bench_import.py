@@ -0,0 +1,64 @@
+"""
+Import time of plotroc, the NumPy only core
+
+Each import runs in a fresh interpreter, the best of --repeat runs is
+compared with --max-ms and the script exits non-zero if plotroc pulls in a
+heavy module (matplotlib, scipy, sklearn) or imports slower than that
+
+    python benchmarks/bench_import.py --repeat 10 --max-ms 300
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+HEAVY = ('matplotlib', 'scipy', 'sklearn')
+
+_CHILD = '''
+import sys, time, json
+t0 = time.perf_counter()
+import numpy
+t1 = time.perf_counter()
+import plotroc
+t2 = time.perf_counter()
+heavy = sorted(m for m in sys.modules if m.split('.')[0] in {heavy!r})
+print(json.dumps({{'numpy': t1 - t0, 'plotroc': t2 - t1, 'heavy': heavy}}))
+'''
+
+
+def time_import(root):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = root + os.pathsep + env.get('PYTHONPATH', '')
+    out = subprocess.run([sys.executable, '-c', _CHILD.format(heavy=HEAVY)],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=300.0,
+                        help='fail if importing plotroc (after numpy) takes longer')
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = [time_import(root) for _ in range(args.repeat)]
+    best = min(r['plotroc'] for r in runs) * 1e3
+    numpy_ms = min(r['numpy'] for r in runs) * 1e3
+    heavy = sorted(set(m for r in runs for m in r['heavy']))
+    print('import numpy   {:8.1f} ms'.format(numpy_ms))
+    print('import plotroc {:8.1f} ms (best of {})'.format(best, args.repeat))
+
+    failed = False
+    if heavy:
+        print('FAIL: plotroc imported {}'.format(', '.join(heavy)))
+        failed = True
+    if best > args.max_ms:
+        print('FAIL: import took {:.1f} ms > {:.1f} ms'.format(best, args.max_ms))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
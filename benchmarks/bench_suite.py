@@ -0,0 +1,184 @@
+"""
+Time and peak memory of the plotroc functions on synthetic scores
+
+Every function is run on every score generator (balanced, imbalanced, heavy
+ties) and size, the best of --repeat wall times and the peak traced memory
+(tracemalloc, a separate run) are recorded, written as JSON with --save and
+compared with a stored baseline with --baseline, exiting non-zero when any
+case is more than --tolerance slower
+
+    python benchmarks/bench_suite.py --sizes 1e3 1e5 1e6 --save base.json
+    python benchmarks/bench_suite.py --sizes 1e3 1e5 1e6 --baseline base.json
+    python benchmarks/bench_suite.py --sizes 1e8 --only roc_curve partial_auc
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import plotroc  # noqa: E402
+
+
+def balanced(n, rng):
+    y = rng.integers(0, 2, n)
+    return y, rng.normal(y, 1.0)
+
+
+def imbalanced(n, rng):
+    # 1% positives
+    y = (rng.random(n) < 0.01).astype(np.int64)
+    return y, rng.normal(1.5 * y, 1.0)
+
+
+def ties(n, rng):
+    # scores on 100 levels, as from a coarse rating scale or quantized model
+    y = rng.integers(0, 2, n)
+    return y, np.round(1 / (1 + np.exp(-rng.normal(y, 1.0))), 2)
+
+
+GENERATORS = {'balanced': balanced, 'imbalanced': imbalanced, 'ties': ties}
+
+
+def _curve(y, s):
+    fpr, tpr, thresh = plotroc.roc_curve(y, s)
+    Np = np.count_nonzero(y)
+    return fpr, tpr, thresh, len(y) - Np, Np
+
+
+def _operating_points(fpr, tpr, thresh, Nn, Np):
+    ops = plotroc.OperatingPoints(fpr, tpr, thresh, Nn, Np)
+    ops.max_youden_J()
+    ops.best_ppv(0.9)
+    ops.best_npv(0.9)
+    ops.bayes_error()
+    ops.neyman_pearson(0.9)
+
+
+def _plot(y, s):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from rocplot import plot_roc
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    plot_roc(y, s, ax=fig.add_subplot(111), show=False, max_J=True, ppv_npv=True,
+             min_err=True)
+    fig.canvas.draw()
+
+
+# name: (setup(y, s) -> args, function(*args), largest n)
+CASES = {
+    'roc_curve': (lambda y, s: (y, s), plotroc.roc_curve, 10**8),
+    'partial_auc': (lambda y, s: _curve(y, s)[:2],
+                    lambda f, t: plotroc.partial_auc(f, t, np.linspace(0, 0.9, 10),
+                                                     np.linspace(0.1, 1, 10)), 10**8),
+    'operating_points': (_curve, _operating_points, 10**8),
+    'precision_recall': (lambda y, s: (y, s),
+                         lambda y, s: plotroc.average_precision(
+                             *plotroc.precision_recall_curve(y, s)[:2]), 10**8),
+    'pav_rocch': (lambda y, s: (y, s), plotroc.pav_rocch, 10**8),
+    'reliability_curve': (lambda y, s: (y, 1 / (1 + np.exp(-s))),
+                          lambda y, p: plotroc.reliability_curve(y, p, 20, full_output=True),
+                          10**8),
+    'delong_auc': (lambda y, s: (y, np.column_stack((s, s + 0.1 * np.sin(s)))),
+                   plotroc.delong_auc, 10**7),
+    'plot_roc': (lambda y, s: (y, s), _plot, 10**7),
+}
+
+
+def measure(func, args, repeat, min_time=0.05):
+    # warm up and, like timeit, loop fast cases so each timing is >= min_time
+    t0 = time.perf_counter()
+    func(*args)
+    number = max(1, int(min_time / max(time.perf_counter() - t0, 1e-9)))
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        best = min(best, (time.perf_counter() - t0) / number)
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes, names, generators, repeat, seed=0, log=print):
+    results = []
+    for n in sizes:
+        for dist in generators:
+            y, s = GENERATORS[dist](n, np.random.default_rng(seed))
+            for name in names:
+                setup, func, max_n = CASES[name]
+                if n > max_n:
+                    continue
+                args = setup(y, s)
+                t, peak = measure(func, args, repeat)
+                results.append(dict(function=name, dist=dist, n=n, time_s=t,
+                                    peak_mb=peak / 2.0**20))
+                log('{:18s} {:10s} {:>10d} {:10.4f} s {:10.1f} MB'.format(
+                    name, dist, n, t, peak / 2.0**20))
+    return results
+
+
+def compare(results, baseline, tolerance, log=print):
+    """Cases slower than (1 + tolerance) times their baseline time"""
+    base = dict(((r['function'], r['dist'], r['n']), r) for r in baseline['results'])
+    slower = []
+    for r in results:
+        b = base.get((r['function'], r['dist'], r['n']))
+        if b is None:
+            continue
+        ratio = r['time_s'] / b['time_s'] if b['time_s'] > 0 else np.inf
+        flag = ''
+        if ratio > 1 + tolerance:
+            slower.append(r)
+            flag = '  SLOWER'
+        log('{:18s} {:10s} {:>10d} time x{:6.2f} memory x{:6.2f}{}'.format(
+            r['function'], r['dist'], r['n'], ratio,
+            r['peak_mb'] / b['peak_mb'] if b['peak_mb'] > 0 else np.nan, flag))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e4, 1e5, 1e6])
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument('--dist', nargs='+', choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare with the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='fail if a case is this fraction slower than the baseline')
+    args = parser.parse_args(argv)
+
+    results = run([int(n) for n in args.sizes], args.only, args.dist, args.repeat, args.seed)
+    out = {
+        'meta': dict(python=platform.python_version(), numpy=np.__version__,
+                     machine=platform.machine(), processor=platform.processor(),
+                     platform=platform.platform(), cpus=os.cpu_count(),
+                     date=time.strftime('%Y-%m-%dT%H:%M:%S'), repeat=args.repeat,
+                     seed=args.seed),
+        'results': results,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(out, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
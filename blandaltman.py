@@ -0,0 +1,232 @@
+"""
+Streaming Bland-Altman agreement statistics of one or many measurement pairs
+"""
+import numpy as np
+from rocprof import profiled
+
+
+class BlandAltman(object):
+    """
+    Mergeable accumulator of the Bland-Altman statistics of n_pairs pairs of
+    measurements, updated with chunks of paired samples
+
+    The count, mean and sum of squared deviations of the differences of every
+    pair are combined chunk by chunk (Welford / Chan et al.), so the bias,
+    limits of agreement and their confidence intervals need one pass and no
+    raw data is kept. A 2-D histogram of (mean, difference) is accumulated
+    for density plots in place of a scatter of every point.
+
+    See Bland and Altman
+    STATISTICAL METHODS FOR ASSESSING AGREEMENT BETWEEN TWO METHODS OF CLINICAL
+    MEASUREMENT
+
+    Parameters
+    ----------
+    bins : int, optional (default=128)
+        Bins per axis of the (mean, difference) histogram, 0 for none
+
+    hist_range : ((float, float), (float, float)), optional (default=None)
+        ((mean_min, mean_max), (diff_min, diff_max)) of the histogram of every
+        pair. By default the range is set from the first chunk, padded by a
+        quarter of its span each side. Later samples outside it are counted
+        in the edge bins (see n_clipped)
+
+    Example
+    -------
+    ba = BlandAltman()
+    for old, new in chunks:     # arrays shape [n] or [n, n_pairs]
+        ba.update(old, new)
+    ba.summary()['bias'], ba.summary()['upper']
+    plot_bland_altman(ba)
+    """
+
+    def __init__(self, bins=128, hist_range=None):
+        self.bins = int(bins)
+        self.hist_range = None if hist_range is None else np.asarray(hist_range, dtype=np.float64)
+        self.n = None
+        self.mean = None
+        self.m2 = None
+        self.avg_min = self.avg_max = None
+        self.hist = None
+        self.n_clipped = None
+
+    @property
+    def n_pairs(self):
+        return 0 if self.n is None else self.n.size
+
+    def _start(self, n_pairs, avg, diff):
+        self.n = np.zeros(n_pairs)
+        self.mean = np.zeros(n_pairs)
+        self.m2 = np.zeros(n_pairs)
+        self.avg_min = np.full(n_pairs, np.inf)
+        self.avg_max = np.full(n_pairs, -np.inf)
+        self.n_clipped = np.zeros(n_pairs, dtype=np.int64)
+        if self.bins:
+            if self.hist_range is None:
+                r = np.empty((n_pairs, 2, 2))
+                valid = np.isfinite(diff)
+                with np.errstate(invalid='ignore'):
+                    for k, a in enumerate((avg, diff)):
+                        lo = np.where(valid, a, np.inf).min(axis=0)
+                        hi = np.where(valid, a, -np.inf).max(axis=0)
+                        pad = np.where(hi > lo, (hi - lo) / 4, np.maximum(np.abs(hi), 1.0))
+                        r[:, k, 0] = lo - pad
+                        r[:, k, 1] = hi + pad
+                r[~np.isfinite(r)] = 0.0
+                r[:, :, 1] = np.maximum(r[:, :, 1], r[:, :, 0] + 1e-12)
+                self.hist_range = r
+            else:
+                self.hist_range = np.broadcast_to(self.hist_range, (n_pairs, 2, 2)).copy()
+            self.hist = np.zeros((n_pairs, self.bins, self.bins))
+
+    @profiled
+    def update(self, data1, data2):
+        """
+        Add a chunk of paired measurements, arrays shape [n] or [n, n_pairs].
+        Pairs where either value is not finite are skipped
+
+        Returns
+        -------
+        self
+        """
+        data1 = np.asarray(data1, dtype=np.float64)
+        data2 = np.asarray(data2, dtype=np.float64)
+        if data1.shape != data2.shape:
+            raise ValueError('data1 and data2 must have the same shape')
+        if data1.ndim == 1:
+            data1 = data1[:, None]
+            data2 = data2[:, None]
+        diff = data1 - data2
+        avg = (data1 + data2) / 2
+        if self.n is None:
+            self._start(diff.shape[1], avg, diff)
+        elif diff.shape[1] != self.n_pairs:
+            raise ValueError('chunk has {} pairs, expected {}'.format(diff.shape[1], self.n_pairs))
+
+        valid = np.isfinite(diff)
+        nb = valid.sum(axis=0).astype(np.float64)
+        d = np.where(valid, diff, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mb = np.where(nb > 0, d.sum(axis=0) / nb, 0.0)
+        m2b = (np.where(valid, diff - mb, 0.0)**2).sum(axis=0)
+        self._combine(nb, mb, m2b)
+        self.avg_min = np.minimum(self.avg_min, np.where(valid, avg, np.inf).min(axis=0))
+        self.avg_max = np.maximum(self.avg_max, np.where(valid, avg, -np.inf).max(axis=0))
+
+        if self.bins:
+            rows, cols = np.nonzero(valid)
+            idx = []
+            clipped = np.zeros(rows.size, dtype=bool)
+            for k, a in enumerate((avg, diff)):
+                lo = self.hist_range[cols, k, 0]
+                hi = self.hist_range[cols, k, 1]
+                i = np.floor((a[rows, cols] - lo) / (hi - lo) * self.bins)
+                clipped |= (i < 0) | (i >= self.bins)
+                idx.append(np.clip(i, 0, self.bins - 1).astype(np.int64))
+            self.n_clipped += np.bincount(cols[clipped], minlength=self.n_pairs)
+            # unbuffered add of the chunk's samples only, the cost does not
+            # grow with n_pairs * bins**2
+            np.add.at(self.hist, (cols, idx[0], idx[1]), 1)
+        return self
+
+    def _combine(self, nb, mb, m2b):
+        # Chan et al. parallel update of count, mean and squared deviations
+        n = self.n + nb
+        delta = mb - self.mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = np.where(n > 0, nb / n, 0.0)
+        self.mean = self.mean + delta * w
+        self.m2 = self.m2 + m2b + delta**2 * self.n * w
+        self.n = n
+
+    def merge(self, other):
+        """
+        Merge another accumulator (e.g., of another worker) into this one,
+        histograms must share the same range and bins
+
+        Returns
+        -------
+        self
+        """
+        if other.n is None:
+            return self
+        if self.n is None:
+            self.__dict__.update(other.copy().__dict__)
+            return self
+        if other.n_pairs != self.n_pairs:
+            raise ValueError('cannot merge accumulators of different numbers of pairs')
+        if self.bins != other.bins or (self.bins and not np.array_equal(self.hist_range,
+                                                                          other.hist_range)):
+            raise ValueError('cannot merge histograms of different ranges, give hist_range')
+        self._combine(other.n, other.mean, other.m2)
+        self.avg_min = np.minimum(self.avg_min, other.avg_min)
+        self.avg_max = np.maximum(self.avg_max, other.avg_max)
+        self.n_clipped = self.n_clipped + other.n_clipped
+        if self.bins:
+            self.hist = self.hist + other.hist
+        return self
+
+    def copy(self):
+        ba = BlandAltman.__new__(BlandAltman)
+        ba.__dict__.update(self.__dict__)
+        for name in ('n', 'mean', 'm2', 'avg_min', 'avg_max', 'hist', 'n_clipped', 'hist_range'):
+            value = getattr(self, name)
+            if value is not None:
+                setattr(ba, name, value.copy())
+        return ba
+
+    def summary(self, alpha=0.05, loa=1.96):
+        """
+        Bias, limits of agreement and their (1 - alpha) confidence intervals,
+        SE(bias) = sd/sqrt(n) and SE(limit) = sd*sqrt(3/n), Bland and Altman.
+        sd is the sample standard deviation (ddof=1), so the limits are
+        sqrt(n/(n-1)) wider than with np.std's default ddof=0
+
+        Parameters
+        ----------
+        alpha : float, optional (default=0.05)
+            Confidence intervals cover 1 - alpha
+
+        loa : float, optional (default=1.96)
+            Limits of agreement are bias +/- loa * sd
+
+        Returns
+        -------
+        stats : dict of arrays, shape = [n_pairs]
+            'n', 'bias', 'sd', 'lower', 'upper' and the (low, high) tuples
+            'bias_ci', 'lower_ci', 'upper_ci'
+        """
+        # exact Student t quantile, imported here to keep the module NumPy-only
+        from scipy.stats import t as student_t
+        if self.n is None:
+            raise ValueError('no samples')
+        n = self.n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sd = np.sqrt(self.m2 / (n - 1))
+            t = student_t.ppf(1 - alpha / 2, n - 1)
+            se_bias = sd / np.sqrt(n)
+            se_loa = sd * np.sqrt(3 / n)
+        bias = self.mean
+        lower = bias - loa * sd
+        upper = bias + loa * sd
+        return {
+            'n': n,
+            'bias': bias,
+            'sd': sd,
+            'lower': lower,
+            'upper': upper,
+            'bias_ci': (bias - t * se_bias, bias + t * se_bias),
+            'lower_ci': (lower - t * se_loa, lower + t * se_loa),
+            'upper_ci': (upper - t * se_loa, upper + t * se_loa),
+        }
+
+    def histogram(self, pair=0):
+        """
+        (counts, mean_edges, diff_edges) of the density histogram of a pair,
+        counts[i, j] is the number of samples in mean bin i and diff bin j
+        """
+        if self.hist is None:
+            raise ValueError('no histogram, bins=0 or no samples')
+        r = self.hist_range[pair]
+        return (self.hist[pair], np.linspace(r[0, 0], r[0, 1], self.bins + 1),
+                np.linspace(r[1, 0], r[1, 1], self.bins + 1))
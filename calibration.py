@@ -0,0 +1,343 @@
+"""
+Platt (sigmoid) calibration fitted by Newton's method and isotonic (PAV)
+calibration, NumPy only
+"""
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from plotroc import _pav_sorted
+from rocprof import profiled
+
+
+@profiled
+def sigmoid_calibrate(x, A, B, group=None):
+    """
+    Compute sigmoid values for each sets of scores in x
+    using the parameters A, B found from sigmoid_fit    
+
+    A, B may be arrays of many fitted sigmoids (one per model or group):
+    with group given, sample i uses A[group[i]], B[group[i]], otherwise
+    x of shape [n_samples] or [n_samples, n_models] is mapped through every
+    sigmoid giving shape [n_samples, n_models]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    A = np.asarray(A, dtype=np.float64)
+    B = np.asarray(B, dtype=np.float64)
+    if group is not None:
+        A = A[group]
+        B = B[group]
+    elif A.ndim and x.ndim == 1:
+        x = x[:, None]
+    # 1/(1 + exp(A*x + B)) without overflow
+    return np.exp(-np.logaddexp(0, A*x + B))
+
+def _platt_terms(f):
+    # softplus(-f) and the sigmoid p = 1/(1 + exp(f)), q = 1 - p sharing one exp
+    e = np.exp(-np.abs(f))
+    sp = np.maximum(-f, 0) + np.log1p(e)
+    r = 1. / (1. + e)
+    pos = f >= 0
+    p = np.where(pos, e * r, r)
+    q = np.where(pos, r, e * r)
+    return sp, p, q
+
+def _platt_newton(F, T, N, g, AB0, maxiter=100, minstep=1e-10, sigma=1e-12, eps=1e-5):
+    """
+    Newton's method with backtracking line search for Platt's sigmoid
+    (Lin, Lin & Weng 2007), for many independent fits at once
+
+    Parameters
+    ----------
+    F : array, shape = [n]
+        (unique) scores
+    T : array, shape = [n]
+        Sum of the (weighted) Platt targets of the samples with score F
+    N : array, shape = [n]
+        Total (weighted) number of samples with score F
+    g : array, shape = [n]
+        Index of the fit each score belongs to
+    AB0 : array, shape = [n_fits, 2]
+        Initial (A, B) of each fit
+
+    The objective of fit j is sum T*f + N*log(1 + exp(-f)) with f = A*F + B
+    over its scores, the same as Platt's over the raw samples
+    """
+    G = AB0.shape[0]
+    A = AB0[:, 0].copy()
+    B = AB0[:, 1].copy()
+
+    def objective(A, B):
+        f = A[g] * F + B[g]
+        sp, p, q = _platt_terms(f)
+        return np.bincount(g, T * f + N * sp, G), p, q
+
+    fval, p, q = objective(A, B)
+    active = np.ones(G, dtype=bool)
+    for it in range(maxiter):
+        # gradient and Hessian from the probabilities of the last objective
+        d1 = T - N * p
+        d2 = N * p * q
+        g1 = np.bincount(g, F * d1, G)
+        g2 = np.bincount(g, d1, G)
+        h11 = np.bincount(g, F * F * d2, G) + sigma
+        h22 = np.bincount(g, d2, G) + sigma
+        h21 = np.bincount(g, F * d2, G)
+        active &= (np.abs(g1) >= eps) | (np.abs(g2) >= eps)
+        if not active.any():
+            break
+
+        det = h11 * h22 - h21 * h21
+        dA = -(h22 * g1 - h21 * g2) / det
+        dB = -(-h21 * g1 + h11 * g2) / det
+        gd = g1 * dA + g2 * dB
+
+        # backtracking line search, halving the step of fits not yet accepted
+        step = np.where(active, 1.0, 0.0)
+        searching = active.copy()
+        while searching.any():
+            tA = np.where(searching, A + step * dA, A)
+            tB = np.where(searching, B + step * dB, B)
+            newf, tp, tq = objective(tA, tB)
+            ok = searching & (newf < fval + 0.0001 * step * gd)
+            # keep the accepted point and its probabilities for the next step
+            A[ok], B[ok], fval[ok] = tA[ok], tB[ok], newf[ok]
+            ok_s = ok[g]
+            p[ok_s], q[ok_s] = tp[ok_s], tq[ok_s]
+            searching &= ~ok
+            step[searching] /= 2.0
+            # line search fails, stop that fit
+            failed = searching & (step < minstep)
+            active &= ~failed
+            searching &= ~failed
+
+    return A, B
+
+@profiled
+def sigmoid_stats(y, df, sample_weight=None):
+    """
+    Sufficient statistics for sigmoid_fit_stats: the unique scores in df and
+    the (weighted) number of positive and negative samples at each
+
+    Returns
+    -------
+    score, n_pos, n_neg : array, shape = [n_unique]
+    """
+    df = np.asarray(df, dtype=np.float64).ravel()
+    y = np.asarray(y).ravel() > 0
+    w = np.ones(df.size) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64).ravel()
+    score, inv = np.unique(df, return_inverse=True)
+    n_pos = np.bincount(inv, w * y, score.size)
+    n_neg = np.bincount(inv, w * ~y, score.size)
+    return score, n_pos, n_neg
+
+@profiled
+def sigmoid_fit_stats(score, n_pos, n_neg, group=None, prior0=None, prior1=None):
+    """
+    Platt sigmoid fit from pre-aggregated statistics, for one or many groups
+
+    Parameters
+    ----------
+    score : array, shape = [n]
+        Scores (decision function values), e.g. unique scores of a group
+
+    n_pos, n_neg : array, shape = [n]
+        (Weighted) number of positive and negative samples with that score
+
+    group : int array, shape = [n], optional (default=None, a single fit)
+        Index (0 ... n_groups-1) of the fit each score belongs to
+
+    prior0, prior1 : array, shape = [n_groups], optional
+        Number of negative and positive samples used for Platt's Bayesian
+        targets, default the sums of n_neg and n_pos in each group
+
+    Returns
+    -------
+    A, B : float, or array of shape [n_groups] if group is given
+    """
+    F = np.asarray(score, dtype=np.float64).ravel()
+    n_pos = np.asarray(n_pos, dtype=np.float64).ravel()
+    n_neg = np.asarray(n_neg, dtype=np.float64).ravel()
+    g = np.zeros(F.size, dtype=np.intp) if group is None else np.asarray(group, dtype=np.intp).ravel()
+    G = g.max() + 1 if g.size else 1
+    if prior0 is None:
+        prior0 = np.bincount(g, n_neg, G)
+    if prior1 is None:
+        prior1 = np.bincount(g, n_pos, G)
+    prior0 = np.asarray(prior0, dtype=np.float64) * np.ones(G)
+    prior1 = np.asarray(prior1, dtype=np.float64) * np.ones(G)
+
+    # Bayesian priors (see Platt end of section 2.2)
+    hi = (prior1 + 1.) / (prior1 + 2.)
+    lo = 1. / (prior0 + 2.)
+    T = n_pos * hi[g] + n_neg * lo[g]
+    AB0 = np.c_[np.zeros(G), np.log((prior0 + 1.) / (prior1 + 1.))]
+    A, B = _platt_newton(F, T, n_pos + n_neg, g, AB0)
+    if group is None:
+        return A[0], B[0]
+    return A, B
+
+@profiled
+def sigmoid_fit(y, df, sample_weight=None):
+    """
+    Probability Calibration with sigmoid method (Platt 2000)
+    Fits sigmoid function of form:
+        p = 1/(1 + exp(A.df + B))
+    To map arbitrary classifier scores to calibrated probabilites
+
+    Solved with Newton's method and a backtracking line search (Lin, Lin &
+    Weng) on the unique scores, so tied scores are only evaluated once. Each
+    column of a 2-D df is fitted separately in one vectorised call
+    
+    Parameters
+    ----------
+    y : ndarray, shape (n_samples,)
+        The targets. True labels (0 or 1)
+        
+    df : ndarray, shape (n_samples,) or (n_samples, n_models)
+        The decision function or posterior probability for the samples
+        
+    sample_weight : array-like, shape = [n_samples] or None
+        Sample weights. If None, then samples are equally weighted.
+    
+    Returns
+    -------
+    A : float (or array, shape (n_models,) for 2-D df)
+        The slope.
+        
+    B : float (or array, shape (n_models,) for 2-D df)
+        The intercept.
+        
+    References
+    ----------
+    Platt, 1999 "Probabilistic Outputs for Support Vector Machines"
+    Lin, Lin & Weng, 2007 "A note on Platt's probabilistic outputs for
+    support vector machines", Machine Learning 68: 267-276.
+    """
+    y = np.asarray(y).ravel()
+    df = np.asarray(df, dtype=np.float64)
+    # Bayesian priors from the unweighted class counts
+    prior0 = float(np.sum(y <= 0))
+    prior1 = y.shape[0] - prior0
+    if df.ndim == 1:
+        score, n_pos, n_neg = sigmoid_stats(y, df, sample_weight)
+        return sigmoid_fit_stats(score, n_pos, n_neg, prior0=prior0, prior1=prior1)
+
+    stats = [sigmoid_stats(y, df[:, j], sample_weight) for j in range(df.shape[1])]
+    group = np.repeat(np.arange(len(stats)), [s[0].size for s in stats])
+    score, n_pos, n_neg = [np.concatenate(s) for s in zip(*stats)]
+    return sigmoid_fit_stats(score, n_pos, n_neg, group, prior0, prior1)
+
+class IsotonicCalibrator(object):
+    """
+    Fitted isotonic (PAV) calibration, a step function of the score
+
+    Only the lowest training score of each PAV block and the block's
+    calibrated value are kept, a new score gets the value of the last block
+    starting at or below it (the first block below all of them), found with
+    np.searchsorted. See isotonic_fit and isotonic_load
+
+    Parameters
+    ----------
+    starts : array, shape = [n_blocks]
+        Increasing lowest score of each block
+
+    values : array, shape = [n_blocks]
+        Increasing calibrated probability of each block
+    """
+
+    def __init__(self, starts, values):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.starts.shape != self.values.shape or self.starts.ndim != 1 or not self.starts.size:
+            raise ValueError('starts and values must be non-empty arrays of the same length')
+        # value by searchsorted index, index 0 is below the first start
+        self._lookup = np.r_[self.values[0], self.values]
+
+    def _block(self, score, out):
+        np.take(self._lookup, np.searchsorted(self.starts, score, side='right'), out=out)
+        nan = np.isnan(score)
+        if nan.any():
+            out[nan] = np.nan
+
+    @profiled
+    def predict(self, score, out=None, chunk_size=2**22, n_jobs=1):
+        """
+        Calibrated probabilities of new scores, NaN scores stay NaN
+
+        Parameters
+        ----------
+        score : array (or memmap), any shape
+            Scores of the model the calibrator was fitted to
+
+        out : array (or memmap), optional (default=None)
+            float64 array of the shape of score to write into, a
+            non-contiguous out is filled through a temporary copy
+
+        chunk_size : int, optional (default=2**22)
+            Scores per chunk, the memory used besides out is about
+            n_jobs * chunk_size * 17 bytes
+
+        n_jobs : int, optional (default=1)
+            Number of threads the chunks are spread over (searchsorted
+            releases the GIL)
+
+        Returns
+        -------
+        out : array, shape of score
+        """
+        score = np.asarray(score)
+        if out is None:
+            out = np.empty(score.shape)
+        elif out.shape != score.shape or out.dtype != np.float64:
+            raise ValueError('out must be a float64 array of the shape of score')
+        flat_score = score.reshape(-1)
+        # reshape copies a non-contiguous out, fill a flat array and copy it back
+        flat_out = out.reshape(-1) if out.flags.c_contiguous else np.empty(out.size)
+        chunks = [slice(a, a + chunk_size) for a in range(0, flat_score.size, chunk_size)]
+
+        def run(s):
+            self._block(flat_score[s], flat_out[s])
+        if n_jobs > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(n_jobs) as pool:
+                list(pool.map(run, chunks))
+        else:
+            for s in chunks:
+                run(s)
+        if not out.flags.c_contiguous:
+            out[...] = flat_out.reshape(out.shape)
+        return out
+
+    def save(self, path):
+        """Write starts and values to an uncompressed .npz"""
+        np.savez(path, starts=self.starts, values=self.values)
+
+@profiled
+def isotonic_fit(target, score, sample_weight=None):
+    """
+    Fit an IsotonicCalibrator from the PAV blocks of pav_rocch
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.
+
+    score : array, shape = [n_samples]
+        Target scores
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    Returns
+    -------
+    calibrator : IsotonicCalibrator
+        calibrator.predict(score) equals the calibrated values of pav_rocch
+        for the training scores
+    """
+    t, score, end, pos, tot = _pav_sorted(target, score, sample_weight)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = pos / tot
+    return IsotonicCalibrator(score[np.r_[0, end[:-1]]], values)
+
+def isotonic_load(path):
+    """IsotonicCalibrator saved with IsotonicCalibrator.save"""
+    with np.load(path) as f:
+        return IsotonicCalibrator(f['starts'], f['values'])
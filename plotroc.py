@@ -1,10 +1,47 @@
-import numpy as np
-from sklearn import metrics
-import matplotlib.pyplot as plt
-from math import log
-from scipy.optimize import fmin_bfgs
+"""
+ROC curve metrics on NumPy only
 
-def reliability_curve(y_true, y_score, bins=10, normalize=True):
+Plotting (rocplot) and the Platt and isotonic calibration (calibration) are
+loaded on first use, so workers that only score never import matplotlib
+"""
+import hashlib
+import numpy as np
+from importlib import import_module
+from collections import OrderedDict
+from math import erfc
+from concurrent.futures import ThreadPoolExecutor
+from rocprof import profiled
+
+# names served lazily from other modules, see __getattr__
+_LAZY = {
+    'plot_roc': 'rocplot',
+    'plot_bland_altman': 'rocplot',
+    'sigmoid_calibrate': 'calibration',
+    'sigmoid_stats': 'calibration',
+    'sigmoid_fit_stats': 'calibration',
+    'sigmoid_fit': 'calibration',
+    'IsotonicCalibrator': 'calibration',
+    'isotonic_fit': 'calibration',
+    'isotonic_load': 'calibration',
+}
+
+
+def __getattr__(name):
+    # PEP 562, import the plotting and calibration modules on first access
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+@profiled
+def reliability_curve(y_true, y_score, bins=10, normalize=True, strategy='uniform',
+                      sample_weight=None, full_output=False):
     """Compute reliability curve
 
     Reliability curves allow checking if the predicted probabilities of a
@@ -18,6 +55,9 @@ def reliability_curve(y_true, y_score, bins=10, normalize=True):
 
     Note: this implementation is restricted to binary classification.
     Modified to handle zero bin counts correctly by APBradley (2017).
+    Computed in a single pass (digitize and bincount) for one or more score
+    columns, with optional equal mass bins, sample weights and calibration
+    errors.
 
     Parameters
     ----------
@@ -25,10 +65,10 @@ def reliability_curve(y_true, y_score, bins=10, normalize=True):
     y_true : array, shape = [n_samples]
         True binary labels (0 or 1).
 
-    y_score : array, shape = [n_samples]
+    y_score : array, shape = [n_samples] or [n_samples, n_models]
         Target scores, can either be probability estimates of the positive
         class or confidence values. If normalize is False, y_score must be in
-        the interval [0, 1]
+        the interval [0, 1]. Each column of a 2-D array is a separate model
 
     bins : int, optional, default=10
         The number of bins into which the y_scores are partitioned.
@@ -41,120 +81,169 @@ def reliability_curve(y_true, y_score, bins=10, normalize=True):
         the smallest value in y_score is linearly mapped onto 0 and the 
         largest one onto 1.
 
+    strategy : str, optional, default='uniform'
+        'uniform' bins of equal width (i/bins, (i+1)/bins], or 'quantile'
+        bins holding equal (weighted) numbers of samples
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    full_output : bool, optional, default=False
+        Whether to also return the bin counts and calibration errors
+
     Returns
     -------
-    y_score_bin_mean : array, shape = [bins]
+    y_score_bin_mean : array, shape = [bins] or [bins, n_models]
         The mean predicted y_score in the respective bins.
 
-    empirical_prob_pos : array, shape = [bins]
+    empirical_prob_pos : array, shape = [bins] or [bins, n_models]
         The empirical probability (frequency) of the positive class (+1) in the
         respective bins.
 
+    bin_counts : array, shape = [bins] or [bins, n_models]
+        Only if full_output, the (weighted) number of samples in each bin
+
+    calibration : dict, only if full_output
+        'ece' expected calibration error, the bin count weighted mean of
+              |y_score_bin_mean - empirical_prob_pos|
+        'mce' maximum calibration error over non-empty bins
+        'brier' Brier score, the (weighted) mean squared difference between
+              the (normalized) y_score and y_true
+        each a float, or an array of shape [n_models]
+
     References
     ----------
     .. [1] `Predicting Good Probabilities with Supervised Learning
             <http://machinelearning.wustl.edu/mlpapers/paper_files/icml2005_Niculescu-MizilC05.pdf>`_
 
     """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_score = np.asarray(y_score, dtype=np.float64)
+    single = y_score.ndim == 1
+    if single:
+        y_score = y_score[:, None]
+    n_samples, n_models = y_score.shape
+    if sample_weight is None:
+        w = np.ones(n_samples)
+    else:
+        w = np.asarray(sample_weight, dtype=np.float64).ravel()
+
     # Normalize scores into bin [0, 1]
     if normalize:  
-        y_score = (y_score - y_score.min()) / (y_score.max() - y_score.min())
-
-    bin_width = 1.0 / bins
-    bin_centers = np.linspace(0, 1.0 - bin_width, bins) + bin_width / 2
-
-    y_score_bin_mean = np.zeros(bins)
-    empirical_prob_pos = np.zeros(bins)
-    for i, threshold in enumerate(bin_centers):
-        # determine all samples where y_score falls into the i-th bin
-        bin_idx = np.logical_and(threshold - bin_width / 2 < y_score,
-                                 y_score <= threshold + bin_width / 2)
-        # Store mean y_score and mean empirical probability of positive class
-        # If calibrated the mean bin score and percent +ve cases are approximately equal
-        if np.count_nonzero(bin_idx):
-            y_score_bin_mean[i] = y_score[bin_idx].mean()
-            empirical_prob_pos[i] = y_true[bin_idx].mean()
-    
-    return y_score_bin_mean, empirical_prob_pos
-
-def sigmoid_calibrate(x, A, B):
-    """
-    Compute sigmoid values for each sets of scores in x
-    using the parameters A, B found from sigmoid_fit    
-    """
-    return 1 / (1 + np.exp(A*x + B))
-    
-def sigmoid_fit(y, df, sample_weight=None):
+        lo = y_score.min(axis=0)
+        y_score = (y_score - lo) / (y_score.max(axis=0) - lo)
+
+    # bin index of every sample, bin i is (edges[i], edges[i+1]]
+    if strategy == 'uniform':
+        inner = np.linspace(0, 1.0, bins + 1)[1:-1]
+        idx = np.searchsorted(inner, y_score, side='left')
+    elif strategy == 'quantile':
+        idx = np.empty(y_score.shape, dtype=np.intp)
+        q = np.linspace(0, 1.0, bins + 1)[1:-1]
+        for j in range(n_models):
+            order = np.argsort(y_score[:, j], kind='mergesort')
+            cum_w = np.cumsum(w[order])
+            # (weighted) quantiles of the scores as the inner bin edges
+            inner = y_score[order, j][np.searchsorted(cum_w, q * cum_w[-1], side='left')]
+            idx[:, j] = np.searchsorted(inner, y_score[:, j], side='left')
+    else:
+        raise ValueError("strategy must be 'uniform' or 'quantile'")
+
+    # one bincount over all models, model j uses bins j*bins ... (j+1)*bins-1
+    idx = (idx + np.arange(n_models) * bins).ravel()
+    size = bins * n_models
+    w_s = w[:, None] * np.ones(n_models)
+    bin_counts = np.bincount(idx, w_s.ravel(), size).reshape(n_models, bins).T
+    score_sum = np.bincount(idx, (w_s * y_score).ravel(), size).reshape(n_models, bins).T
+    pos_sum = np.bincount(idx, (w_s * y_true[:, None]).ravel(), size).reshape(n_models, bins).T
+
+    # Store mean y_score and mean empirical probability of positive class
+    # If calibrated the mean bin score and percent +ve cases are approximately equal
+    filled = bin_counts > 0
+    safe = np.where(filled, bin_counts, 1.0)
+    y_score_bin_mean = np.where(filled, score_sum / safe, 0.0)
+    empirical_prob_pos = np.where(filled, pos_sum / safe, 0.0)
+
+    if single:
+        out = (y_score_bin_mean[:, 0], empirical_prob_pos[:, 0])
+    else:
+        out = (y_score_bin_mean, empirical_prob_pos)
+    if not full_output:
+        return out
+
+    gap = np.abs(y_score_bin_mean - empirical_prob_pos)
+    total = bin_counts.sum(axis=0)
+    calibration = {
+        'ece': (bin_counts * gap).sum(axis=0) / total,
+        'mce': np.where(filled, gap, 0.0).max(axis=0),
+        'brier': np.dot(w, (y_score - y_true[:, None])**2) / w.sum(),
+    }
+    if single:
+        return out + (bin_counts[:, 0], dict((k, v[0]) for k, v in calibration.items()))
+    return out + (bin_counts, calibration)
+
+def _pav_blocks(y, w, score):
     """
-    Probability Calibration with sigmoid method (Platt 2000)
-    Fits sigmoid function of form:
-        p = 1/(1 + exp(A.df + B))
-    To map arbitrary classifier scores to calibrated probabilites
-    
+    Stack based pool adjacent violators over samples sorted by increasing score
+
+    Tied scores are pooled into a single block before the stack pass, so that
+    each block is a run of whole score values. A block is merged with its
+    predecessor while the predecessor's mean is not less than its own, which
+    leaves strictly increasing block values and O(n) merges in total.
+
     Parameters
     ----------
-    y : ndarray, shape (n_samples,)
-        The targets. True labels (0 or 1)
-        
-    df : ndarray, shape (n_samples,)
-        The decision function or posterior probability for the samples
-        
-    sample_weight : array-like, shape = [n_samples] or None
-        Sample weights. If None, then samples are equally weighted.
-    
+    y : array, shape = [n_samples]
+        Binary (0, 1) labels sorted by increasing score
+    w : array, shape = [n_samples]
+        Sample weights in the same order
+    score : array, shape = [n_samples]
+        Increasing scores
+
     Returns
     -------
-    A : float
-        The slope.
-        
-    B : float
-        The intercept.
-        
-    References
-    ----------
-    Platt, 1999 "Probabilistic Outputs for Support Vector Machines"
-    """
-    #df = column_or_1d(df)
-    #y = column_or_1d(y)
-
-    F = df  # F follows Platt's notations
-    tiny = np.finfo(np.float).tiny  # to avoid division by 0 warning
-
-    # Bayesian priors (see Platt end of section 2.2)
-    prior0 = float(np.sum(y <= 0))
-    prior1 = y.shape[0] - prior0
-    T = np.zeros(y.shape)
-    T[y > 0] = (prior1 + 1.) / (prior1 + 2.)
-    T[y <= 0] = 1. / (prior0 + 2.)
-    T1 = 1. - T
-
-    def objective(AB):
-        # From Platt (beginning of Section 2.2)
-        E = np.exp(AB[0] * F + AB[1])
-        P = 1. / (1. + E)
-        l = -(T * np.log(P + tiny) + T1 * np.log(1. - P + tiny))
-        if sample_weight is not None:
-            return (sample_weight * l).sum()
-        else:
-            return l.sum()
-
-    def grad(AB):
-        # gradient of the objective function
-        E = np.exp(AB[0] * F + AB[1])
-        P = 1. / (1. + E)
-        TEP_minus_T1P = P * (T * E - T1)
-        if sample_weight is not None:
-            TEP_minus_T1P *= sample_weight
-        dA = np.dot(TEP_minus_T1P, F)
-        dB = np.sum(TEP_minus_T1P)
-        return np.array([dA, dB])
-
-    AB0 = np.array([0., log((prior0 + 1.) / (prior1 + 1.))])
-    AB_ = fmin_bfgs(objective, AB0, fprime=grad, disp=False)
-    
-    return AB_[0], AB_[1]
+    end : array, shape = [n_blocks]
+        Exclusive end index of each block in the sorted samples
+    pos, tot : array, shape = [n_blocks]
+        Weighted number of positives and total weight in each block
+    """
+    # pool tied scores first, a tie must receive a single calibrated value
+    first = np.r_[0, np.flatnonzero(np.diff(score)) + 1]
+    g_end = np.r_[first[1:], len(score)]
+    g_pos = np.add.reduceat(w * y, first)
+    g_tot = np.add.reduceat(w, first)
+
+    end, pos, tot = [], [], []
+    for e, p, n in zip(g_end.tolist(), g_pos.tolist(), g_tot.tolist()):
+        # merge while previous mean >= current mean (cross multiplied)
+        while pos and pos[-1] * n >= p * tot[-1]:
+            p += pos.pop()
+            n += tot.pop()
+            end.pop()
+        end.append(e)
+        pos.append(p)
+        tot.append(n)
+
+    return np.array(end, dtype=np.intp), np.array(pos), np.array(tot)
+
+def _pav_sorted(target, score, sample_weight=None):
+    # sort by increasing score then PAV, returns the sorted target and
+    # scores with the blocks of _pav_blocks
+    target = np.asarray(target)
+    score = np.asarray(score)
+    assert target.ndim == 1
+    s_ind = np.argsort(score, kind='mergesort')
+    t = target[s_ind]
+    score = score[s_ind]
+    y = (t > 0).astype(np.float64)
+    if sample_weight is None:
+        w = np.ones(len(y))
+    else:
+        w = np.asarray(sample_weight, dtype=np.float64)[s_ind]
+    return (t, score) + _pav_blocks(y, w, score)
 
-def pav_rocch(target, score):
+@profiled
+def pav_rocch(target, score, sample_weight=None, return_hull=False):
     """
     PAV uses the pair adjacent violators algorithm to produce a monotonic
     (piecewise constant) smoothing of classifier scores. 
@@ -163,6 +252,8 @@ def pav_rocch(target, score):
     
     Translated from matlab by Sean Collins (2006) as part of the EMAP toolbox
     Modified to sort based on score and target arrays (as per scikit) by APBradley (2017).
+    Rewritten as a single stack based pass, O(n) after sorting, that pools tied
+    scores and supports sample weights.
     
     For details see: 
     PAV and the ROC convex hull, Tom Fawcett and Alexandru Niculescu-Mizil, 
@@ -177,75 +268,48 @@ def pav_rocch(target, score):
         Target scores, can either be posterior probability estimates of the
         positive class, confidence values, or non-thresholded measure of
         decisions (as returned by a “decision_function” on some classifiers).
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    return_hull : boolean, optional (default=False)
+        Whether to also return the vertices of the ROC convex hull
     
     Returns:
     t: target labels sorted according to the input scores
     v: sorted scores as calibrated probabilities (0,1)
+    hull: (fpr, tpr, thresh) only if return_hull is True
+        Increasing false and true positive rates of the ROCCH vertices and the
+        decreasing score thresholds (predict positive if score >= thresh) that
+        reach them, thresh[0] = inf is the (0, 0) vertex
     
     """
-    s_ind = np.argsort(score)
-    t = target[s_ind]
-    y = target[s_ind]
-    
-    y = np.asarray(y)
-    assert y.ndim == 1
-    n_samples = len(y)
-    v = y.copy()
-    lvls = np.arange(n_samples)
-    lvlsets = np.c_[lvls, lvls]
-    flag = 1
-    while flag:
-        deriv = np.diff(v)
-        if np.all(deriv >= 0):
-            break
-
-        viol = np.where(deriv < 0)[0]
-        start = lvlsets[viol[0], 0]
-        last = lvlsets[viol[0] + 1, 1]
-        s = 0
-        n = last - start + 1
-        for i in range(start, last + 1):
-            s += v[i]
-
-        val = s / n
-        for i in range(start, last + 1):
-            v[i] = val
-            lvlsets[i, 0] = start
-            lvlsets[i, 1] = last
-    
-    return (t, v)
-
-def plot_bland_altman(data1, data2, *args, **kwargs):
-    """
-    Function to draw a Bland Altman plot comparing two clinical measurements
-
-    See Bland and Altman
-    STATISTICAL METHODS FOR ASSESSING AGREEMENT BETWEEN TWO METHODS OF CLINICAL
-    MEASUREMENT
-
-    Example: plot_bland_altman(np.random(10), np.random(10))
-    """
-    data1     = np.asarray(data1)
-    data2     = np.asarray(data2)
-    mean      = np.mean([data1, data2], axis=0)
-    diff      = data1 - data2                   # Difference between data1 and data2
-    md        = np.mean(diff)                   # Mean of the difference
-    sd        = np.std(diff, axis=0)            # Standard deviation of the difference
-
-    plt.scatter(mean, diff, *args, **kwargs)
-    plt.axhline(md,           color='gray', linestyle='--')
-    plt.axhline(md + 1.96*sd, color='red', linestyle='--')
-    plt.axhline(md - 1.96*sd, color='red', linestyle='--')
-    plt.title('Bland-Altman Plot')
-    plt.xlabel('Mean')
-    plt.ylabel('Difference')
-    plt.show()
-
-
+    t, score, end, pos, tot = _pav_sorted(target, score, sample_weight)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        val = pos / tot
+    v = np.repeat(val, np.diff(np.r_[0, end]))
+
+    if not return_hull:
+        return (t, v)
+
+    # Each block boundary is a ROCCH vertex, walk the blocks from the highest
+    # calibrated value down accumulating the weighted positives and negatives
+    neg = tot - pos
+    hull_tpr = np.r_[0.0, np.cumsum(pos[::-1])]
+    hull_fpr = np.r_[0.0, np.cumsum(neg[::-1])]
+    hull_tpr /= hull_tpr[-1]
+    hull_fpr /= hull_fpr[-1]
+    start = np.r_[0, end[:-1]]
+    hull_thresh = np.r_[np.inf, score[start][::-1]]
+
+    return (t, v, (hull_fpr, hull_tpr, hull_thresh))
+
+@profiled
 def roc_curve(target, score, pos_label=None, sample_weight=None, drop_intermediate=False):
     """
-    Mirror of roc_curve in sklearn.metrics with drop_intermediate defaulted to False
+    Mirror of roc_curve in sklearn.metrics (NumPy only) with drop_intermediate defaulted to False
     This increases the accuracy when extimating partial_auc, by including redundant operating points
+    For score and label files larger than memory see rocfile.roc_curve_file
 
     Parameters
     ----------
@@ -282,83 +346,521 @@ def roc_curve(target, score, pos_label=None, sample_weight=None, drop_intermedia
     thresh : array, shape = [n_thresholds]
         Decreasing thresholds on the decision function (posterior) used to
         compute fpr and tpr. thresholds[0] represents no instances being
-        predicted and is arbitrarily set to max(y_score) + 1.
+        predicted and is set to inf.
     """
-    fpr, tpr, thresh = metrics.roc_curve(target, score, pos_label,
-                                         sample_weight, drop_intermediate)
+    y, score, sample_weight = _binary_inputs(target, score, pos_label, sample_weight)
+
+    fps, tps, thresh = _roc_counts(y, score, sample_weight)
+    if drop_intermediate and fps.size > 3:
+        # keep only the corners, drop points collinear with their neighbours
+        keep = np.r_[True, True, np.logical_or(np.diff(fps[1:], 2), np.diff(tps[1:], 2)), True]
+        fps, tps, thresh = fps[keep], tps[keep], thresh[keep]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fpr = fps / fps[-1]
+        tpr = tps / tps[-1]
     return (fpr, tpr, thresh)
 
-def partial_auc(fpr, tpr, op1=0.0, op2=1.0, Sp=True):
+def _binary_inputs(target, score, pos_label=None, sample_weight=None):
+    # positive mask, score and weights as flat arrays, checking the labels
+    target = np.asarray(target).ravel()
+    score = np.asarray(score).ravel()
+    if target.shape != score.shape:
+        raise ValueError('target and score must have the same length')
+    if pos_label is None:
+        labels = np.unique(target)
+        if not (np.all(np.isin(labels, [0, 1])) or np.all(np.isin(labels, [-1, 1]))):
+            raise ValueError('target is not in {0, 1} or {-1, 1}, pos_label must be given')
+        pos_label = 1
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=np.float64).ravel()
+    return target == pos_label, score, sample_weight
+
+def _roc_counts(y, score, sample_weight=None):
     """
-    Estimate the partial AUC between Se or Sp operating points op1 and op2
+    Cumulative (weighted) false and true positive counts of a ROC curve
+
+    Parameters
+    ----------
+    y : boolean array, shape = [n_samples]
+        True where the sample is positive
+    score : array, shape = [n_samples]
+    sample_weight : array, shape = [n_samples], optional
+
+    Returns
+    -------
+    fps, tps : array, shape = [n_thresholds]
+        Increasing counts of negatives and positives with score >= thresh,
+        the first point (0, 0) has no instances predicted positive
+    thresh : array, shape = [n_thresholds]
+        Decreasing distinct scores, thresh[0] = inf
+    """
+    order = np.argsort(score, kind='mergesort')[::-1]
+    score = score[order]
+    y = y[order]
+    # last position of each distinct score
+    last = np.r_[np.flatnonzero(np.diff(score)), y.size - 1]
+    if sample_weight is None:
+        tps = np.cumsum(y)[last]
+        fps = 1 + last - tps
+    else:
+        w = np.asarray(sample_weight, dtype=np.float64)[order]
+        tps = np.cumsum(w * y)[last]
+        fps = np.cumsum(w * ~y)[last]
+    return (np.r_[0, fps], np.r_[0, tps], np.r_[np.inf, score[last]])
+
+@profiled
+def decimate_curve(x, y, tol=1e-3, keep=None):
+    """
+    Indices of a shape preserving subset of the points of a curve for plotting
+
+    Collinear points are dropped first (no error), then the plane is divided
+    into tol x tol cells and of each run of consecutive points in the same
+    cell only the first and last are kept. Every dropped point lies in the
+    same cell as a kept segment, so the decimated polyline is within
+    tol*sqrt(2) of every original point. A monotone curve on [0, 1] x [0, 1]
+    (e.g. a ROC curve) keeps at most about 4/tol points, i.e. about two per
+    pixel for tol = 1/pixels.
+
+    Parameters
+    ----------
+    x, y : array, shape = [n]
+        Coordinates of the curve in plotting order
+
+    tol : float, optional (default=1e-3)
+        Cell size (in data units) of the decimation grid
+
+    keep : array of int, optional (default=None)
+        Indices that are always kept exactly, e.g. annotated operating points
+
+    Returns
+    -------
+    idx : array of int
+        Increasing indices of the points to plot, including the end points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if n <= 2:
+        return np.arange(n)
+    # drop points in the middle of a straight run
+    dx = np.diff(x)
+    dy = np.diff(y)
+    straight = (dx[:-1] * dy[1:] == dy[:-1] * dx[1:]) & (dx[:-1] * dx[1:] + dy[:-1] * dy[1:] > 0)
+    idx = np.flatnonzero(np.r_[True, ~straight, True])
+
+    # first and last point of each run of points in the same grid cell
+    cx = np.floor(x[idx] / tol)
+    cy = np.floor(y[idx] / tol)
+    new_cell = np.r_[True, (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])]
+    boundary = new_cell | np.r_[new_cell[1:], True]
+    idx = idx[boundary]
+
+    if keep is not None and len(keep):
+        idx = np.union1d(idx, np.asarray(keep, dtype=np.intp))
+    return idx
+
+def _threshold_index(thresh, values):
+    # indices of the given threshold values in a decreasing thresh array
+    values = np.asarray(values, dtype=np.float64)
+    i = np.searchsorted(-thresh, -values, side='left')
+    i = i[i < thresh.size]
+    return i[np.isin(thresh[i], values)]
+
+def _area_to(x, y, first, last, key, offset, area, at):
+    # area under y(x) from the start of each curve up to x = at, linearly
+    # interpolated inside the segment containing at, at shape = [n_curves, ...]
+    at = np.clip(at, x[first], x[last])
+    k = np.searchsorted(key, at + offset, side='right') - 1
+    k = np.clip(k, first, last)
+    nxt = np.minimum(k + 1, last)
+    dx = x[nxt] - x[k]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_at = y[k] + np.where(dx > 0, (at - x[k]) / dx, 0.0) * (y[nxt] - y[k])
+    return area[k] - area[first] + (at - x[k]) * (y[k] + y_at) / 2
+
+@profiled
+def partial_auc(fpr, tpr, op1=0.0, op2=1.0, Sp=True, mcclish=False, offsets=None):
+    """
+    Exact partial AUC between Se or Sp operating points op1 and op2
+
+    The ROC curve is linearly interpolated at the boundaries, so no operating
+    point needs to fall exactly on op1 or op2. Many ranges (arrays op1, op2)
+    and many curves (2-D fpr, tpr or concatenated curves with offsets) are
+    evaluated in one call with a single cumulative area and searchsorted.
      Note: for pauc to be estimated accurately drop_intermediate=False in
-     metrics.roc_curve
+     roc_curve
 
     Parameters
     ----------
-    fpr : array, shape = [>2]
+    fpr : array, shape = [>2], [n_curves, n_points] or concatenated curves
         Increasing false positive rates
 
-    tpr : array, shape = [>2]
+    tpr : array, same shape as fpr
         Increasing true positive rates
 
-    Op1,Op2 : float, optional (default = 0.0,1.0), i.e., whole curve full AUC
+    Op1,Op2 : float or array, optional (default = 0.0,1.0), i.e., whole curve full AUC
         Specificity or Sensitivity points between which to calculate partial
-        auc (range 0,1)
+        auc (range 0,1), arrays are broadcast against each other, op1 < op2
 
     Sp : boolean, optional (default=True)
         Whether operating points specify a range on Specificty (TNR=1-FPR) or
-        Sensitivity (TPR) i.e., a vertical (Sp) or horizontal (Se) partial AUC
+        Sensitivity (TPR) i.e., a vertical (Sp) or horizontal (Se) partial AUC.
+        The horizontal partial AUC is the area between the curve and FPR = 1
+        within op1 <= TPR <= op2
+
+    mcclish : boolean, optional (default=False)
+        Whether to return the McClish standardized partial AUC,
+        0.5*(1 + (pAUC - min)/(max - min)), where min is the area of the
+        chance diagonal and max the area of a perfect classifier over the
+        range, so 0.5 is chance and 1.0 perfect whatever the range
+
+    offsets : array, shape = [n_curves + 1], optional (default=None)
+        Start of each curve when fpr, tpr are concatenated curves (as in
+        BatchROC)
 
     Return
     ------
-    p_auc : float
-        Partial AUC in between op1 and op2
+    p_auc : float or array, shape = [n_curves] + broadcast shape of op1, op2
+        Partial AUC in between op1 and op2, a float for a single curve and
+        scalar op1, op2
     """
-
-    if (op1 >= op2):
+    op1 = np.asarray(op1, dtype=np.float64)
+    op2 = np.asarray(op2, dtype=np.float64)
+    if np.any(op1 >= op2):
         raise ValueError('op1 must be less than op2')
-
-    if (op1 > 0.0) or (op2 < 1.0):
+    op1, op2 = np.broadcast_arrays(op1, op2)
+
+    fpr = np.asarray(fpr, dtype=np.float64)
+    tpr = np.asarray(tpr, dtype=np.float64)
+    single = offsets is None and fpr.ndim == 1
+    if offsets is None:
+        fpr2 = np.atleast_2d(fpr)
+        offsets = np.arange(fpr2.shape[0] + 1) * fpr2.shape[1]
+        fpr = fpr.ravel()
+        tpr = tpr.ravel()
+    offsets = np.asarray(offsets)
+    n_curves = offsets.size - 1
+    shape = (n_curves,) + (1,) * op1.ndim
+    first = offsets[:-1].reshape(shape)
+    last = offsets[1:].reshape(shape) - 1
+
+    if Sp:
+        # vertical slice, area under tpr(fpr) over 1 - op2 <= fpr <= 1 - op1
+        x, y, lo, hi = fpr, tpr, 1 - op2, 1 - op1
+    else:
+        # horizontal slice, area under fpr(tpr) over op1 <= tpr <= op2,
+        # the pAUC is the rest of the band
+        x, y, lo, hi = tpr, fpr, op1, op2
+    # cumulative trapezoids, none across the boundary between two curves
+    seg = np.diff(x) * (y[1:] + y[:-1]) / 2
+    seg[offsets[1:-1] - 1] = 0.0
+    area = np.r_[0.0, np.cumsum(seg)]
+    # x lies in [0, 1], shifting curve c by 2c makes one sorted key
+    offset = 2.0 * np.arange(n_curves).reshape(shape)
+    key = x + 2.0 * np.repeat(np.arange(n_curves), np.diff(offsets))
+
+    p_auc = (_area_to(x, y, first, last, key, offset, area, hi) -
+             _area_to(x, y, first, last, key, offset, area, lo))
+    if not Sp:
+        p_auc = (hi - lo) - p_auc
+    if mcclish:
+        max_auc = hi - lo
         if Sp:
-            # Constraints on Sp, vertical slice of ROC curve
-            # find those operating points and zero out either side of them
-            op1 = 1 - op1
-            op2 = 1 - op2
-            mask1 = np.greater_equal(fpr,np.ones(fpr.size)*op2)
-            mask2 = np.less_equal(fpr,np.ones(fpr.size)*op1)
-            fpr = fpr*np.logical_and(mask1,mask2)
-            tpr = tpr*np.logical_and(mask1,mask2)
-            p_auc = metrics.auc(fpr,tpr,reorder=True)
+            min_auc = (hi**2 - lo**2) / 2
         else:
-            # Constraints on Se, Calculate horizontal slice of ROC curve
-            # By first find the Sp at op1 and op2 calculating veritcal area
-            # adding in rectangular area to left of this and subtract area below
-            i=0
-            while tpr[i] < op1: i += 1
+            min_auc = (hi - lo) - (hi**2 - lo**2) / 2
+        p_auc = 0.5 * (1 + (p_auc - min_auc) / (max_auc - min_auc))
+
+    if single:
+        p_auc = p_auc[0]
+        if p_auc.ndim == 0:
+            return float(p_auc)
+    return p_auc
 
-            Sp2 = 1 - fpr[i]
+def _precision(tp, fp):
+    # tp/(tp + fp), 1.0 where nothing is predicted (the start of a PR curve)
+    tp = np.asarray(tp, dtype=np.float64)
+    pred = tp + fp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(pred == 0, 1.0, tp / pred)
 
-            i=len(tpr)-1
-            while tpr[i] > op2: i -= 1
+@profiled
+def ppv_curve(fpr, tpr, Nn, Np):
+    """
+    Positive Predictive Value PPV = TP/(TP+FP) at every point of a ROC curve
+    Points where nothing is predicted positive are given a PPV of 1.0, the
+    start of a precision-recall curve (see precision_recall_curve)
 
-            Sp1 = 1 - fpr[i]
-            p_auc = partial_auc(fpr,tpr,Sp1,Sp2,Sp=True)
-            p_auc += ((op2-op1)*(Sp1)) - ((Sp2-Sp1)*op1)
+    Parameters
+    ----------
+    fpr, tpr : array, shape = [n]
+        False and true positive rates of the ROC curve
+    Nn, Np : int
+        The number of negative and positive samples in the dataset the ROC curve
+        was constructed from
 
-    else:
-        p_auc = metrics.auc(fpr,tpr)
+    Returns
+    -------
+    ppv : array, shape = [n]
+    """
+    return _precision(np.asarray(tpr) * Np, np.asarray(fpr) * Nn)
 
-    return p_auc
+@profiled
+def npv_curve(fpr, tpr, Nn, Np):
+    """
+    Negative Predictive Value NPV = TN/(TN+FN) at every point of a ROC curve
+    Points where nothing is predicted negative are given a NPV of 1.0, as
+    npv_specificity_curve
+
+    Parameters
+    ----------
+    fpr, tpr : array, shape = [n]
+        False and true positive rates of the ROC curve
+    Nn, Np : int
+        The number of negative and positive samples in the dataset the ROC curve
+        was constructed from
+
+    Returns
+    -------
+    npv : array, shape = [n]
+    """
+    return _precision((1 - np.asarray(fpr)) * Nn, (1 - np.asarray(tpr)) * Np)
+
+@profiled
+def precision_recall_curve(target, score, pos_label=None, sample_weight=None):
+    """
+    Precision-recall curve from the cumulative counts of roc_curve (one sort)
+
+    Every distinct score is a point, in the order of roc_curve (decreasing
+    thresholds, increasing recall), starting at recall 0 and precision 1
+    where nothing is predicted positive (thresh = inf). Use
+    average_precision for the area, NOT a linear interpolation
+
+    Parameters
+    ----------
+    target, score, pos_label, sample_weight : see roc_curve
+
+    Returns
+    -------
+    precision, recall, thresh : array, shape = [n_thresholds]
+        Precision (PPV) and recall (TPR) of predicting score >= thresh
+    """
+    y, score, sample_weight = _binary_inputs(target, score, pos_label, sample_weight)
+    fps, tps, thresh = _roc_counts(y, score, sample_weight)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        recall = tps / tps[-1]
+    return (_precision(tps, fps), recall, thresh)
+
+@profiled
+def npv_specificity_curve(target, score, pos_label=None, sample_weight=None):
+    """
+    Inverse precision-recall curve, NPV v specificity, from the cumulative
+    counts of roc_curve (one sort)
+
+    The precision-recall curve of the negative class: points in increasing
+    specificity (increasing thresholds), ending at specificity 1 where nothing
+    is predicted positive (thresh = inf). The NPV is 1 where nothing is
+    predicted negative. Use average_precision(npv, tnr) for the area
+
+    Parameters
+    ----------
+    target, score, pos_label, sample_weight : see roc_curve
+
+    Returns
+    -------
+    npv, tnr, thresh : array, shape = [n_thresholds]
+        NPV and specificity (TNR) of predicting negative for score < thresh
+    """
+    y, score, sample_weight = _binary_inputs(target, score, pos_label, sample_weight)
+    fps, tps, thresh = _roc_counts(y, score, sample_weight)
+    tns = fps[-1] - fps
+    fns = tps[-1] - tps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tnr = tns / fps[-1]
+    return (_precision(tns, fns)[::-1], tnr[::-1], thresh[::-1])
+
+def average_precision(precision, recall):
+    """
+    Exact average precision, the step interpolated area under a
+    precision-recall curve: sum of (R_n - R_(n-1)) * P_n over the points, as
+    sklearn.metrics.average_precision_score. Precision is not interpolated
+    linearly between points, which overstates the area
+
+    Parameters
+    ----------
+    precision, recall : array, shape = [n]
+        As precision_recall_curve (increasing recall), or the npv, tnr of
+        npv_specificity_curve
+
+    Returns
+    -------
+    ap : float
+    """
+    precision = np.asarray(precision, dtype=np.float64)
+    return float(np.sum(np.diff(recall) * precision[1:]))
 
-def decision_threshold(fpr, tpr, thresh, dec_t):
+class OperatingPoints(object):
+    """
+    Vectorised operating point engine for a ROC curve
+
+    Builds the rates (tnr, fnr), Youden's J, the balanced error and, when the
+    class counts are given, the PPV, NPV and number of correct decisions at
+    every point on the curve as arrays once. Operating point queries (best_ppv,
+    best_npv, max_youden_J, bayes_error, neyman_pearson and decision_threshold)
+    are then answered with argmax/searchsorted rather than a Python loop over
+    the thresholds.
+
+    Parameters
+    ----------
+    fpr : array, shape = [n]
+        Increasing false positive rates
+
+    tpr : array, shape = [n]
+        Increasing true positive rates
+
+    thresh : array, shape = [n]
+        Decreasing thresholds on the decision function
+
+    Nn, Np : int, optional (default=None)
+        The number of negative and positive samples in the dataset the ROC curve
+        was constructed from. Required for the PPV, NPV and Bayes error queries
+
+    Alternatively fpr is a RocResult and the other arguments are not given,
+    its (cached) arrays are shared rather than recomputed
+
+    Example
+    -------
+    ops = OperatingPoints(fpr, tpr, thresh, Nn, Np)
+    Jval, Jfpr, Jtpr, Jthresh = ops.max_youden_J()
+    Bppv, Bppv_fpr, Bppv_tpr, Bppvth = ops.best_ppv(0.9)
+    """
+
+    @profiled
+    def __init__(self, fpr, tpr=None, thresh=None, Nn=None, Np=None):
+        if isinstance(fpr, RocResult):
+            # share the rates, PPV and NPV arrays the result already holds
+            result = fpr
+            self.fpr, self.tpr, self.thresh = result.roc_curve()
+            self.Nn, self.Np = Nn, Np = result.Nn, result.Np
+            self.tnr, self.fnr = result.tnr, result.fnr
+        else:
+            result = None
+            self.fpr = np.asarray(fpr)
+            self.tpr = np.asarray(tpr)
+            self.thresh = np.asarray(thresh)
+            self.Nn = Nn
+            self.Np = Np
+            self.tnr = 1 - self.fpr
+            self.fnr = 1 - self.tpr
+        # Youden's J and the balanced error rate (1 - J)/2
+        self.J = self.tpr + self.tnr - 1
+        self.balanced_error = (self.fpr + self.fnr) / 2
+        if result is not None:
+            self.ppv, self.npv = result.ppv, result.npv
+            self.n_correct = self.tpr * Np + self.tnr * Nn
+        elif Nn is not None and Np is not None:
+            self.ppv = ppv_curve(self.fpr, self.tpr, Nn, Np)
+            self.npv = npv_curve(self.fpr, self.tpr, Nn, Np)
+            # number of correct decisions (TP + TN) at each operating point
+            self.n_correct = self.tpr * Np + self.tnr * Nn
+        else:
+            self.ppv = self.npv = self.n_correct = None
+
+    def _check_counts(self):
+        if self.Nn is None or self.Np is None:
+            raise ValueError('Nn and Np are required for this operating point')
+
+    def _point(self, i):
+        return (self.fpr[i], self.tpr[i], self.thresh[i])
+
+    @profiled
+    def best_ppv(self, target_ppv=1.0):
+        """
+        PPV closest to target_ppv, ties resolved to the lowest threshold
+        Returns (Bppv, Bppv_fpr, Bppv_tpr, Bppv_thresh), see best_ppv
+        """
+        self._check_counts()
+        diff = np.abs(target_ppv - self.ppv)
+        diff[self.tpr == 0.0] = np.inf
+        # last (lowest threshold) index of the minimum difference
+        i = len(diff) - 1 - np.argmin(diff[::-1])
+        if not diff[i] <= 1.0:
+            return (0.0, 0.0, 0.0, 0.0)
+        return (self.ppv[i],) + self._point(i)
+
+    @profiled
+    def best_npv(self, target_npv=1.0):
+        """
+        NPV closest to target_npv, ties resolved to the highest threshold
+        Returns (Bnpv, Bnpv_fpr, Bnpv_tpr, Bnpv_thresh), see best_npv
+        """
+        self._check_counts()
+        diff = np.abs(target_npv - self.npv)
+        diff[self.tnr == 0.0] = np.inf
+        i = np.argmin(diff)
+        if not diff[i] < 1.0:
+            return (0.0, 0.0, 0.0, 0.0)
+        return (self.npv[i],) + self._point(i)
+
+    @profiled
+    def max_youden_J(self):
+        """
+        Maximum Youden's J, returns (Jval, Jfpr, Jtpr, Jthresh), see max_youden_J
+        """
+        i = np.argmax(self.J)
+        if not self.J[i] > 0.0:
+            return (0.0, 0.0, 0.0, 0.0)
+        return (self.J[i],) + self._point(i)
+
+    @profiled
+    def bayes_error(self):
+        """
+        Minimum error rate, returns (Berror, Bfpr, Btpr, Bthresh), see bayes_error
+        """
+        self._check_counts()
+        i = np.argmax(self.n_correct)
+        if not self.n_correct[i] > 0.0:
+            return (1.0, 1.0, 0.0, 0.0)
+        Berror = 1 - (self.n_correct[i] / (self.Nn + self.Np))
+        return (Berror,) + self._point(i)
+
+    @profiled
+    def neyman_pearson(self, min_rate=0.95, Se=True):
+        """
+        Neyman-Pearson operating point, returns (np_fpr, np_tpr, np_thresh),
+        see neyman_pearson
+        """
+        if Se:
+            # first (highest threshold) point with tpr >= min_rate
+            i = np.searchsorted(self.tpr, min_rate, side='left')
+        else:
+            # last point before tnr (decreasing) drops below min_rate
+            i = np.searchsorted(-self.tnr, -min_rate, side='right') - 1
+        if i < 0 or i >= len(self.tpr):
+            return (0.0, 0.0, 0.0)
+        return self._point(i)
+
+    @profiled
+    def decision_threshold(self, dec_t):
+        """
+        Operating point at decision threshold dec_t, returns
+        (t_fpr, t_tpr, t_thresh), see decision_threshold
+        """
+        # thresh in decreasing order, find first one that meets dec_t
+        i = np.searchsorted(-self.thresh, -dec_t, side='left')
+        if i >= len(self.thresh):
+            return None
+        return self._point(i)
+
+@profiled
+def decision_threshold(fpr, tpr=None, thresh=None, dec_t=0.5):
     """
     Function that finds the fpr, tpr that meets a decision threshold
     
     Parameters
     ----------
-    fpr : array, shape = [>2]
-        Increasing false positive rates
+    fpr : array, shape = [>2] or RocResult
+        Increasing false positive rates, or a RocResult (tpr, thresh not given)
 
     tpr : array, shape = [>2]
         Increasing true positive rates
@@ -374,20 +876,18 @@ def decision_threshold(fpr, tpr, thresh, dec_t):
     t_fpr, T_tpr, t_thresh : float
         The operating point (fpr, tpr) that meets the decision threshold    
     """
-    for i, t_val in enumerate(thresh):
-        # thresh decreasing order, find first one that meets dec_t
-        if t_val <= dec_t:
-            return (fpr[i], tpr[i], t_val)
+    return _ops(fpr, tpr, thresh).decision_threshold(dec_t)
 
-def neyman_pearson(fpr, tpr, thresh, min_rate=0.95, Se=True):
+@profiled
+def neyman_pearson(fpr, tpr=None, thresh=None, min_rate=0.95, Se=True):
     """
     Function that finds the operating point (threshold posterior) on a ROC curve
     that maximises Sp given a constraint on on a minimum level of Sp (or vice versa)
 
     Parameters
     ----------
-    fpr : array, shape = [>2]
-        Increasing false positive rates
+    fpr : array, shape = [>2] or RocResult
+        Increasing false positive rates, or a RocResult (tpr, thresh not given)
 
     tpr : array, shape = [>2]
         Increasing true positive rates
@@ -407,24 +907,9 @@ def neyman_pearson(fpr, tpr, thresh, min_rate=0.95, Se=True):
         The operating point (fpr, tpr) that meets the constraint on min_rate and
         associated decision threshold
     """
-    np_tpr = np_thresh = np_fpr = 0.0
-    if Se:
-        for i, tpr_val in enumerate(tpr):
-            if tpr_val >= min_rate:
-                np_tpr = tpr_val
-                np_fpr = fpr[i]
-                np_thresh = thresh[i]
-                return (np_fpr, np_tpr, np_thresh)
-
-    else:
-        # enumerate a decreasing array of tnr
-        for i, tnr_val in enumerate(1-fpr):
-            if tnr_val < min_rate:
-                np_fpr = fpr[i-1]
-                np_tpr = tpr[i-1]
-                np_thresh = thresh[i-1]
-                return (np_fpr, np_tpr, np_thresh)
+    return _ops(fpr, tpr, thresh).neyman_pearson(min_rate, Se)
 
+@profiled
 def chi_sqr_val(tpr, fpr, Nn, Np):
     """
     function to calculate chi sqaured value given:
@@ -457,15 +942,17 @@ def chi_sqr_val(tpr, fpr, Nn, Np):
     
     return chi
 
-def best_npv(fpr, tpr, thresh, Nn, Np, target_npv=1.0):
+@profiled
+def best_npv(fpr, tpr=None, thresh=None, Nn=None, Np=None, target_npv=1.0):
     """
     Finds the best Negative Predictive Value (NPV) and associated operating point
     NPV = TN/(TN+FN) - note depends of prevelance of negative class
 
     Parameters
     ----------
-    fpr : array, shape = [n]
-        False positive rates, i.e., x coordinates of ROC curve.
+    fpr : array, shape = [n] or RocResult
+        False positive rates, i.e., x coordinates of ROC curve. Or a RocResult,
+        whose cached operating point arrays are used, tpr, thresh, Nn, Np not given
     tpr : array, shape = [n]
         True positive rates (sensitivity), i.e., y coordinates of ROC curve.
     Nn, Np : int
@@ -480,35 +967,19 @@ def best_npv(fpr, tpr, thresh, Nn, Np, target_npv=1.0):
     Bnpv, Bnpv_fpr, Bnpv_tpr, Bnpv_thresh : float
         Best NPV and operating point (fpr, tpr) closest to target NPV
     """
-    tnr = 1-fpr
-    fnr = 1-tpr
-    npv = np.zeros(len(tnr))
-    Bnpv = 0.0
-    npv_diff = 1.0
-    for i, tnr_val in enumerate(tnr):
-        if tnr_val == 0.0:
-            npv[i] = 0.0
-        else:
-            npv[i] = (tnr_val*Nn)/((tnr_val*Nn) + (fnr[i]*Np)) 
-            diff = abs(target_npv - npv[i])
-            if diff < npv_diff:
-                npv_diff = diff
-                Bnpv = npv[i]
-                Bnpv_tpr = tpr[i]
-                Bnpv_fpr = fpr[i]
-                Bnpv_thresh = thresh[i]
-
-    return (Bnpv, Bnpv_fpr, Bnpv_tpr, Bnpv_thresh)
+    return _ops(fpr, tpr, thresh, Nn, Np).best_npv(target_npv)
 
-def best_ppv(fpr, tpr, thresh, Nn, Np, target_ppv=1.0):
+@profiled
+def best_ppv(fpr, tpr=None, thresh=None, Nn=None, Np=None, target_ppv=1.0):
     """
     Finds the best Positive Predictive Value (PPV) and associated operating point
     PPV = TP/(TP+FP) - note depends of prevelance of positive class
 
     Parameters
     ----------
-    fpr : array, shape = [n]
-        False positive rates, i.e., x coordinates of ROC curve.
+    fpr : array, shape = [n] or RocResult
+        False positive rates, i.e., x coordinates of ROC curve. Or a RocResult,
+        whose cached operating point arrays are used, tpr, thresh, Nn, Np not given
     tpr : array, shape = [n]
         True positive rates (sensitivity), i.e., y coordinates of ROC curve.
     Nn, Np : int
@@ -524,25 +995,10 @@ def best_ppv(fpr, tpr, thresh, Nn, Np, target_ppv=1.0):
         Best PPV and operating point (fpr, tpr) closest to target PPV
     """
 
-    ppv = np.zeros(len(tpr))
-    Bppv = 0.0
-    ppv_diff = 1.0
-    for i, tpr_val in enumerate(tpr):
-        if tpr_val == 0.0:
-            ppv[i] = 0.0
-        else:
-            ppv[i] = (tpr_val*Np)/((tpr_val*Np) + (fpr[i]*Nn))
-            diff = abs(target_ppv - ppv[i])
-            if diff <= ppv_diff:
-                ppv_diff = diff
-                Bppv = ppv[i]
-                Bppv_tpr = tpr[i]
-                Bppv_fpr = fpr[i]
-                Bppv_thresh = thresh[i]
-
-    return (Bppv, Bppv_fpr, Bppv_tpr, Bppv_thresh)
+    return _ops(fpr, tpr, thresh, Nn, Np).best_ppv(target_ppv)
 
-def max_youden_J(fpr, tpr, thresh):
+@profiled
+def max_youden_J(fpr, tpr=None, thresh=None):
     """
     Finds the empirical maximum value of Youden's J statistic (TPR - FPR = Se + Sp - 1)
     and associated ROC point. Youden's J is the vertical distance from the by chance
@@ -554,8 +1010,9 @@ def max_youden_J(fpr, tpr, thresh):
 
     Parameters
     ----------
-    fpr : array, shape = [n]
-        False positive rates, i.e., x coordinates of ROC curve.
+    fpr : array, shape = [n] or RocResult
+        False positive rates, i.e., x coordinates of ROC curve. Or a RocResult,
+        whose cached operating point arrays are used, tpr and thresh not given
     tpr : array, shape = [n]
         True positive rates (sensitivity), i.e., y coordinates of ROC curve.
 
@@ -566,27 +1023,18 @@ def max_youden_J(fpr, tpr, thresh):
         and (posterior) decision threshold
     """
 
-    Jval = Jtpr = Jtnr = Jthresh = 0.0
-    tnr = 1-fpr
-    # Traverse the ROC curve finding the point that maximise J (furthest away from diagonal)
-    for i in range(len(tpr)):
-        if (tpr[i] + tnr[i] - 1) > Jval:
-            Jtpr = tpr[i]
-            Jtnr = tnr[i]
-            Jfpr = fpr[i]
-            Jthresh = thresh[i]
-            Jval = Jtnr + Jtpr - 1
-
-    return (Jval, Jfpr, Jtpr, Jthresh)
+    return _ops(fpr, tpr, thresh).max_youden_J()
 
-def bayes_error(fpr, tpr, thresh, Nn, Np):
+@profiled
+def bayes_error(fpr, tpr=None, thresh=None, Nn=None, Np=None):
     """
     Finds the empirical Bayes error (minimum error rate) and associated ROC point
 
     Parameters
     ----------
-    fpr : array, shape = [n]
-        False positive rates, i.e., x coordinates of ROC curve.
+    fpr : array, shape = [n] or RocResult
+        False positive rates, i.e., x coordinates of ROC curve. Or a RocResult,
+        whose cached operating point arrays are used, tpr, thresh, Nn, Np not given
     tpr : array, shape = [n]
         True positive rates (sensitivity), i.e., y coordinates of ROC curve.
     Nn, Np : int
@@ -600,26 +1048,9 @@ def bayes_error(fpr, tpr, thresh, Nn, Np):
         and (posterior) decision threshold
     """
 
-    BAcc = Btpr = Btnr = Bthresh = 0.0
-    # convert rates into counts
-    tpr = tpr*Np
-    tnr = (1 - fpr)*Nn
-    # Then traverse the ROC curve finding the point that makes the least errors
-    for i in range(len(tpr)):
-        if (tpr[i] + tnr[i]) > BAcc:
-            Btpr = tpr[i]
-            Btnr = tnr[i]
-            Bthresh = thresh[i]
-            BAcc = Btnr + Btpr
-
-    # convert this to error and the rates (fpr, tpr) of that point
-    Berror = 1 - (BAcc/(Nn+Np))
-    Btpr = Btpr/Np
-    Btnr = Btnr/Nn
-    Bfpr = 1 - Btnr
-
-    return (Berror, Bfpr, Btpr, Bthresh)
+    return _ops(fpr, tpr, thresh, Nn, Np).bayes_error()
 
+@profiled
 def sew_auc(AUC, nn, np):
     """
      function sew_auc(AUC, nn, np)
@@ -637,257 +1068,339 @@ def sew_auc(AUC, nn, np):
      Return
      ------
      std_err : float
+
+     See delong_auc for a variance estimate based on the actual scores
     """
     Q1 = AUC/(2-AUC)
     Q2 = (2*AUC**2)/(1+AUC)
-    std_err = ((AUC*(1-AUC))+((np-1)*(Q1-AUC**2))+((nn-1)*(Q2-AUC**2)))/(nn*np)
+    var = ((AUC*(1-AUC))+((np-1)*(Q1-AUC**2))+((nn-1)*(Q2-AUC**2)))/(nn*np)
+    std_err = var**0.5
 
     return std_err
 
-def plot_roc(target, score, plot_type='SeSp', title=None, save_pdf=False, min_err=False,
-             dec_T=0.0, ppv_npv=False, n_p='', np_min=0.95, max_J=False,
-             pos_label=None, sample_weight=None, drop_intermediate=True):
+def _ops(fpr, tpr=None, thresh=None, Nn=None, Np=None):
+    # the cached engine of a RocResult, else one built from the arrays
+    if isinstance(fpr, RocResult):
+        return fpr.operating_points
+    return OperatingPoints(fpr, tpr, thresh, Nn, Np)
+
+class RocResult(object):
     """
+    A computed ROC curve with its class counts, the derived arrays and
+    statistics computed on first use and kept
 
-    Plot and print a Receiver Operating Characteristic (ROC) curve
-    Adds a title, a legend inculding AUC +/- standard error and saves a pdf
+    Accepted by plot_roc in place of target, and by OperatingPoints and the
+    operating point functions (best_ppv, max_youden_J, ...) in place of fpr,
+    so re-plotting or querying the same predictions reuses the sort, the
+    AUC, the PPV/NPV arrays and the operating point engine. See roc_result
+    and RocCache to compute (and cache) one from target and score
 
-    Note this function is limited to binary classification tasks (dichotemisers)
-    Uses sklearn.metrics.roc_curve and metrics.auc
+    Parameters
+    ----------
+    fpr, tpr, thresh : array, shape = [n]
+        As returned by roc_curve with drop_intermediate=False
+
+    Nn, Np : float
+        (Weighted) number of negative and positive samples
+
+    Attributes (lazy)
+    ----------
+    auc, sew : float
+        AUC and its Hanley & McNeil standard error (sew_auc)
+
+    tnr, fnr, ppv, npv : array, shape = [n]
+        Specificity, miss rate, PPV and NPV at every point, see ppv_curve
+        and npv_curve. plot_roc draws its 'pr' and 'ipr' curves from them
+
+    operating_points : OperatingPoints
+    """
+    __slots__ = ('fpr', 'tpr', 'thresh', 'Nn', 'Np', '_auc', '_sew', '_tnr', '_fnr', '_ppv',
+                 '_npv', '_ops')
+
+    def __init__(self, fpr, tpr, thresh, Nn, Np):
+        self.fpr = np.asarray(fpr)
+        self.tpr = np.asarray(tpr)
+        self.thresh = np.asarray(thresh)
+        self.Nn = Nn
+        self.Np = Np
+        self._auc = self._sew = self._tnr = self._fnr = None
+        self._ppv = self._npv = self._ops = None
+
+    def roc_curve(self):
+        return (self.fpr, self.tpr, self.thresh)
+
+    @property
+    def auc(self):
+        if self._auc is None:
+            self._auc = partial_auc(self.fpr, self.tpr)
+        return self._auc
+
+    @property
+    def sew(self):
+        if self._sew is None:
+            self._sew = sew_auc(self.auc, self.Nn, self.Np)
+        return self._sew
+
+    @property
+    def tnr(self):
+        if self._tnr is None:
+            self._tnr = 1 - self.fpr
+        return self._tnr
+
+    @property
+    def fnr(self):
+        if self._fnr is None:
+            self._fnr = 1 - self.tpr
+        return self._fnr
+
+    @property
+    def ppv(self):
+        if self._ppv is None:
+            self._ppv = ppv_curve(self.fpr, self.tpr, self.Nn, self.Np)
+        return self._ppv
+
+    @property
+    def npv(self):
+        if self._npv is None:
+            self._npv = npv_curve(self.fpr, self.tpr, self.Nn, self.Np)
+        return self._npv
+
+    @property
+    def operating_points(self):
+        if self._ops is None:
+            self._ops = OperatingPoints(self)
+        return self._ops
+
+    def partial_auc(self, op1=0.0, op2=1.0, Sp=True, mcclish=False):
+        """Partial AUC of the curve, see partial_auc"""
+        return partial_auc(self.fpr, self.tpr, op1, op2, Sp, mcclish)
+
+def _content_key(target, score, pos_label, sample_weight):
+    # digest of the bytes, dtypes and shapes of the inputs
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr(pos_label).encode())
+    for a in (target, score, sample_weight):
+        if a is None:
+            h.update(b'None')
+            continue
+        a = np.ascontiguousarray(a)
+        h.update('{}{}'.format(a.dtype.str, a.shape).encode())
+        if a.dtype.hasobject:
+            h.update(repr(a.tolist()).encode())
+        else:
+            h.update(a.view(np.uint8).ravel())
+    return h.hexdigest()
+
+class RocCache(object):
+    """
+    Bounded LRU cache of RocResults keyed by a hash of the content of
+    (target, score, pos_label, sample_weight), so equal predictions, even in
+    other arrays, are sorted once
+
+    Parameters
+    ----------
+    maxsize : int, optional (default=8)
+        Number of results kept
+
+    max_points : int, optional (default=2**26)
+        Total curve points kept, least recently used results are evicted
+        beyond it (the curves dominate the memory, 3 float64 per point)
+    """
+
+    def __init__(self, maxsize=8, max_points=2**26):
+        self.maxsize = maxsize
+        self.max_points = max_points
+        self._results = OrderedDict()
+        self.points = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        result = self._results.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._results.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        if key in self._results:
+            self.points -= self._results.pop(key).fpr.size
+        self._results[key] = result
+        self.points += result.fpr.size
+        while len(self._results) > 1 and (len(self._results) > self.maxsize or
+                                          self.points > self.max_points):
+            self.points -= self._results.popitem(last=False)[1].fpr.size
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        self._results.clear()
+        self.points = 0
+        self.hits = self.misses = 0
+
+@profiled
+def roc_result(target, score, pos_label=None, sample_weight=None, cache=None):
+    """
+    RocResult of target and score, the full curve (drop_intermediate=False)
+    and the (weighted) class counts, see roc_curve
 
     Parameters
     ----------
-     target : array, shape = [n_samples]
-         True binary labels in range {0, 1} or {-1, 1}.  If labels are not
-         binary, pos_label should be explicitly given.
-
-     score : array, shape = [n_samples]
-         Target scores, can either be probability estimates of the positive
-         class, confidence values, or non-thresholded measure of decisions
-         (say, as returned by softmax).
-
-     plot_type : str, optional (default='SeSp')
-         The type of ROC to plot:
-             'SeSp' Sensitivity (TPR) v Specificty (TNR = 1 - FPR)
-             'ROC'  ROC curve true positive rate (TPR) v false positive rate (FPR)
-             'PR'   Precision (PPV = TP/(TP+FP)) v Recall (TPR = Sensitivity)
-             'IPR'  Inverse Precision-Recall,
-                    i.e., Negative Predictive Value (NPV) v Specifity (TNR)
-             'Chi'  ROC curve with Chi Squared contours where alpha = 0.05
-                    critical value = 3.84
-
-             NOTE : Both Precision (PPV) and its inverse (NPV) are class prior
-                    (skew) dependent and so only make sense when the test set on
-                    which they are measured has the "natural" priors expected in
-                    population, i.e., not an "enriched" data set Chi is dependent
-                    on both the number of positive and negative samples
-
-     title : str, optional (default=None)
-         Title to prepend to the figure title and pdf file (if saved)
-
-     save_pdf : boolean, optional (default=False)
-         Whether a pdf file of the figure is saved in current working directory
-
-     min_err : boolean, optional (default=False)
-         Whether to highlight the minimum error operating point
-         
-     dec_T : float, optional (default=0.0 = False)
-         Whether to highlight the operating point at decision threshold score value  
-         If the score is a calibrated probability 0.5 is a natural threshold value 
-
-     ppv_npv : boolean, optional (default=False)
-         Whether to highlight the NPV and PPV operating points that meet np_min below
-
-     n_p : str, optional (default=Empty)
-         Whether to find and plot the Neyman-Pearson threshold that meets a
-         minimum constraint on 'Se' or 'Sp'
-
-     np_min : float, optional (default=0.95)
-         if n_p is NOT empty
-             Find the operating point that meets this minimum 'Se' or 'Sp' value
-         elseif n_p is empty this is the npv/ppv value for best_npv/best_ppv to find
-
-     max_J : boolean, optional (default=False)
-         Whether to highlight the operating point with maximum Youden's J
-         (AKA informedness or deltaP') i.e., (TPR - FPR) max vertical distance
-         from the by-chance diagonal line
-
-     pos_label : int or str, default=None
-         Label considered as positive in target, others are considered negative.
-
-     sample_weight : array-like of shape = [n_samples], optional
-         Sample weights, default=None
-
-     drop_intermediate : boolean, optional (default=True)
-         Whether to drop some suboptimal thresholds which would not appear
-         on a plotted ROC curve. This is useful in order to create lighter
-         ROC curves.
+    target, score, pos_label, sample_weight : see roc_curve
+
+    cache : RocCache, optional (default=None)
+        Cache looked up by the content of the inputs before sorting, the
+        result is added to it. None computes without caching
 
     Returns
-    --------
-       fig, returns the figure handle and optionally saves it as a pdf
+    -------
+    result : RocResult
+        Its arrays are read only, as they may be shared through the cache
+    """
+    if cache is not None:
+        key = _content_key(np.asarray(target), np.asarray(score), pos_label,
+                           None if sample_weight is None else np.asarray(sample_weight))
+        result = cache.get(key)
+        if result is not None:
+            return result
+    y, score, sample_weight = _binary_inputs(target, score, pos_label, sample_weight)
+    fps, tps, thresh = _roc_counts(y, score, sample_weight)
+    Nn, Np = float(fps[-1]), float(tps[-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fpr = fps / Nn
+        tpr = tps / Np
+    for a in (fpr, tpr, thresh):
+        a.setflags(write=False)
+    result = RocResult(fpr, tpr, thresh, Nn, Np)
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+def _tie_groups(z):
+    """
+    First and last position of the tie group of each element of the rows of
+    an array z, shape = [n_rows, n] whose rows are sorted in increasing order
+    """
+    n = z.shape[1]
+    idx = np.arange(n)
+    start = np.ones(z.shape, dtype=bool)
+    start[:, 1:] = z[:, 1:] != z[:, :-1]
+    end = np.ones(z.shape, dtype=bool)
+    end[:, :-1] = start[:, 1:]
+    first = np.maximum.accumulate(np.where(start, idx, 0), axis=1)
+    last = np.minimum.accumulate(np.where(end, idx, n)[:, ::-1], axis=1)[:, ::-1]
+    return first, last
+
+def _delong_components(z, y, m, n):
+    """
+    DeLong structural components of the models (rows) in z, shape = [k, N]
+    For a positive case the fraction of negatives scored below it, for a
+    negative case the fraction of positives scored above it (ties count half)
+    """
+    order = np.argsort(z, axis=1)
+    zs = np.take_along_axis(z, order, axis=1)
+    ys = y[order]
+    first, last = _tie_groups(zs)
+    # number of positives before each position, ranks compared by tie group
+    cpos = np.zeros((zs.shape[0], zs.shape[1] + 1))
+    np.cumsum(ys, axis=1, out=cpos[:, 1:])
+    pos_mid = 0.5 * (np.take_along_axis(cpos, first, axis=1) +
+                     np.take_along_axis(cpos, last + 1, axis=1))
+    neg_mid = 0.5 * (first + last + 1) - pos_mid
+    v = np.where(ys, neg_mid / n, 1.0 - pos_mid / m)
+    out = np.empty(zs.shape)
+    np.put_along_axis(out, order, v, axis=1)
+    return out[:, y], out[:, ~y]
+
+@profiled
+def delong_auc(target, score, pos_label=None, block_size=2**24, n_jobs=1):
+    """
+    AUCs, their DeLong covariance matrix and paired difference p-values
+    for one or more models scored on the same cases
 
-    Example
-    --------
-
-    plot_roc(np.array([0, 0, 0, 1, 1, 1]), np.array([0.0, 0.1, 0.4, 0.35, 0.8, 1.0]),
-             plot_type='sesp', ppv_npv=True, min_err=True, n_p='Se', np_min=0.9)
-    """
-
-    #fpr, tpr, thresh = metrics.roc_curve(target, score, pos_label,
-    #                                     sample_weight, drop_intermediate)
-    # Don't drop intermediate operating points else partial AUC won't be
-    # estimated accurately
-    fpr, tpr, thresh = roc_curve(target, score, pos_label, sample_weight,
-                                 drop_intermediate=False)
-    roc_auc = partial_auc(fpr,tpr)
-    # Total number of test samples
-    N = len(target)
-    # number of positive and negative samples
-    Np = np.count_nonzero(target)
-    Nn = N-Np
-    sew = sew_auc(roc_auc, Nn, Np)
-    th_np = 0.0
-    if n_p.lower() == 'se':
-        fpr_np, tpr_np, th_np = neyman_pearson(fpr,tpr,thresh,np_min,Se=True)
-    elif n_p.lower() == 'sp':
-        fpr_np, tpr_np, th_np = neyman_pearson(fpr,tpr,thresh,np_min,Se=False)
-
-    # if you want to plot minimum error point figure out what and where it is
-    if min_err:
-        merr, mfpr, mtpr, mthresh = bayes_error(fpr,tpr,thresh,Nn,Np)
-
-    if dec_T:
-        Tfpr, Ttpr, Tthresh = decision_threshold(fpr,tpr,thresh,dec_T)
-    
-    if ppv_npv:
-        Bppv, Bppv_fpr, Bppv_tpr, Bppvth = best_ppv(fpr, tpr, thresh, Nn, Np, np_min)
-        Bnpv, Bnpv_fpr, Bnpv_tpr, Bnpvth = best_npv(fpr, tpr, thresh, Nn, Np, np_min)
+    Uses the fast (O(n log n)) midrank formulation of Sun & Xu, one sort per
+    model, vectorised over blocks of models. The covariance accounts for the
+    correlation between models evaluated on the same cases, so the p-values
+    are those of the paired test of H0: AUC_i == AUC_j
 
-    # if you want to plot the maximum Youden's J point figure out where it is
-    if max_J:
-        Jval, Jfpr, Jtpr, Jthresh = max_youden_J(fpr,tpr,thresh)
+    Parameters
+    ----------
+    target : array, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.  If labels are not
+        binary, pos_label should be explicitly given.
 
-    if title:
-        title += ': Receiver Operating Characteristic'
-        fname = title + '_ROC.pdf'
-    else:
-        title = 'Receiver Operating Characteristic'
-        fname = 'ROC.pdf'
-
-    # Ensure ROC curve goes all the way to (0,0)
-    if tpr[0] != fpr[0]:
-        tpr = np.insert(tpr,0,0.0)
-        fpr = np.insert(fpr,0,0.0)
-
-    # open a figure window and plot the curve
-    fig, ax = plt.subplots()
-    if plot_type.lower() == 'sesp':
-        # Plot Sp V Se
-        plt.plot(1-fpr, tpr,'b-', label='AUC = {:0.3f} +/-{:0.4f}'.format(roc_auc, sew))
-
-        if ppv_npv:
-            plt.plot(1-Bppv_fpr, Bppv_tpr,'ro', label='PPV@{:0.2f} = {:0.2f}'.format(Bppvth,Bppv))
-            plt.plot(1-Bnpv_fpr, Bnpv_tpr,'go', label='NPV@{:0.2f} = {:0.2f}'.format(Bnpvth,Bnpv))
-
-        if min_err:
-            plt.plot(1-mfpr, mtpr, 'bo', label='Error@{:0.2f} = {:0.3f}'.format(mthresh,merr))
-            
-        if dec_T:
-            plt.plot(1-Tfpr, Ttpr, 'co', label='Sp,Se@{:0.2f} = ({:0.2f},{:0.2f})'.format(Tthresh,1-Tfpr,Ttpr))
-
-        if th_np:
-            plt.plot(1-fpr_np, tpr_np, 'ko', label='Sp,Se@{:0.2f} = ({:0.2f},{:0.2f})'.format(th_np,1-fpr_np,tpr_np))
-
-        if max_J:
-            plt.plot(1-Jfpr, Jtpr, 'yo', label='J@{:0.2f} = {:0.2f}'.format(Jthresh,Jval))
-
-        plt.plot([0,1],[1,0],'k--')
-        plt.xlim([-0.0,1.02])
-        plt.ylim([0.0,1.02])
-        plt.grid('on')
-        plt.legend(loc='lower left')
-        plt.ylabel('Sensitivity (TPR)')
-        plt.xlabel('Specificity (TNR)')
-
-    elif plot_type.lower() == 'ipr':
-        # Inverse precision-recall. Plot Specificity = TNR v NPV
-        tnr = 1-fpr
-        fnr = 1-tpr
-        npv = np.zeros(len(tnr))
-        for i, tnr_val in enumerate(tnr):
-            if tnr_val == 0.0:
-                npv[i] = 0.0
-            else:
-                npv[i] = (tnr_val*Nn)/((tnr_val*Nn) + (fnr[i]*Np))
-
-        plt.plot(tnr[:], npv[:], 'b',label='NPV-Specificity')
-        plt.xlim([0.0,1.02])
-        plt.ylim([0.0,1.02])
-        plt.grid('on')
-        plt.legend(loc='lower left')
-        plt.ylabel('Negative Predictive Value (NPV)')
-        plt.xlabel('Specificity (TNR)')
-
-    elif plot_type.lower() == 'pr':
-        # Plot PR-ROC TPR v PPV
-        ppv = np.zeros(len(tpr))
-        for i, tpr_val in enumerate(tpr):
-            if tpr_val == 0.0:
-                ppv[i] = 0.0
-            else:
-                ppv[i] = (tpr_val*Np)/((tpr_val*Np) + (fpr[i]*Nn))
-
-        plt.plot(tpr[1:], ppv[1:], 'b',label='Precision-Recall')
-        plt.xlim([0.0,1.02])
-        plt.ylim([0.0,1.02])
-        plt.grid('on')
-        plt.legend(loc='lower left')
-        plt.ylabel('Precision (PPV)')
-        plt.xlabel('Recall (TPR)')
+    score : array, shape = [n_samples] or [n_samples, n_models]
+        Target scores of each model
+
+    pos_label : int or str, default=None (i.e., 1)
+        Label considered as positive and others are considered negative.
+
+    block_size : int, optional (default=2**24)
+        Approximate number of score elements sorted at once, bounds memory
 
+    n_jobs : int, optional (default=1)
+        Number of threads the blocks of models are spread over
+
+    Returns
+    -------
+    auc : array, shape = [n_models]
+        Area under the ROC curve of each model
+
+    auc_cov : array, shape = [n_models, n_models]
+        DeLong covariance of the AUC estimates, sqrt(diag) are standard errors
+
+    p_values : array, shape = [n_models, n_models]
+        Two sided p-value of the paired difference between model i and j
+
+    References
+    ----------
+    DeLong, DeLong & Clarke-Pearson, 1988 "Comparing the areas under two or
+    more correlated receiver operating characteristic curves: a nonparametric
+    approach", Biometrics 44: 837-845.
+    Sun & Xu, 2014 "Fast implementation of DeLong's algorithm for comparing
+    the areas under correlated receiver operating characteristic curves",
+    IEEE Signal Processing Letters 21: 1389-1393.
+    """
+    target = np.asarray(target).ravel()
+    score = np.asarray(score, dtype=np.float64)
+    if score.ndim == 1:
+        score = score[:, None]
+    if score.shape[0] != target.shape[0]:
+        raise ValueError('score must have one row per target')
+    y = target == (1 if pos_label is None else pos_label)
+    m = np.count_nonzero(y)
+    n = y.size - m
+    if m == 0 or n == 0:
+        raise ValueError('both positive and negative samples are required')
+    k = score.shape[1]
+
+    v01 = np.empty((k, m))
+    v10 = np.empty((k, n))
+    step = max(1, block_size // y.size)
+
+    def block(b):
+        v01[b:b + step], v10[b:b + step] = _delong_components(
+            np.ascontiguousarray(score[:, b:b + step].T), y, m, n)
+
+    if n_jobs > 1 and k > step:
+        with ThreadPoolExecutor(n_jobs) as pool:
+            list(pool.map(block, range(0, k, step)))
     else:
-        # Plot FPR v TPR - ROC curve
-        plt.plot(fpr, tpr, 'b', label='AUC = {:0.3f} +/-{:0.4f}'.format(roc_auc, sew))
-
-        if ppv_npv:
-            plt.plot(Bppv_fpr, Bppv_tpr,'ro', label='PPV@{:0.2f} = {:0.2f}'.format(Bppvth,Bppv))
-            plt.plot(Bnpv_fpr, Bnpv_tpr,'go', label='NPV@{:0.2f} = {:0.2f}'.format(Bnpvth,Bnpv))
-
-        if min_err:
-            plt.plot(mfpr, mtpr, 'bo', label='Error@{:0.2f} = {:0.3f}'.format(mthresh,merr))
-
-        if dec_T:
-            plt.plot(Tfpr, Ttpr, 'co', label='FPR,TPR@{:0.2f} = ({:0.2f},{:0.2f})'.format(Tthresh,Tfpr,Ttpr))
-
-        if th_np:
-            plt.plot(fpr_np, tpr_np, 'ko', label='FPR,TPR@{:0.2f} = ({:0.2f},{:0.2f})'.format(th_np,fpr_np,tpr_np))
-
-        if max_J:
-            plt.plot(Jfpr, Jtpr, 'yo', label='J@{:0.2f} = {:0.3f}'.format(Jthresh,Jval))
-
-        if plot_type.lower() == 'chi':
-            xx, yy = np.mgrid[0:1:.01, 0:1:.01]
-            grid = np.c_[xx.ravel(), yy.ravel()]
-            chi = chi_sqr_val(grid[:,0],grid[:,1],1000,Np)
-            chi = np.reshape(chi,xx.shape)
-            cs = ax.contour(xx,yy,np.triu(chi),colors='k',
-                            levels=[3.84,6.63,7.88,16,32,64,128,256,512,1024,2048],
-                            linestyles='dotted',linewidths=0.5)
-            plt.clabel(cs, fontsize=9, inline=1)
-            title += ' (Chi-square Contours)'
-
-        plt.plot([0,1],[0,1],'k--')
-        plt.xlim([-0.02,1.0])
-        plt.ylim([0.0,1.02])
-        plt.grid('on')
-        plt.legend(loc='lower right')
-        plt.ylabel('True Positive Rate (TPR)')
-        plt.xlabel('False Positive Rate (FPR)')
-
-    plt.title(title)
-    plt.show(fig)
-    if save_pdf:
-        fig.savefig(fname, bbox_inches='tight')
-
-    return fig, ax
+        for b in range(0, k, step):
+            block(b)
+
+    auc = v01.mean(axis=1)
+    sx = np.atleast_2d(np.cov(v01)) if m > 1 else np.zeros((k, k))
+    sy = np.atleast_2d(np.cov(v10)) if n > 1 else np.zeros((k, k))
+    auc_cov = sx / m + sy / n
+
+    var = np.diag(auc_cov)
+    diff_var = var[:, None] + var[None, :] - 2 * auc_cov
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.abs(auc[:, None] - auc[None, :]) / np.sqrt(diff_var)
+    z = np.where(diff_var > 0, z, 0.0)
+    p_values = np.frompyfunc(erfc, 1, 1)(z / np.sqrt(2.0)).astype(np.float64)
+
+    return auc, auc_cov, p_values
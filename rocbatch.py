@@ -0,0 +1,156 @@
+"""
+Batched ROC curves of many models (score columns) scored on the same labels
+"""
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from plotroc import _roc_counts, partial_auc
+from rocprof import profiled
+
+
+class BatchROC(object):
+    """
+    ROC curves of n_models models held as concatenated arrays plus offsets
+
+    Curve i is fpr[offsets[i]:offsets[i+1]] (likewise tpr and thresh), see
+    roc_curve_batch. Indexing returns the (fpr, tpr, thresh) views of a curve
+
+    Attributes
+    ----------
+    fpr, tpr, thresh : array, shape = [offsets[-1]]
+        Concatenated curves, each as returned by roc_curve with
+        drop_intermediate=False
+
+    offsets : array, shape = [n_models + 1]
+        Start of each curve in the concatenated arrays
+
+    auc : array, shape = [n_models]
+        AUC of each model
+
+    pauc : array, shape = [n_models] + broadcast shape of op1, op2
+        Partial AUC of each model over each range
+
+    Nn, Np : float
+        (Weighted) number of negative and positive samples shared by all models
+    """
+
+    def __init__(self, fpr, tpr, thresh, offsets, auc, pauc, Nn, Np):
+        self.fpr = fpr
+        self.tpr = tpr
+        self.thresh = thresh
+        self.offsets = offsets
+        self.auc = auc
+        self.pauc = pauc
+        self.Nn = Nn
+        self.Np = Np
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError('model index out of range')
+        i = i % len(self)
+        s = slice(self.offsets[i], self.offsets[i + 1])
+        return (self.fpr[s], self.tpr[s], self.thresh[s])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _column_roc(y, score, sample_weight, Nn, Np):
+    fps, tps, thresh = _roc_counts(y, score, sample_weight)
+    fpr = fps / Nn
+    tpr = tps / Np
+    auc = np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2
+    return fpr, tpr, thresh, auc
+
+
+def _column_roc_star(args):
+    return _column_roc(*args)
+
+
+@profiled
+def roc_curve_batch(target, score, pos_label=None, sample_weight=None, op1=0.0,
+                    op2=1.0, Sp=True, n_jobs=1, backend='thread'):
+    """
+    ROC curves, AUC and partial AUC of many models scored on the same samples
+
+    Labels, weights and the positive/negative totals are handled once, each
+    score column is then sorted (one argsort per column) in a thread or
+    process pool and the curves returned in a single BatchROC of
+    concatenated arrays plus offsets
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.  If labels are not
+        binary, pos_label should be explicitly given.
+
+    score : array, shape = [n_samples, n_models]
+        Target scores of each model (column)
+
+    pos_label : int or str, default=None (i.e., 1)
+        Label considered as positive and others are considered negative.
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    op1, op2, Sp : optional (default=0.0, 1.0, True)
+        Range(s) of the partial AUC, op1 and op2 may be arrays of many
+        ranges, see partial_auc
+
+    n_jobs : int, optional (default=1)
+        Number of workers the columns are spread over
+
+    backend : str, optional (default='thread')
+        'thread' or 'process' pool, sorting releases the GIL so threads
+        avoid copying the score columns to other processes
+
+    Returns
+    -------
+    curves : BatchROC
+        fpr, tpr, thresh of every model as concatenated arrays plus offsets,
+        with the auc and pauc of each model
+    """
+    target = np.asarray(target).ravel()
+    score = np.asarray(score)
+    if score.ndim == 1:
+        score = score[:, None]
+    if score.ndim != 2 or score.shape[0] != target.size:
+        raise ValueError('score must have shape (n_samples, n_models)')
+    y = target == (1 if pos_label is None else pos_label)
+    if sample_weight is None:
+        Np = float(np.count_nonzero(y))
+        Nn = float(y.size) - Np
+    else:
+        sample_weight = np.asarray(sample_weight, dtype=np.float64).ravel()
+        Np = sample_weight[y].sum()
+        Nn = sample_weight[~y].sum()
+    if Np <= 0 or Nn <= 0:
+        raise ValueError('both positive and negative samples are required')
+
+    args = [(y, score[:, j], sample_weight, Nn, Np) for j in range(score.shape[1])]
+    if n_jobs > 1:
+        if backend == 'process':
+            pool = ProcessPoolExecutor(n_jobs)
+        elif backend == 'thread':
+            pool = ThreadPoolExecutor(n_jobs)
+        else:
+            raise ValueError("backend must be 'thread' or 'process'")
+        with pool:
+            results = list(pool.map(_column_roc_star, args))
+    else:
+        results = [_column_roc_star(a) for a in args]
+
+    fpr, tpr, thresh, auc = zip(*results)
+    offsets = np.r_[0, np.cumsum([f.size for f in fpr])]
+    fpr = np.concatenate(fpr)
+    tpr = np.concatenate(tpr)
+    auc = np.array(auc)
+    if np.ndim(op1) or np.ndim(op2) or op1 > 0.0 or op2 < 1.0:
+        # every model and range in one vectorized call
+        pauc = partial_auc(fpr, tpr, op1, op2, Sp, offsets=offsets)
+    else:
+        pauc = auc
+    return BatchROC(fpr, tpr, np.concatenate(thresh), offsets, auc, pauc, Nn, Np)
@@ -0,0 +1,270 @@
+"""
+Bootstrap confidence intervals for AUC, partial AUC and ROC operating points
+"""
+import numpy as np
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from plotroc import partial_auc
+from rocprof import profiled
+
+STATS = ('auc', 'pauc', 'se', 'sp', 'thresh')
+SEED_GROUP = 50
+
+# sorted data shared with the worker processes, set once by _init_worker
+_data = None
+
+
+class _SortedROC(object):
+    """
+    Scores sorted once (decreasing) with the start of each distinct threshold,
+    ROC statistics are computed for a whole batch of weight (count) vectors
+    """
+
+    def __init__(self, target, score, sample_weight, pos_label, op1, op2, Sp, n_p, np_min):
+        order = np.argsort(score, kind='mergesort')[::-1]
+        score = score[order]
+        self.order = order
+        self.y = (target == pos_label)[order]
+        self.w = None if sample_weight is None else sample_weight[order]
+        self.pos_cols = np.flatnonzero(self.y)
+        self.neg_cols = np.flatnonzero(~self.y)
+        self.starts = np.r_[0, np.flatnonzero(np.diff(score)) + 1]
+        self.thresh = np.r_[np.inf, score[self.starts]]
+        self.op1, self.op2, self.Sp = op1, op2, Sp
+        self.n_p, self.np_min = n_p, np_min
+
+    def stats(self, W):
+        """
+        Statistics of each row of the weight matrix W, shape = [B, n_samples]
+
+        Returns an array, shape = [B, len(STATS)]
+        """
+        if self.w is not None:
+            W = W * self.w
+        B = W.shape[0]
+        pos = W * self.y
+        neg = W - pos
+        if self.starts.size < self.y.size:
+            # pool tied scores into one operating point
+            pos = np.add.reduceat(pos, self.starts, axis=1)
+            neg = np.add.reduceat(neg, self.starts, axis=1)
+        tps = np.zeros((B, self.starts.size + 1))
+        fps = np.zeros((B, self.starts.size + 1))
+        np.cumsum(pos, axis=1, out=tps[:, 1:])
+        np.cumsum(neg, axis=1, out=fps[:, 1:])
+        Pt = tps[:, -1:]
+        Nt = fps[:, -1:]
+
+        out = np.empty((B, len(STATS)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # trapezoidal AUC, each negative counts the positives above it
+            # and half of those tied with it
+            out[:, 0] = np.sum(neg * (tps[:, 1:] - pos / 2), axis=1) / (Pt[:, 0] * Nt[:, 0])
+            if self.op1 > 0.0 or self.op2 < 1.0:
+                # all resampled curves have the same length, one 2-D call
+                out[:, 1] = partial_auc(fps / Nt, tps / Pt, self.op1, self.op2, self.Sp)
+            else:
+                out[:, 1] = out[:, 0]
+
+            # operating point, same choice as max_youden_J / neyman_pearson
+            if self.n_p.lower() == 'se':
+                idx = np.argmax(tps / Pt >= self.np_min, axis=1)
+            elif self.n_p.lower() == 'sp':
+                idx = np.count_nonzero(1 - fps / Nt >= self.np_min, axis=1) - 1
+            else:
+                idx = np.argmax(tps * Nt - fps * Pt, axis=1)
+            idx = np.maximum(idx, 0)
+            rows = np.arange(B)
+            out[:, 2] = tps[rows, idx] / Pt[:, 0]
+            out[:, 3] = 1 - fps[rows, idx] / Nt[:, 0]
+        out[:, 4] = self.thresh[idx]
+        return out
+
+    def resample(self, rng, B, stratified):
+        """Count vectors of B bootstrap resamples, shape = [B, n_samples]"""
+        n = self.y.size
+        W = np.empty((B, n))
+        for b in range(B):
+            # one resample at a time keeps the random stream independent of B
+            if stratified:
+                for cols in (self.pos_cols, self.neg_cols):
+                    W[b, cols] = np.bincount(rng.integers(0, cols.size, cols.size),
+                                             minlength=cols.size)
+            else:
+                W[b] = np.bincount(rng.integers(0, n, n), minlength=n)
+        return W
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+
+
+def _boot_block(args):
+    seed, B, block_rows, stratified = args
+    rng = np.random.default_rng(seed)
+    out = []
+    for b in range(0, B, block_rows):
+        out.append(_data.stats(_data.resample(rng, min(block_rows, B - b), stratified)))
+    return np.vstack(out)
+
+
+def _jackknife(data, n_groups, block_rows, seed=None):
+    # (grouped) leave-one-out statistics, exact leave-one-out when n <= n_groups.
+    # Groups are random subsets, contiguous blocks of the sorted scores would
+    # bias the acceleration
+    n = data.y.size
+    G = min(n, n_groups)
+    group = np.random.default_rng(seed).permutation(np.arange(n) % G)
+    out = []
+    for g in range(0, G, block_rows):
+        gs = np.arange(g, min(G, g + block_rows))
+        out.append(data.stats((group[None, :] != gs[:, None]).astype(np.float64)))
+    return np.vstack(out)
+
+
+def _acceleration(jack):
+    # BCa acceleration from the jackknife statistics
+    d = jack.mean() - jack
+    denom = 6.0 * np.sum(d**2)**1.5
+    return np.sum(d**3) / denom if denom > 0 else 0.0
+
+
+def _interval(samples, est, jack, method, alpha):
+    ok = ~np.isnan(samples)
+    samples = samples[ok]
+    if samples.size == 0:
+        return (np.nan, np.nan)
+    q = np.array([alpha / 2, 1 - alpha / 2])
+    if method == 'bca':
+        nd = NormalDist()
+        prop = (np.count_nonzero(samples < est) + 0.5 * np.count_nonzero(samples == est)) / samples.size
+        prop = min(max(prop, 1.0 / (samples.size + 1)), samples.size / (samples.size + 1.0))
+        z0 = nd.inv_cdf(prop)
+        a = _acceleration(jack)
+        z = np.array([nd.inv_cdf(p) for p in q])
+        q = np.array([nd.cdf(z0 + (z0 + zq) / (1 - a * (z0 + zq))) for zq in z])
+    return tuple(np.quantile(samples, q))
+
+
+@profiled
+def bootstrap_roc(target, score, n_boot=2000, op1=0.0, op2=1.0, Sp=True, n_p='',
+                  np_min=0.95, method='percentile', alpha=0.05, stratified=True,
+                  pos_label=None, sample_weight=None, n_jobs=1, random_state=None,
+                  block_size=2**22, n_jack=200, return_samples=False):
+    """
+    Bootstrap confidence intervals of AUC, partial AUC and the Se, Sp and
+    threshold of an operating point (maximum Youden's J or Neyman-Pearson)
+
+    The scores are sorted once, each resample is drawn as a vector of counts
+    per sample and the resampled ROC curves are computed with cumulative sums
+    over the sorted scores, many resamples at a time. Blocks of resamples are
+    spread over a process pool, each block of SEED_GROUP resamples seeded from
+    its own child of random_state, so results do not depend on n_jobs.
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.  If labels are not
+        binary, pos_label should be explicitly given.
+
+    score : array, shape = [n_samples]
+        Target scores
+
+    n_boot : int, optional (default=2000)
+        Number of bootstrap resamples
+
+    op1, op2, Sp : optional (default=0.0, 1.0, True)
+        Range of the partial AUC, see partial_auc
+
+    n_p : str, optional (default=Empty)
+        Operating point, 'Se' or 'Sp' for the Neyman-Pearson point meeting
+        np_min (see neyman_pearson), empty for the maximum Youden's J
+
+    np_min : float, optional (default=0.95)
+        Minimum 'Se' or 'Sp' of the Neyman-Pearson operating point
+
+    method : str, optional (default='percentile')
+        'percentile' or 'bca' (bias corrected and accelerated) intervals
+
+    alpha : float, optional (default=0.05)
+        Intervals cover 1 - alpha
+
+    stratified : boolean, optional (default=True)
+        Whether positives and negatives are resampled separately, keeping
+        the class counts of every resample fixed
+
+    pos_label : int or str, default=None (i.e., 1)
+        Label considered as positive and others are considered negative.
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    n_jobs : int, optional (default=1)
+        Number of worker processes
+
+    random_state : int or None, optional (default=None)
+        Seed of the resamples
+
+    block_size : int, optional (default=2**22)
+        Approximate number of (resample, sample) counts held at once
+
+    n_jack : int, optional (default=200)
+        Number of jackknife groups (random subsets of the samples) for the
+        BCa acceleration, exact leave-one-out when n_samples <= n_jack
+
+    return_samples : boolean, optional (default=False)
+        Whether to also return the bootstrap samples of each statistic
+
+    Returns
+    -------
+    ci : dict
+        For each of 'auc', 'pauc', 'se', 'sp' and 'thresh' the tuple
+        (estimate, lower, upper)
+
+    samples : dict of arrays, shape = [n_boot], only if return_samples
+    """
+    target = np.asarray(target).ravel()
+    score = np.asarray(score, dtype=np.float64).ravel()
+    if target.shape != score.shape:
+        raise ValueError('target and score must have the same length')
+    if method not in ('percentile', 'bca'):
+        raise ValueError("method must be 'percentile' or 'bca'")
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=np.float64).ravel()
+    data = _SortedROC(target, score, sample_weight, 1 if pos_label is None else pos_label,
+                      op1, op2, Sp, n_p, np_min)
+    n = data.y.size
+    if not 0 < np.count_nonzero(data.y) < n:
+        raise ValueError('both positive and negative samples are required')
+
+    block_rows = max(1, block_size // n)
+    # each group of SEED_GROUP resamples has its own seed, so the resamples
+    # are the same whatever n_jobs and block_size
+    sizes = np.diff(np.r_[np.arange(0, n_boot, SEED_GROUP), n_boot])
+    # one more seed for the jackknife groups, the resample seeds are unchanged
+    seeds = np.random.SeedSequence(random_state).spawn(sizes.size + 1)
+    jack_seed = seeds.pop()
+    tasks = [(seed, B, block_rows, stratified) for seed, B in zip(seeds, sizes)]
+    if n_jobs > 1:
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(data,)) as pool:
+            samples = np.vstack(list(pool.map(_boot_block, tasks)))
+    else:
+        _init_worker(data)
+        try:
+            samples = np.vstack([_boot_block(task) for task in tasks])
+        finally:
+            _init_worker(None)
+
+    est = data.stats(np.ones((1, n)))[0]
+    jack = _jackknife(data, n_jack, block_rows, jack_seed) if method == 'bca' else None
+
+    ci = {}
+    for i, name in enumerate(STATS):
+        lo, hi = _interval(samples[:, i], est[i], None if jack is None else jack[:, i],
+                           method, alpha)
+        ci[name] = (est[i], lo, hi)
+
+    if return_samples:
+        return ci, dict((name, samples[:, i]) for i, name in enumerate(STATS))
+    return ci
@@ -0,0 +1,140 @@
+"""
+Chi-square significance contours of ROC space, cached per (Nn, Np, resolution)
+"""
+import os
+import tempfile
+import numpy as np
+from math import erfc
+from collections import OrderedDict
+from plotroc import chi_sqr_val
+from rocprof import profiled
+
+
+class ChiSquareGrids(object):
+    """
+    Bounded LRU cache of chi-square grids over ROC space
+
+    Grid (Nn, Np, resolution) is computed once, kept in memory (the maxsize
+    most recently used grids) and, if cache_dir is given, saved there as .npy
+    so other processes and later runs load rather than recompute it
+
+    Parameters
+    ----------
+    maxsize : int, optional (default=32)
+        Number of grids kept in memory
+
+    cache_dir : str, optional (default=None)
+        Directory of the on disk cache, created if needed, None for memory only
+    """
+
+    def __init__(self, maxsize=32, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._grids = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, 'chi_{!r}_{!r}_{}.npy'.format(*key))
+
+    @profiled
+    def grid(self, Nn, Np, resolution=100):
+        """
+        Chi-square of the 2x2 table of every (fpr, tpr) grid point
+
+        Returns
+        -------
+        rates : array, shape = [resolution]
+            Rates 0..1 of both axes
+
+        chi : array, shape = [resolution, resolution], read only
+            chi[j, i] is the chi-square at tpr = rates[j], fpr = rates[i],
+            zero below the chance diagonal, ready for ax.contour(rates, rates, chi)
+        """
+        key = (float(Nn), float(Np), int(resolution))
+        if key in self._grids:
+            self.hits += 1
+            self._grids.move_to_end(key)
+            return self._grids[key]
+        self.misses += 1
+        rates = np.linspace(0.0, 1.0, key[2])
+        chi = None
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            chi = np.load(self._path(key))
+        if chi is None:
+            chi = np.tril(chi_sqr_val(rates[:, None], rates[None, :], key[0], key[1]))
+            if self.cache_dir is not None:
+                self._save(key, chi)
+        rates.setflags(write=False)
+        chi.setflags(write=False)
+        self._grids[key] = (rates, chi)
+        if len(self._grids) > self.maxsize:
+            self._grids.popitem(last=False)
+        return rates, chi
+
+    def _save(self, key, chi):
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        # write then rename, so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(suffix='.npy', dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, chi)
+        os.replace(tmp, self._path(key))
+
+    def clear(self):
+        """Empty the in memory cache, files in cache_dir are kept"""
+        self._grids.clear()
+        self.hits = self.misses = 0
+
+
+# cache shared by plot_roc and chi_sqr_grid
+grids = ChiSquareGrids()
+
+
+def chi_sqr_grid(Nn, Np, resolution=100):
+    """
+    Chi-square grid of ROC space for Nn negatives and Np positives from the
+    shared cache, see ChiSquareGrids.grid. Set rocchi.grids to a
+    ChiSquareGrids(maxsize, cache_dir) to change the cache
+    """
+    return grids.grid(Nn, Np, resolution)
+
+
+@profiled
+def chi_sqr_points(fpr, tpr, Nn, Np):
+    """
+    Chi-square and p-value (1 degree of freedom) of every operating point
+
+    Parameters
+    ----------
+    fpr, tpr : array, shape = [n]
+        False and true positive rates of the ROC curve
+    Nn, Np : int
+        The number of negative and positive samples in the dataset the ROC curve
+        was constructed from
+
+    Returns
+    -------
+    chi, p : array, shape = [n]
+    """
+    chi = chi_sqr_val(np.asarray(tpr, dtype=np.float64), np.asarray(fpr, dtype=np.float64),
+                      Nn, Np)
+    # survival function of chi-square with 1 dof, erfc(sqrt(chi/2))
+    p = np.frompyfunc(erfc, 1, 1)(np.sqrt(np.maximum(chi, 0.0) / 2)).astype(np.float64)
+    return chi, p
+
+
+@profiled
+def chi_sqr_contours(fpr, tpr, Nn, Np, resolution=100):
+    """
+    Everything the chi-square mode of plot_roc draws: the cached grid of
+    (Nn, Np) and the chi-square and p-value of every operating point
+
+    Returns
+    -------
+    rates, chi_grid : see ChiSquareGrids.grid
+
+    chi, p : array, shape = [n], see chi_sqr_points
+    """
+    rates, chi_grid = chi_sqr_grid(Nn, Np, resolution)
+    chi, p = chi_sqr_points(fpr, tpr, Nn, Np)
+    return rates, chi_grid, chi, p
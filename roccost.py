@@ -0,0 +1,203 @@
+"""
+Cost curves (Drummond and Holte) and expected cost thresholds from the ROC convex hull
+"""
+import numpy as np
+from plotroc import pav_rocch
+from rocprof import profiled
+
+
+def probability_cost(prevalence, cost_fn=1.0, cost_fp=1.0):
+    """
+    Probability times cost of the positive class, PC(+) = p C(-|+) /
+    (p C(-|+) + (1 - p) C(+|-)), the x axis of a cost curve. Arguments are
+    broadcast against each other
+    """
+    p = np.asarray(prevalence, dtype=np.float64)
+    a = p * cost_fn
+    b = (1 - p) * cost_fp
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return a / (a + b)
+
+
+class CostCurve(object):
+    """
+    Lower envelope of the cost lines of the ROC convex hull vertices
+
+    The normalized expected cost of vertex (fpr, tpr) is the line
+    NEC = (1 - tpr) PC + fpr (1 - PC) over PC in [0, 1], see
+    probability_cost. As the hull is convex the vertex on the envelope at
+    PC is the one where the hull slope falls below (1 - PC)/PC, found for
+    every PC with one searchsorted over the hull's decreasing slopes.
+
+    See Drummond and Holte, Cost curves: An improved method for visualizing
+    classifier performance, Mach Learn (2006) 65: 95-130
+
+    Parameters
+    ----------
+    fpr, tpr, thresh : array, shape = [n_vertices]
+        ROC convex hull vertices, as returned by pav_rocch(..., return_hull=True),
+        thresh decreasing with thresh[0] = inf (predict positive if score >= thresh)
+
+    Example
+    -------
+    cc = cost_curve(target, score)
+    thresh, fpr, tpr, cost = cc.thresholds(prevalence=[0.01, 0.1], cost_fn=[[10], [50]])
+    """
+
+    def __init__(self, fpr, tpr, thresh):
+        self.fpr = np.asarray(fpr, dtype=np.float64)
+        self.tpr = np.asarray(tpr, dtype=np.float64)
+        self.thresh = np.asarray(thresh)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # decreasing, inf for vertical and 0 for horizontal hull edges
+            self.slope = np.diff(self.tpr) / np.diff(self.fpr)
+
+    def vertex(self, pc):
+        """Index of the hull vertex of minimum cost at each PC(+), shape of pc"""
+        pc = np.asarray(pc, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            m = (1 - pc) / pc
+        # the hull edges with slope above m lower the cost, take all of them
+        return np.searchsorted(-self.slope, -m, side='left')
+
+    def cost(self, pc, k=None):
+        """
+        Normalized expected cost at each PC(+) of the envelope, or of the
+        vertices k (broadcast against pc)
+        """
+        pc = np.asarray(pc, dtype=np.float64)
+        if k is None:
+            k = self.vertex(pc)
+        return (1 - self.tpr[k]) * pc + self.fpr[k] * (1 - pc)
+
+    def envelope(self, pc=101):
+        """
+        The cost curve, pc an int for that many evenly spaced PC(+) in [0, 1]
+
+        Returns
+        -------
+        pc, nec : array
+            Probability cost and the normalized expected cost of the envelope
+        """
+        if np.ndim(pc) == 0:
+            pc = np.linspace(0.0, 1.0, int(pc))
+        pc = np.asarray(pc, dtype=np.float64)
+        return pc, self.cost(pc)
+
+    def area(self):
+        """
+        Area under the cost curve, the expected cost over uniformly
+        distributed PC(+), exact from the envelope's breakpoints
+        """
+        # the envelope changes vertex where PC = 1/(1 + slope)
+        with np.errstate(divide='ignore'):
+            pc = np.r_[0.0, 1 / (1 + self.slope), 1.0]
+        pc = np.clip(pc, 0.0, 1.0)
+        nec = self.cost(pc)
+        return float(np.sum(np.diff(pc) * (nec[1:] + nec[:-1])) / 2)
+
+    @profiled
+    def thresholds(self, prevalence, cost_fn=1.0, cost_fp=1.0):
+        """
+        Threshold of minimum expected cost of every deployment scenario
+
+        Parameters
+        ----------
+        prevalence, cost_fn, cost_fp : float or array
+            Prevalence of the positive class and the costs of a false
+            negative and of a false positive, broadcast against each other
+
+        Returns
+        -------
+        thresh, fpr, tpr : array, broadcast shape
+            Threshold (predict positive if score >= thresh) and operating
+            point of minimum expected cost
+
+        cost : array, broadcast shape
+            Expected cost per case, p C(-|+) (1 - tpr) + (1 - p) C(+|-) fpr
+        """
+        p, cost_fn, cost_fp = np.broadcast_arrays(np.asarray(prevalence, dtype=np.float64),
+                                                  np.asarray(cost_fn, dtype=np.float64),
+                                                  np.asarray(cost_fp, dtype=np.float64))
+        k = self.vertex(probability_cost(p, cost_fn, cost_fp))
+        fpr, tpr = self.fpr[k], self.tpr[k]
+        cost = p * cost_fn * (1 - tpr) + (1 - p) * cost_fp * fpr
+        return self.thresh[k], fpr, tpr, cost
+
+
+@profiled
+def cost_curve(target, score, sample_weight=None):
+    """
+    CostCurve of the ROC convex hull of target and score, see pav_rocch
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.
+
+    score : array, shape = [n_samples]
+        Target scores
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    Returns
+    -------
+    cc : CostCurve
+    """
+    hull = pav_rocch(target, score, sample_weight, return_hull=True)[2]
+    return CostCurve(*hull)
+
+
+@profiled
+def plot_cost_curve(target, score=None, sample_weight=None, pc=201, title=None, ax=None,
+                    show=True):
+    """
+    Plot the cost curve (normalized expected cost v probability cost) with
+    the trivial classifiers, always negative (NEC = PC) and always positive
+    (NEC = 1 - PC)
+
+    Parameters
+    ----------
+    target, score, sample_weight : see cost_curve, alternatively target is
+        a CostCurve and score is not given
+
+    pc : int or array, optional (default=201)
+        Probability costs to draw, see CostCurve.envelope
+
+    title : str, optional (default=None)
+        Title to prepend to the figure title
+
+    ax : matplotlib Axes, optional (default=None)
+        Axes to draw on, by default a new pyplot figure
+
+    show : boolean, optional (default=True)
+        Whether to call plt.show(), set False for non-interactive use
+
+    Returns
+    -------
+    fig, ax, cc : matplotlib Figure, Axes and the CostCurve
+    """
+    import matplotlib.pyplot as plt
+    if score is None and isinstance(target, CostCurve):
+        cc = target
+    else:
+        cc = cost_curve(target, score, sample_weight)
+    x, nec = cc.envelope(pc)
+
+    if ax is None:
+        fig, ax = plt.subplots()
+    else:
+        fig = ax.figure
+    ax.plot(x, nec, 'b', label='Cost curve, area = {:0.3f}'.format(cc.area()))
+    ax.plot([0, 0.5, 1], [0, 0.5, 0], 'k--', label='Trivial classifiers')
+    ax.set_xlim([0.0, 1.0])
+    ax.set_ylim([0.0, 0.52])
+    ax.grid(True)
+    ax.legend(loc='upper right')
+    ax.set_ylabel('Normalized Expected Cost')
+    ax.set_xlabel('Probability Cost PC(+)')
+    ax.set_title((title + ': ' if title else '') + 'Cost Curve')
+    if show:
+        plt.show()
+    return fig, ax, cc
@@ -0,0 +1,260 @@
+"""
+Exact out-of-core ROC curves of score and label columns larger than memory
+"""
+import os
+import tempfile
+import numpy as np
+from rocprof import profiled
+
+
+def _open(a, dtype):
+    # path of a .npy or raw binary file, or an array / memmap used as is
+    if isinstance(a, (str, os.PathLike)):
+        if str(a).endswith('.npy'):
+            return np.load(a, mmap_mode='r')
+        return np.memmap(a, dtype=dtype, mode='r')
+    return a
+
+
+def _pooled(score, pos, neg):
+    # sort decreasing and pool tied scores, one entry per distinct score
+    order = np.argsort(score, kind='stable')[::-1]
+    score = score[order]
+    first = np.r_[0, np.flatnonzero(np.diff(score)) + 1]
+    return (score[first], np.add.reduceat(pos[order], first),
+            np.add.reduceat(neg[order], first))
+
+
+def _merge_runs(runs, block):
+    """
+    Yield (score, pos, neg) blocks of the k-way merge of sorted pooled runs
+
+    Each run is read sequentially, block entries at a time. Scores above the
+    last buffered score of every unfinished run cannot appear again, so they
+    are complete and emitted pooled, the rest stays buffered
+    """
+    heads = [0] * len(runs)
+    bufs = [tuple(a[:0] for a in run) for run in runs]
+    while True:
+        for r, run in enumerate(runs):
+            have = bufs[r][0].size
+            if have < block and heads[r] < run[0].size:
+                stop = min(run[0].size, heads[r] + block - have)
+                bufs[r] = tuple(np.concatenate((b, a[heads[r]:stop]))
+                                for b, a in zip(bufs[r], run))
+                heads[r] = stop
+        pending = [bufs[r][0][-1] for r in range(len(runs))
+                   if heads[r] < runs[r][0].size]
+        parts = []
+        for r in range(len(runs)):
+            s = bufs[r][0]
+            k = np.count_nonzero(s > max(pending)) if pending else s.size
+            if k:
+                parts.append(tuple(b[:k] for b in bufs[r]))
+                bufs[r] = tuple(b[k:] for b in bufs[r])
+        if not parts:
+            if not pending:
+                return
+            continue
+        yield _pooled(*[np.concatenate(p) for p in zip(*parts)])
+
+
+class _Collinear(object):
+    # streaming drop_intermediate, a point is kept if it is the first, second
+    # (first threshold) or last point, or is not collinear with its neighbours
+    def __init__(self):
+        self.tail = np.zeros((3, 0))
+        self.seen = 0
+
+    def feed(self, pts, final=False):
+        pts = np.hstack((self.tail, pts))
+        m = pts.shape[1]
+        g0 = self.seen - self.tail.shape[1]
+        u = max(self.tail.shape[1] - 1, 0)
+        end = m if final else m - 1
+        i = np.arange(u, end)
+        d = np.r_[True, np.logical_or(np.diff(pts[0], 2), np.diff(pts[1], 2)), True]
+        keep = (g0 + i <= 1) | d[i]
+        if final:
+            keep[-1:] = True
+        self.seen = g0 + m
+        self.tail = pts[:, -2:]
+        return pts[:, u:end][:, keep]
+
+
+class _Output(object):
+    # fpr, tpr and thresh blocks collected in memory or appended to files
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.blocks = []
+        if out_dir is not None:
+            if not os.path.isdir(out_dir):
+                os.makedirs(out_dir)
+            self.paths = [os.path.join(out_dir, name + '.f8') for name in ('fpr', 'tpr', 'thresh')]
+            self.files = [open(p, 'wb') for p in self.paths]
+
+    def write(self, pts):
+        if self.out_dir is None:
+            self.blocks.append(np.vstack(pts))
+        else:
+            for f, a in zip(self.files, pts):
+                np.ascontiguousarray(a, dtype=np.float64).tofile(f)
+
+    def close(self):
+        if self.out_dir is None:
+            pts = np.hstack(self.blocks)
+            return (pts[0], pts[1], pts[2])
+        for f in self.files:
+            f.close()
+        return tuple(np.memmap(p, dtype=np.float64, mode='r') for p in self.paths)
+
+
+@profiled
+def roc_curve_file(target, score, pos_label=None, sample_weight=None,
+                   drop_intermediate=False, chunk_size=2**22, out_dir=None, tmpdir=None,
+                   target_dtype=np.int8, score_dtype=np.float64, weight_dtype=np.float64,
+                   return_counts=False):
+    """
+    Exact ROC curve, as roc_curve, of columns too large to hold in memory
+
+    The columns are read sequentially chunk_size rows at a time, each chunk
+    is sorted with tied scores pooled and written as a run to a temporary
+    directory, then the runs are merged (k-way, reading each run sequentially)
+    into the cumulative counts. Memory is O(chunk_size) whatever the number
+    of rows, and the result is the same as roc_curve on the whole columns
+
+    Parameters
+    ----------
+    target : array, memmap or path, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.  If labels are not
+        binary, pos_label should be explicitly given. A path to a .npy file
+        is memory-mapped, any other path is read as raw target_dtype values
+
+    score : array, memmap or path, shape = [n_samples]
+        Target scores, a path to a .npy or raw score_dtype file
+
+    pos_label : int or str, default=None (i.e., 1)
+        Label considered as positive and others are considered negative.
+
+    sample_weight : array, memmap or path, shape = [n_samples], optional
+        Sample weights, a path to a .npy or raw weight_dtype file
+
+    drop_intermediate : boolean, optional (default=False)
+        Whether to drop suboptimal (collinear) thresholds, as roc_curve
+
+    chunk_size : int, optional (default=2**22)
+        Number of rows sorted in memory at once
+
+    out_dir : str, optional (default=None)
+        Directory the curve is written to as raw float64 files fpr.f8,
+        tpr.f8 and thresh.f8, which are returned memory-mapped. By default
+        the curve is returned in memory
+
+    tmpdir : str, optional (default=None)
+        Where the sorted runs are written, default the system temp directory
+
+    target_dtype, score_dtype, weight_dtype : dtype, optional
+        Data types of raw (not .npy) files
+
+    return_counts : boolean, optional (default=False)
+        Whether to also return the (weighted) number of negatives and positives
+
+    Returns
+    -------
+    fpr, tpr, thresh : array, shape = [n_thresholds]
+        As returned by roc_curve, thresh[0] = inf
+
+    Nn, Np : float, only if return_counts
+
+    Example
+    -------
+    fpr, tpr, thresh = roc_curve_file('labels.npy', 'scores.npy')
+    partial_auc(fpr, tpr, 0.9, 1.0)
+    """
+    target = _open(target, target_dtype)
+    score = _open(score, score_dtype)
+    if sample_weight is not None:
+        sample_weight = _open(sample_weight, weight_dtype)
+    n = score.shape[0]
+    if target.shape[0] != n or (sample_weight is not None and sample_weight.shape[0] != n):
+        raise ValueError('target, score and sample_weight must have the same length')
+    chunk_size = max(int(chunk_size), 2)
+
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        runs = []
+        labels = set()
+        Nn = Np = 0
+        for a in range(0, n, chunk_size):
+            b = min(n, a + chunk_size)
+            t = np.asarray(target[a:b])
+            s = np.asarray(score[a:b], dtype=np.float64)
+            if np.isnan(s).any():
+                raise ValueError('score must not contain NaN')
+            if pos_label is None:
+                labels.update(np.unique(t).tolist())
+            y = t == (1 if pos_label is None else pos_label)
+            if sample_weight is None:
+                pos, neg = y.astype(np.int64), (~y).astype(np.int64)
+            else:
+                w = np.asarray(sample_weight[a:b], dtype=np.float64)
+                pos, neg = w * y, w * ~y
+            Np += pos.sum()
+            Nn += neg.sum()
+            run = _pooled(s, pos, neg)
+            paths = [os.path.join(tmp, 'run{:06d}_{}.npy'.format(len(runs), k)) for k in 'spn']
+            for p, x in zip(paths, run):
+                np.save(p, x)
+            runs.append(paths)
+        if pos_label is None and not (labels <= {0, 1} or labels <= {-1, 1}):
+            raise ValueError('target is not in {0, 1} or {-1, 1}, pos_label must be given')
+
+        runs = [tuple(np.load(p, mmap_mode='r') for p in paths) for paths in runs]
+        out = _Output(out_dir)
+        drop = _Collinear() if drop_intermediate else None
+
+        def emit(pts, final=False):
+            if drop is not None:
+                pts = drop.feed(pts, final)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out.write((pts[0] / Nn, pts[1] / Np, pts[2]))
+
+        # the first point (0, 0) has no instances predicted positive
+        emit(np.array([[0.0], [0.0], [np.inf]]))
+        fp = tp = 0
+        blocks = _merge_runs(runs, max(2, chunk_size // (2 * len(runs) or 1)))
+        for s, pos, neg in blocks:
+            fps = fp + np.cumsum(neg)
+            tps = tp + np.cumsum(pos)
+            fp, tp = fps[-1], tps[-1]
+            emit(np.vstack((fps, tps, s)))
+        if drop is not None:
+            emit(np.zeros((3, 0)), final=True)
+        del runs, blocks
+        fpr, tpr, thresh = out.close()
+
+    if return_counts:
+        return (fpr, tpr, thresh, float(Nn), float(Np))
+    return (fpr, tpr, thresh)
+
+
+@profiled
+def plot_roc_file(target, score, pos_label=None, sample_weight=None, chunk_size=2**22,
+                  out_dir=None, tmpdir=None, target_dtype=np.int8, score_dtype=np.float64,
+                  weight_dtype=np.float64, **kwargs):
+    """
+    plot_roc of columns too large to hold in memory, see roc_curve_file
+
+    The exact curve is computed out of core (drop_intermediate=False, so the
+    partial AUC and operating points are exact) and decimated for drawing.
+    kwargs are passed to plot_roc, auc_se='delong' is not available
+
+    Returns
+    -------
+    fig, ax : as plot_roc
+    """
+    from plotroc import RocResult
+    from rocplot import plot_roc
+    fpr, tpr, thresh, Nn, Np = roc_curve_file(
+        target, score, pos_label, sample_weight, False, chunk_size, out_dir, tmpdir,
+        target_dtype, score_dtype, weight_dtype, return_counts=True)
+    return plot_roc(RocResult(fpr, tpr, thresh, Nn, Np), **kwargs)
@@ -0,0 +1,193 @@
+"""
+Cross-validation: ROC curves of every fold and their vertical and threshold averages
+"""
+import numpy as np
+from plotroc import partial_auc
+from rocgroup import roc_curve_grouped
+from rocmulti import interp_curves
+from rocprof import profiled
+
+
+class FoldROC(object):
+    """
+    ROC curves of the folds of a cross-validation with their averages
+
+    Attributes
+    ----------
+    curves : GroupedROC
+        Curve of every fold (curves[i] of fold keys[i]) as concatenated
+        arrays plus offsets, with the class counts, AUC and operating points
+
+    keys : array, shape = [n_folds]
+        Sorted fold ids
+
+    auc, pauc : array, shape = [n_folds], pauc + broadcast shape of op1, op2
+        AUC and partial AUC of each fold, nan if a fold lacks positives or
+        negatives
+
+    J : array, shape = [n_folds, 4]
+        Rows of (Jval, Jfpr, Jtpr, Jthresh) as max_youden_J
+
+    grid, tpr_mean, tpr_std : array, shape = [n_grid]
+        Vertical averaging, the mean and std of the folds' tpr at the fixed
+        false positive rates of grid
+
+    thresholds : array, shape = [n_thresholds]
+        Decreasing thresholds of the threshold averaging
+
+    fpr_mean, fpr_std, tpr_thresh_mean, tpr_thresh_std : array, shape = [n_thresholds]
+        Threshold averaging, the mean and std of the folds' operating points
+        (fpr, tpr) at each threshold
+
+    auc_mean, auc_std : float
+        Mean and std of the AUC over the folds with a curve
+    """
+
+    def __init__(self, curves, pauc, grid, tpr_mean, tpr_std, thresholds, fpr_mean, fpr_std,
+                 tpr_thresh_mean, tpr_thresh_std):
+        self.curves = curves
+        self.keys = curves.keys
+        self.auc = curves.auc
+        self.pauc = pauc
+        self.J = curves.J
+        self.grid = grid
+        self.tpr_mean = tpr_mean
+        self.tpr_std = tpr_std
+        self.thresholds = thresholds
+        self.fpr_mean = fpr_mean
+        self.fpr_std = fpr_std
+        self.tpr_thresh_mean = tpr_thresh_mean
+        self.tpr_thresh_std = tpr_thresh_std
+        valid = np.isfinite(self.auc)
+        self.auc_mean = self.auc[valid].mean() if valid.any() else np.nan
+        self.auc_std = self.auc[valid].std(ddof=1) if valid.sum() > 1 else np.nan
+
+    def __len__(self):
+        return len(self.curves)
+
+    def __getitem__(self, i):
+        return self.curves[i]
+
+    def __iter__(self):
+        return iter(self.curves)
+
+
+def _points_at(thresh, offsets, thresholds):
+    """
+    Index of the operating point of every curve at each threshold, the last
+    point with thresh >= t, i.e., predicting score >= t positive.
+    Thresholds are replaced by their ranks, so one searchsorted of integer
+    keys serves all curves whatever the score range
+    """
+    n_curves = offsets.size - 1
+    values = np.unique(np.r_[-thresh, -thresholds])
+    size = values.size + 1
+    rank = np.searchsorted(values, -thresh)
+    key = rank + size * np.repeat(np.arange(n_curves), np.diff(offsets))
+    query = np.searchsorted(values, -thresholds)[None, :] + size * np.arange(n_curves)[:, None]
+    k = np.searchsorted(key, query, side='right') - 1
+    # thresh[first] is inf, so every curve has a point at or above any t
+    return np.maximum(k, offsets[:-1, None])
+
+
+@profiled
+def roc_curve_folds(target, score=None, folds=None, pos_label=None, sample_weight=None,
+                    grid=101, thresholds=101, op1=0.0, op2=1.0, Sp=True, n_jobs=1,
+                    backend='thread'):
+    """
+    ROC curves of the folds of a cross-validation, averaged vertically (tpr
+    at fixed fpr) and by threshold (operating points at fixed thresholds),
+    see Fawcett "An introduction to ROC analysis" 2006
+
+    All folds are sorted in one pass (roc_curve_grouped, in parallel with
+    n_jobs), each average is then a single vectorized interpolation or
+    searchsorted of every fold curve against the shared grid
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples], or sequence of (target, score) pairs
+        True binary labels, with score and folds, or the held out (target,
+        score) of every fold (score and folds not given). Repeated k-fold
+        runs are simply more folds
+
+    score : array, shape = [n_samples]
+        Held out scores
+
+    folds : array, shape = [n_samples]
+        Fold id of each sample
+
+    pos_label, sample_weight : see roc_curve, sample_weight is a sequence
+        of per-fold weights when target is a sequence of pairs
+
+    grid : int or array, optional (default=101)
+        False positive rates of the vertical average, an int for that many
+        evenly spaced rates
+
+    thresholds : int or array, optional (default=101)
+        Thresholds of the threshold average, an int for that many quantiles
+        of the pooled scores (plus inf, nothing predicted positive)
+
+    op1, op2, Sp : optional (default=0.0, 1.0, True)
+        Range(s) of the partial AUC of every fold, see partial_auc
+
+    n_jobs : int, optional (default=1)
+        Number of workers the folds are spread over
+
+    backend : str, optional (default='thread')
+        'thread' or 'process' pool, see roc_curve_batch
+
+    Returns
+    -------
+    cv : FoldROC
+
+    Example
+    -------
+    cv = roc_curve_folds(target, score, folds)
+    plot_roc(target, score, band=cv)
+    """
+    if score is None and folds is None:
+        pairs = [(np.asarray(t).ravel(), np.asarray(s).ravel()) for t, s in target]
+        folds = np.repeat(np.arange(len(pairs)), [t.size for t, s in pairs])
+        target = np.concatenate([t for t, s in pairs])
+        score = np.concatenate([s for t, s in pairs])
+        if sample_weight is not None:
+            sample_weight = np.concatenate([np.asarray(w, dtype=np.float64).ravel()
+                                            for w in sample_weight])
+    elif score is None or folds is None:
+        raise ValueError('give target, score and folds, or a sequence of (target, score)')
+    score = np.asarray(score, dtype=np.float64).ravel()
+
+    curves = roc_curve_grouped(target, score, folds, pos_label, sample_weight, n_jobs=n_jobs,
+                               backend=backend)
+    valid = np.isfinite(curves.auc)
+    if not valid.any():
+        raise ValueError('no fold has both positive and negative samples')
+    # only folds with a curve are used, a nan curve would break the sorted
+    # key of partial_auc and interp_curves for every fold after it
+    keep = np.flatnonzero(valid)
+    sizes = np.diff(curves.offsets)[keep]
+    sub = np.r_[0, np.cumsum(sizes)]
+    rows = np.repeat(curves.offsets[keep] - sub[:-1], sizes) + np.arange(sub[-1])
+    fpr, tpr, thresh = curves.fpr[rows], curves.tpr[rows], curves.thresh[rows]
+    kpauc = partial_auc(fpr, tpr, op1, op2, Sp, offsets=sub)
+    pauc = np.full((valid.size,) + kpauc.shape[1:], np.nan)
+    pauc[keep] = kpauc
+
+    if np.ndim(grid) == 0:
+        grid = np.linspace(0.0, 1.0, int(grid))
+    grid = np.asarray(grid, dtype=np.float64)
+
+    tpr_grid = interp_curves(fpr, tpr, sub, grid)
+    # the vertical average starts at (0, 0), not at the top of the first step
+    tpr_grid[:, grid <= 0.0] = 0.0
+    ddof = 1 if keep.size > 1 else 0
+
+    if np.ndim(thresholds) == 0:
+        q = np.quantile(score, np.linspace(1.0, 0.0, int(thresholds) - 1))
+        thresholds = np.r_[np.inf, q]
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    k = _points_at(thresh, sub, thresholds)
+
+    return FoldROC(curves, pauc, grid, tpr_grid.mean(axis=0), tpr_grid.std(axis=0, ddof=ddof),
+                   thresholds, fpr[k].mean(axis=0), fpr[k].std(axis=0, ddof=ddof),
+                   tpr[k].mean(axis=0), tpr[k].std(axis=0, ddof=ddof))
@@ -0,0 +1,298 @@
+"""
+ROC curves and operating points of many subgroups (site, scanner, ...) in one pass
+"""
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from plotroc import ppv_curve, npv_curve, OperatingPoints
+from rocprof import profiled
+
+
+class GroupedROC(object):
+    """
+    ROC curves and operating points of every subgroup, held as concatenated
+    arrays plus offsets like BatchROC
+
+    Curve i (of group keys[i]) is fpr[offsets[i]:offsets[i+1]] (likewise tpr
+    and thresh), indexing returns the (fpr, tpr, thresh) views of a curve
+
+    Attributes
+    ----------
+    keys : array, shape = [n_groups]
+        Sorted distinct group keys
+
+    fpr, tpr, thresh : array, shape = [offsets[-1]]
+        Concatenated curves, each as returned by roc_curve with
+        drop_intermediate=False
+
+    offsets : array, shape = [n_groups + 1]
+        Start of each curve in the concatenated arrays
+
+    Nn, Np : array, shape = [n_groups]
+        (Weighted) number of negative and positive samples of each group
+
+    auc : array, shape = [n_groups]
+        AUC of each group, nan if a group lacks positives or negatives
+
+    J, ppv, npv : array, shape = [n_groups, 4]
+        Rows of (Jval, Jfpr, Jtpr, Jthresh) as max_youden_J,
+        (Bppv, Bppv_fpr, Bppv_tpr, Bppv_thresh) as best_ppv and
+        (Bnpv, Bnpv_fpr, Bnpv_tpr, Bnpv_thresh) as best_npv
+    """
+
+    def __init__(self, keys, fpr, tpr, thresh, offsets, Nn, Np, auc, J, ppv, npv):
+        self.keys = keys
+        self.fpr = fpr
+        self.tpr = tpr
+        self.thresh = thresh
+        self.offsets = offsets
+        self.Nn = Nn
+        self.Np = Np
+        self.auc = auc
+        self.J = J
+        self.ppv = ppv
+        self.npv = npv
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError('group index out of range')
+        i = i % len(self)
+        s = slice(self.offsets[i], self.offsets[i + 1])
+        return (self.fpr[s], self.tpr[s], self.thresh[s])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def index(self, key):
+        """Position of group key in keys"""
+        i = np.searchsorted(self.keys, key)
+        if i >= len(self) or self.keys[i] != key:
+            raise KeyError(key)
+        return int(i)
+
+    def operating_points(self, i):
+        """
+        OperatingPoints engine of curve i with its class counts, for the
+        queries not precomputed, e.g., grouped.operating_points(i).bayes_error()
+        """
+        fpr, tpr, thresh = self[i]
+        return OperatingPoints(fpr, tpr, thresh, self.Nn[i], self.Np[i])
+
+
+def _first(mask, gid, n_groups, last=False):
+    # first (or last) index of each group where mask holds, -1 where it never does
+    idx = np.flatnonzero(mask)
+    if last:
+        idx = idx[::-1]
+    out = np.full(n_groups, -1)
+    g, k = np.unique(gid[idx], return_index=True)
+    out[g] = idx[k]
+    return out
+
+
+def _rows(value, idx, ok, fpr, tpr, thresh, fill):
+    # (value, fpr, tpr, thresh) rows at idx, fill where not ok
+    out = np.tile(np.asarray(fill, dtype=np.float64), (idx.size, 1))
+    i = idx[ok]
+    out[ok] = np.column_stack((value[i], fpr[i], tpr[i], thresh[i]))
+    return out
+
+
+def _codes(group):
+    """
+    Dense integer codes of the group keys, in the smallest unsigned type so
+    the stable sort by group is a radix sort, and the sorted distinct keys
+    """
+    if group.dtype.kind in 'iu' and group.size:
+        # small integer keys, skip the sort of np.unique
+        lo = group.min()
+        span = int(group.max()) - int(lo) + 1
+        if span <= max(2**16, group.size):
+            code = (group - lo).astype(np.intp)
+            present = np.bincount(code, minlength=span) > 0
+            keys = (np.flatnonzero(present) + lo).astype(group.dtype)
+            code = (np.cumsum(present) - 1)[code]
+        else:
+            keys, code = np.unique(group, return_inverse=True)
+    else:
+        keys, code = np.unique(group, return_inverse=True)
+    dtype = np.uint16 if keys.size <= 2**16 else np.uint32
+    return code.astype(dtype), keys
+
+
+def _group_block(code, y, score, w, target_ppv, target_npv):
+    """
+    Curves and operating points of the rows of whole groups, in any order:
+    one sort by (group code, decreasing score) then segment-wise cumulative sums
+    """
+    # decreasing score, then a stable (radix) sort by the small integer codes
+    order = np.argsort(-score)
+    order = order[np.argsort(code[order], kind='stable')]
+    code = code[order]
+    score = score[order]
+    y = y[order]
+    pos = y.astype(np.float64) if w is None else w[order] * y
+    neg = 1.0 - pos if w is None else w[order] - pos
+
+    new_group = np.r_[True, code[1:] != code[:-1]]
+    starts = np.flatnonzero(new_group)
+    G = starts.size
+    # last row of each distinct (group, score), i.e., each operating point
+    last = np.flatnonzero(np.r_[new_group[1:] | (score[1:] != score[:-1]), True])
+    ctp = np.cumsum(pos)
+    cfp = np.cumsum(neg)
+    gid_row = np.cumsum(new_group) - 1
+    base_tp = np.r_[0.0, ctp][starts]
+    base_fp = np.r_[0.0, cfp][starts]
+    g_last = gid_row[last]
+    tps = ctp[last] - base_tp[g_last]
+    fps = cfp[last] - base_fp[g_last]
+    ends = np.r_[np.flatnonzero(np.diff(g_last)), last.size - 1]
+    Np = tps[ends]
+    Nn = fps[ends]
+
+    # insert the (0, 0) point, threshold inf, at the start of every curve
+    first_pt = np.r_[0, ends[:-1] + 1]
+    tps = np.insert(tps, first_pt, 0.0)
+    fps = np.insert(fps, first_pt, 0.0)
+    thresh = np.insert(score[last], first_pt, np.inf)
+    gid = np.insert(g_last, first_pt, np.arange(G))
+    offsets = np.r_[0, np.cumsum(np.bincount(gid, minlength=G))]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fpr = fps / Nn[gid]
+        tpr = tps / Np[gid]
+        # trapezoids, the first point of each curve starts a new group
+        area = np.r_[0.0, np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2]
+        area[offsets[:-1]] = 0.0
+        auc = np.bincount(gid, area, minlength=G)
+        auc[(Nn <= 0) | (Np <= 0)] = np.nan
+
+        # maximum Youden's J, first (highest threshold) index of the maximum
+        J = tpr + (1 - fpr) - 1
+        Jmax = np.maximum.reduceat(J, offsets[:-1])
+        i = _first(J == Jmax[gid], gid, G)
+        Jrow = _rows(J, i, (i >= 0) & (Jmax > 0.0), fpr, tpr, thresh, (0.0, 0.0, 0.0, 0.0))
+
+        # PPV closest to target_ppv, ties to the lowest threshold
+        ppv = ppv_curve(fpr, tpr, Nn[gid], Np[gid])
+        diff = np.abs(target_ppv - ppv)
+        diff[tpr == 0.0] = np.inf
+        dmin = np.minimum.reduceat(diff, offsets[:-1])
+        i = _first(diff == dmin[gid], gid, G, last=True)
+        ppvrow = _rows(ppv, i, (i >= 0) & (dmin <= 1.0), fpr, tpr, thresh, (0.0, 0.0, 0.0, 0.0))
+
+        # NPV closest to target_npv, ties to the highest threshold
+        npv = npv_curve(fpr, tpr, Nn[gid], Np[gid])
+        diff = np.abs(target_npv - npv)
+        diff[fpr == 1.0] = np.inf
+        dmin = np.minimum.reduceat(diff, offsets[:-1])
+        i = _first(diff == dmin[gid], gid, G)
+        npvrow = _rows(npv, i, (i >= 0) & (dmin < 1.0), fpr, tpr, thresh, (0.0, 0.0, 0.0, 0.0))
+
+    return code[starts], fpr, tpr, thresh, offsets, Nn, Np, auc, Jrow, ppvrow, npvrow
+
+
+def _group_block_star(args):
+    return _group_block(*args)
+
+
+@profiled
+def roc_curve_grouped(target, score, group, pos_label=None, sample_weight=None,
+                      target_ppv=1.0, target_npv=1.0, n_jobs=1, backend='thread'):
+    """
+    ROC curve, AUC, maximum Youden's J and best PPV/NPV of every subgroup
+
+    The samples are sorted once by (group, decreasing score) and all curves
+    and operating points computed with segment-wise cumulative sums and
+    reductions, rather than a roc_curve and operating point search per group.
+    With n_jobs > 1 the groups are split into contiguous ranges of about equal
+    size, each sorted and evaluated by its own worker
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.  If labels are not
+        binary, pos_label should be explicitly given.
+
+    score : array, shape = [n_samples]
+        Target scores
+
+    group : array, shape = [n_samples]
+        Subgroup key of each sample (site, scanner, ...), combine several
+        keys into one first, e.g., with np.unique(..., axis=0, return_inverse=True)
+
+    pos_label : int or str, default=None (i.e., 1)
+        Label considered as positive and others are considered negative.
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    target_ppv, target_npv : float, optional (default=1.0)
+        Targets of the best PPV and NPV, see best_ppv and best_npv
+
+    n_jobs : int, optional (default=1)
+        Number of workers the groups are spread over
+
+    backend : str, optional (default='thread')
+        'thread' or 'process' pool, see roc_curve_batch
+
+    Returns
+    -------
+    grouped : GroupedROC
+        Curves of every group as concatenated arrays plus offsets, with the
+        class counts, auc and operating points of each group
+
+    Example
+    -------
+    g = roc_curve_grouped(target, score, site)
+    for key, auc, (Jval, Jfpr, Jtpr, Jthresh) in zip(g.keys, g.auc, g.J):
+        ...
+    """
+    target = np.asarray(target).ravel()
+    score = np.asarray(score, dtype=np.float64).ravel()
+    group = np.asarray(group).ravel()
+    if not target.size == score.size == group.size:
+        raise ValueError('target, score and group must have the same length')
+    if target.size == 0:
+        raise ValueError('no samples')
+    y = target == (1 if pos_label is None else pos_label)
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=np.float64).ravel()
+
+    code, keys = _codes(group)
+    if n_jobs <= 1:
+        parts = [_group_block(code, y, score, sample_weight, target_ppv, target_npv)]
+    else:
+        # partition the rows by group, then split the groups into n_jobs ranges
+        order = np.argsort(code, kind='stable')
+        sorted_code = code[order]
+        starts = np.flatnonzero(np.r_[True, sorted_code[1:] != sorted_code[:-1]])
+        # first group starting at or after each of n_jobs - 1 equally spaced rows
+        k = np.searchsorted(starts, np.arange(1, n_jobs) * code.size // n_jobs)
+        cuts = np.unique(starts[k[k < starts.size]])
+        bounds = np.r_[0, cuts[cuts > 0], code.size]
+        tasks = []
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            rows = order[a:b]
+            tasks.append((sorted_code[a:b], y[rows], score[rows],
+                          None if sample_weight is None else sample_weight[rows],
+                          target_ppv, target_npv))
+        if backend == 'process':
+            pool = ProcessPoolExecutor(n_jobs)
+        elif backend == 'thread':
+            pool = ThreadPoolExecutor(n_jobs)
+        else:
+            raise ValueError("backend must be 'thread' or 'process'")
+        with pool:
+            parts = list(pool.map(_group_block_star, tasks))
+
+    codes, fpr, tpr, thresh, offsets, Nn, Np, auc, J, ppv, npv = zip(*parts)
+    starts = np.cumsum([0] + [o[-1] for o in offsets[:-1]])
+    offsets = np.r_[0, np.concatenate([o[1:] + s for o, s in zip(offsets, starts)])]
+    return GroupedROC(keys[np.concatenate(codes)], np.concatenate(fpr), np.concatenate(tpr),
+                      np.concatenate(thresh), offsets, np.concatenate(Nn), np.concatenate(Np),
+                      np.concatenate(auc), np.vstack(J), np.vstack(ppv), np.vstack(npv))
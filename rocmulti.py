@@ -0,0 +1,372 @@
+"""
+One-vs-rest ROC curves of multiclass probabilities with micro and macro averages
+"""
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from plotroc import partial_auc, max_youden_J, decimate_curve, OperatingPoints, RocResult
+from rocbatch import _column_roc_star
+from rocprof import profiled
+
+
+class MulticlassROC(object):
+    """
+    One-vs-rest ROC curves of every class held as concatenated arrays plus
+    offsets like BatchROC, with the micro and macro averaged curves
+
+    Curve i (of class classes[i] against the rest) is
+    fpr[offsets[i]:offsets[i+1]] (likewise tpr and thresh), indexing returns
+    the (fpr, tpr, thresh) views of a curve
+
+    Attributes
+    ----------
+    classes : array, shape = [n_classes]
+        Class labels of the probability columns
+
+    fpr, tpr, thresh : array, shape = [offsets[-1]]
+        Concatenated one-vs-rest curves, each as returned by roc_curve with
+        drop_intermediate=False
+
+    offsets : array, shape = [n_classes + 1]
+        Start of each curve in the concatenated arrays
+
+    Nn, Np : array, shape = [n_classes]
+        (Weighted) number of negative and positive samples of each class
+
+    auc, pauc : array, shape = [n_classes], pauc + broadcast shape of op1, op2
+        AUC and partial AUC of each class, nan if a class is never or always
+        the true one
+
+    J : array, shape = [n_classes, 4]
+        Rows of (Jval, Jfpr, Jtpr, Jthresh) as max_youden_J
+
+    micro : tuple (fpr, tpr, thresh)
+        Curve of every (sample, class) decision pooled, thresholds on the
+        probability shared by all classes
+
+    micro_Nn, micro_Np, micro_auc, micro_pauc, micro_J :
+        Class counts, AUC, partial AUC and Youden's J of the micro curve
+
+    macro : tuple (fpr, tpr)
+        Mean of the class curves interpolated on a common fpr grid
+
+    macro_auc, macro_pauc : float or array
+        Mean AUC and partial AUC of the classes with a curve
+    """
+
+    def __init__(self, classes, fpr, tpr, thresh, offsets, Nn, Np, auc, pauc, J,
+                 micro, micro_Nn, micro_Np, micro_auc, micro_pauc, micro_J, macro):
+        self.classes = classes
+        self.fpr = fpr
+        self.tpr = tpr
+        self.thresh = thresh
+        self.offsets = offsets
+        self.Nn = Nn
+        self.Np = Np
+        self.auc = auc
+        self.pauc = pauc
+        self.J = J
+        self.micro = micro
+        self.micro_Nn = micro_Nn
+        self.micro_Np = micro_Np
+        self.micro_auc = micro_auc
+        self.micro_pauc = micro_pauc
+        self.micro_J = micro_J
+        self.macro = macro
+        valid = np.isfinite(auc)
+        self.macro_auc = auc[valid].mean() if valid.any() else np.nan
+        self.macro_pauc = pauc[valid].mean(axis=0) if valid.any() else np.nan
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError('class index out of range')
+        i = i % len(self)
+        s = slice(self.offsets[i], self.offsets[i + 1])
+        return (self.fpr[s], self.tpr[s], self.thresh[s])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def index(self, label):
+        """Position of class label in classes"""
+        i = np.flatnonzero(self.classes == label)
+        if not i.size:
+            raise KeyError(label)
+        return int(i[0])
+
+    def curve(self, i):
+        """
+        RocResult of curve i, or of the micro average for i='micro', e.g.,
+        plot_roc(mc.curve(0))
+        """
+        if isinstance(i, str) and i == 'micro':
+            return RocResult(*self.micro, self.micro_Nn, self.micro_Np)
+        return RocResult(*self[i], self.Nn[i], self.Np[i])
+
+    def operating_points(self, i):
+        """
+        OperatingPoints engine of curve i (or 'micro') with its class counts,
+        e.g., mc.operating_points(2).bayes_error()
+        """
+        return OperatingPoints(self.curve(i))
+
+
+def interp_curves(fpr, tpr, offsets, grid, _key=None):
+    """
+    tpr of every concatenated curve linearly interpolated at the fpr grid
+    points, the highest tpr where a curve is vertical at a grid point
+
+    Parameters
+    ----------
+    fpr, tpr : array, shape = [offsets[-1]]
+        Concatenated curves with increasing fpr
+
+    offsets : array, shape = [n_curves + 1]
+        Start of each curve in the concatenated arrays
+
+    grid : array, shape = [n_grid]
+        False positive rates in [0, 1]
+
+    Returns
+    -------
+    tpr_grid : array, shape = [n_curves, n_grid]
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    n_curves = offsets.size - 1
+    first = offsets[:-1, None]
+    last = offsets[1:, None] - 1
+    # fpr lies in [0, 1], shifting curve c by 2c makes one sorted key
+    shift = 2.0 * np.arange(n_curves)
+    key = fpr + np.repeat(shift, np.diff(offsets)) if _key is None else _key
+    k = np.searchsorted(key, grid[None, :] + shift[:, None], side='right') - 1
+    k = np.clip(k, first, last)
+    nxt = np.minimum(k + 1, last)
+    dx = fpr[nxt] - fpr[k]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(dx > 0, (grid - fpr[k]) / dx, 0.0)
+    return tpr[k] + np.clip(t, 0.0, 1.0) * (tpr[nxt] - tpr[k])
+
+
+@profiled
+def roc_curve_multiclass(target, proba, classes=None, sample_weight=None, op1=0.0, op2=1.0,
+                         Sp=True, grid=None, n_jobs=1, backend='thread'):
+    """
+    One-vs-rest ROC curves, AUC, partial AUC and Youden's J of every class of a
+    K class model, with the micro and macro averaged curves
+
+    The indicator of each class is built once, every probability column is
+    sorted (one argsort per class) and the flattened matrix once for the micro
+    average, in a thread or process pool. The partial AUC of all classes is a
+    single vectorized call and the macro average one searchsorted of every
+    curve against the common grid
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples] or [n_samples, n_classes]
+        True class labels, or a binary indicator matrix with a column per
+        class
+
+    proba : array, shape = [n_samples, n_classes]
+        Scores (e.g., softmax probabilities) of each class
+
+    classes : array, shape = [n_classes], optional (default=None)
+        Labels of the proba columns, np.unique(target) by default
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample weights, default=None
+
+    op1, op2, Sp : optional (default=0.0, 1.0, True)
+        Range(s) of the partial AUC, op1 and op2 may be arrays of many
+        ranges, see partial_auc
+
+    grid : int or array, optional (default=None)
+        False positive rates of the macro average, an int for that many
+        evenly spaced rates, by default the union of the class curves' rates
+        (as sklearn), up to n_samples * n_classes points, give an int grid
+        for large data
+
+    n_jobs : int, optional (default=1)
+        Number of workers the classes are spread over
+
+    backend : str, optional (default='thread')
+        'thread' or 'process' pool, sorting releases the GIL so threads
+        avoid copying the columns to other processes
+
+    Returns
+    -------
+    curves : MulticlassROC
+    """
+    proba = np.asarray(proba)
+    if proba.ndim != 2:
+        raise ValueError('proba must have shape (n_samples, n_classes)')
+    n, n_classes = proba.shape
+    target = np.asarray(target)
+    if target.ndim == 2:
+        if target.shape != proba.shape:
+            raise ValueError('target indicator and proba must have the same shape')
+        Y = target.astype(bool)
+        classes = np.arange(n_classes) if classes is None else np.asarray(classes)
+    else:
+        target = target.ravel()
+        if target.size != n:
+            raise ValueError('target and proba must have the same number of samples')
+        classes = np.unique(target) if classes is None else np.asarray(classes)
+        Y = target[:, None] == classes[None, :]
+    if classes.size != n_classes:
+        raise ValueError('{} classes but proba has {} columns'.format(classes.size, n_classes))
+
+    if sample_weight is None:
+        Np = np.count_nonzero(Y, axis=0).astype(np.float64)
+        Nn = n - Np
+    else:
+        sample_weight = np.asarray(sample_weight, dtype=np.float64).ravel()
+        Np = sample_weight @ Y
+        Nn = sample_weight.sum() - Np
+    micro_Np = Np.sum()
+    micro_Nn = Nn.sum()
+    if micro_Np <= 0 or micro_Nn <= 0:
+        raise ValueError('both positive and negative samples are required')
+
+    # the micro average, the largest sort, goes first
+    micro_w = None if sample_weight is None else np.repeat(sample_weight, n_classes)
+    args = [(Y.ravel(), proba.ravel(), micro_w, micro_Nn, micro_Np)]
+    # a class never (or always) true has no curve, nan rates rather than 0/0
+    valid = (Np > 0) & (Nn > 0)
+    args += [(Y[:, k], proba[:, k], sample_weight, Nn[k] if valid[k] else np.nan,
+              Np[k] if valid[k] else np.nan) for k in range(n_classes)]
+    if n_jobs > 1:
+        if backend == 'process':
+            pool = ProcessPoolExecutor(n_jobs)
+        elif backend == 'thread':
+            pool = ThreadPoolExecutor(n_jobs)
+        else:
+            raise ValueError("backend must be 'thread' or 'process'")
+        with pool:
+            results = list(pool.map(_column_roc_star, args))
+    else:
+        results = [_column_roc_star(a) for a in args]
+
+    (mfpr, mtpr, mthresh, micro_auc), results = results[0], results[1:]
+    fpr, tpr, thresh, auc = zip(*results)
+    offsets = np.r_[0, np.cumsum([f.size for f in fpr])]
+    fpr = np.concatenate(fpr)
+    tpr = np.concatenate(tpr)
+    thresh = np.concatenate(thresh)
+    auc = np.array(auc)
+    auc[~valid] = np.nan
+    # the valid curves alone, a nan curve would break the sorted key of
+    # partial_auc and interp_curves for every curve after it
+    keep = np.flatnonzero(valid)
+    sizes = np.diff(offsets)[keep]
+    sub = np.r_[0, np.cumsum(sizes)]
+    rows = np.repeat(offsets[keep] - sub[:-1], sizes) + np.arange(sub[-1])
+    kfpr, ktpr = fpr[rows], tpr[rows]
+    kpauc = partial_auc(kfpr, ktpr, op1, op2, Sp, offsets=sub)
+    pauc = np.full((n_classes,) + kpauc.shape[1:], np.nan)
+    pauc[keep] = kpauc
+    micro_pauc = partial_auc(mfpr, mtpr, op1, op2, Sp)
+
+    J = np.full((n_classes, 4), np.nan)
+    for k in np.flatnonzero(valid):
+        s = slice(offsets[k], offsets[k + 1])
+        J[k] = max_youden_J(fpr[s], tpr[s], thresh[s])
+    micro_J = max_youden_J(mfpr, mtpr, mthresh)
+
+    if grid is None:
+        grid = np.unique(fpr[np.repeat(valid, np.diff(offsets))])
+    elif np.ndim(grid) == 0:
+        grid = np.linspace(0.0, 1.0, int(grid))
+    grid = np.asarray(grid, dtype=np.float64)
+    # the grid in blocks, so a fine grid and many classes fit in memory
+    key = kfpr + np.repeat(2.0 * np.arange(keep.size), np.diff(sub))
+    macro_tpr = np.empty(grid.size)
+    block = max(1, 2**22 // max(keep.size, 1))
+    for s in range(0, grid.size, block):
+        macro_tpr[s:s + block] = interp_curves(kfpr, ktpr, sub, grid[s:s + block],
+                                               key).mean(axis=0)
+    macro = (np.r_[0.0, grid], np.r_[0.0, macro_tpr])
+
+    return MulticlassROC(classes, fpr, tpr, thresh, offsets, Nn, Np, auc, pauc, J,
+                         (mfpr, mtpr, mthresh), micro_Nn, micro_Np, micro_auc, micro_pauc,
+                         micro_J, macro)
+
+
+@profiled
+def plot_roc_multiclass(target, proba=None, classes=None, sample_weight=None, title=None,
+                        max_J=False, ax=None, show=True, decimate=1e-3, **kwargs):
+    """
+    Plot the one-vs-rest ROC curve of every class with the micro and macro
+    averages, the legend showing each AUC
+
+    Parameters
+    ----------
+    target, proba, classes, sample_weight : see roc_curve_multiclass,
+        alternatively target is a MulticlassROC and proba is not given
+
+    title : str, optional (default=None)
+        Title to prepend to the figure title
+
+    max_J : boolean, optional (default=False)
+        Whether to highlight the operating point with maximum Youden's J of
+        each class and of the micro average
+
+    ax : matplotlib Axes, optional (default=None)
+        Axes to draw on, by default a new pyplot figure
+
+    show : boolean, optional (default=True)
+        Whether to call plt.show(), set False for non-interactive use
+
+    decimate : float, optional (default=1e-3)
+        Tolerance of the curve decimation before plotting, see plot_roc
+
+    kwargs : passed to roc_curve_multiclass (e.g., grid, n_jobs)
+
+    Returns
+    -------
+    fig, ax, curves : matplotlib Figure, Axes and the MulticlassROC
+    """
+    import matplotlib.pyplot as plt
+    if proba is None and isinstance(target, MulticlassROC):
+        mc = target
+    else:
+        mc = roc_curve_multiclass(target, proba, classes, sample_weight, **kwargs)
+
+    def points(x, y):
+        if not decimate:
+            return x, y
+        sel = decimate_curve(x, y, decimate)
+        return x[sel], y[sel]
+
+    if ax is None:
+        fig, ax = plt.subplots()
+    else:
+        fig = ax.figure
+    for k, (fpr, tpr, thresh) in enumerate(mc):
+        if not np.isfinite(mc.auc[k]):
+            continue
+        line, = ax.plot(*points(fpr, tpr), lw=1,
+                        label='{} AUC = {:0.3f}'.format(mc.classes[k], mc.auc[k]))
+        if max_J:
+            ax.plot(mc.J[k, 1], mc.J[k, 2], 'o', color=line.get_color())
+    ax.plot(*points(mc.micro[0], mc.micro[1]), 'k-', lw=2,
+            label='micro AUC = {:0.3f}'.format(mc.micro_auc))
+    if max_J:
+        ax.plot(mc.micro_J[1], mc.micro_J[2], 'ko',
+                label='J@{:0.2f} = {:0.3f}'.format(mc.micro_J[3], mc.micro_J[0]))
+    ax.plot(*points(*mc.macro), 'k:', lw=2, label='macro AUC = {:0.3f}'.format(mc.macro_auc))
+
+    ax.plot([0, 1], [0, 1], 'k--', lw=0.5)
+    ax.set_xlim([-0.02, 1.0])
+    ax.set_ylim([0.0, 1.02])
+    ax.grid(True)
+    ax.legend(loc='lower right')
+    ax.set_ylabel('True Positive Rate (TPR)')
+    ax.set_xlabel('False Positive Rate (FPR)')
+    title = (title + ': ' if title else '') + 'One-vs-Rest Receiver Operating Characteristic'
+    ax.set_title(title)
+    if show:
+        plt.show()
+    return fig, ax, mc
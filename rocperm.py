@@ -0,0 +1,196 @@
+"""
+Paired permutation tests of AUC and partial AUC differences between models
+"""
+import numpy as np
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+from rocboot import _SortedROC, SEED_GROUP
+from rocprof import profiled
+
+# sorted pooled scores of every pair of models, set once by _init_worker
+_data = None
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+
+
+def _differences(data, swap):
+    """
+    (AUC, pAUC) of model a minus model b after swapping the scores of the
+    cases where swap is True, for each row of swap, shape = [B, n_cases]
+
+    data holds the 2 n_cases scores of both models pooled and sorted once,
+    a permuted model a is the selection of n_cases of them (its own score,
+    or b's where swapped) and b the rest, so each permutation is a weight
+    row over the same sorted scores and no curve is re-sorted
+    """
+    n = swap.shape[1]
+    # selected by model a: a's own score where not swapped, b's where swapped
+    W = (swap[:, data.order % n] == (data.order >= n)).astype(np.float64)
+    if data.op1 > 0.0 or data.op2 < 1.0:
+        return data.stats(W)[:, :2] - data.stats(1.0 - W)[:, :2]
+
+    # AUC only: b's counts are the totals minus a's, one cumulative sum
+    pos = data.y if data.w is None else data.w * data.y
+    neg = ~data.y if data.w is None else data.w * ~data.y
+    pa = W * pos
+    na = W * neg
+    pt, nt = pos.astype(np.float64), neg.astype(np.float64)
+    if data.starts.size < data.y.size:
+        # pool tied scores into one operating point
+        pa = np.add.reduceat(pa, data.starts, axis=1)
+        na = np.add.reduceat(na, data.starts, axis=1)
+        pt = np.add.reduceat(pt, data.starts)
+        nt = np.add.reduceat(nt, data.starts)
+    # positives above each tie group, of a and of both models
+    ca = np.cumsum(pa, axis=1) - pa
+    ct = np.cumsum(pt) - pt
+    # each negative counts the positives above it and half of those tied
+    ua = np.sum(na * (ca + pa / 2), axis=1)
+    ub = np.sum((nt - na) * (ct - ca + (pt - pa) / 2), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = (ua - ub) / (pt.sum() / 2 * nt.sum() / 2)
+    return np.column_stack((d, d))
+
+
+def _perm_block(args):
+    pair, seed, B, block_rows, n = args
+    data = _data[pair]
+    rng = np.random.default_rng(seed)
+    out = []
+    for k in range(0, B, block_rows):
+        rows = min(block_rows, B - k)
+        out.append(_differences(data, rng.random((rows, n)) < 0.5))
+    return np.vstack(out)
+
+
+def _exact_block(args):
+    pair, start, stop, n = args
+    # every one of the 2**n swap patterns
+    codes = np.arange(start, stop)
+    return _differences(_data[pair], ((codes[:, None] >> np.arange(n)) & 1).astype(bool))
+
+
+@profiled
+def permutation_test(target, scores, n_perm=10000, op1=0.0, op2=1.0, Sp=True, pos_label=None,
+                     sample_weight=None, n_jobs=1, random_state=None, block_size=2**22,
+                     return_null=False):
+    """
+    Paired permutation test of the AUC and partial AUC differences between
+    every pair of models scored on the same cases
+
+    Under the null hypothesis the two models' scores of a case are
+    exchangeable, each permutation swaps them for a random half of the cases.
+    The scores of both models are pooled and sorted once per pair, each
+    permutation is then a 0/1 weight vector over the sorted scores and the
+    permuted AUCs come from cumulative sums many permutations at a time (see
+    rocboot), never a roc_curve from scratch. Blocks of SEED_GROUP
+    permutations are spread over a process pool, each seeded from its own
+    child of random_state, so results do not depend on n_jobs. With fewer
+    than log2(n_perm) cases all 2**n_cases swap patterns are enumerated and
+    the p-values are exact
+
+    Parameters
+    ----------
+    target : array, shape = [n_samples]
+        True binary labels in range {0, 1} or {-1, 1}.  If labels are not
+        binary, pos_label should be explicitly given.
+
+    scores : array, shape = [n_samples, n_models]
+        Scores of each model (column), n_models >= 2
+
+    n_perm : int, optional (default=10000)
+        Number of random permutations of each pair
+
+    op1, op2, Sp : optional (default=0.0, 1.0, True)
+        Range of the partial AUC, see partial_auc
+
+    pos_label : int or str, default=None (i.e., 1)
+        Label considered as positive and others are considered negative.
+
+    sample_weight : array-like of shape = [n_samples], optional
+        Sample (case) weights, default=None
+
+    n_jobs : int, optional (default=1)
+        Number of worker processes
+
+    random_state : int or None, optional (default=None)
+        Seed of the permutations
+
+    block_size : int, optional (default=2**22)
+        Approximate number of (permutation, score) weights held at once
+
+    return_null : boolean, optional (default=False)
+        Whether to also return the null distribution of each pair
+
+    Returns
+    -------
+    result : dict
+        For each pair of model columns (i, j), i < j, a dict with 'auc' and
+        'pauc' each the tuple (difference i - j, two sided p-value), the
+        p-value is (1 + #|null| >= |difference|)/(1 + n_perm), exact if enumerated
+
+    null : dict of arrays, shape = [n_perm, 2], only if return_null
+        Permuted (AUC, pAUC) differences of each pair
+    """
+    target = np.asarray(target).ravel()
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.ndim != 2 or scores.shape[1] < 2 or scores.shape[0] != target.size:
+        raise ValueError('scores must have shape (n_samples, n_models), n_models >= 2')
+    if sample_weight is not None:
+        sample_weight = np.tile(np.asarray(sample_weight, dtype=np.float64).ravel(), 2)
+    pos_label = 1 if pos_label is None else pos_label
+    n = target.size
+    y = target == pos_label
+    if not 0 < np.count_nonzero(y) < n:
+        raise ValueError('both positive and negative samples are required')
+
+    pairs = list(combinations(range(scores.shape[1]), 2))
+    data = []
+    for i, j in pairs:
+        pooled = np.r_[scores[:, i], scores[:, j]]
+        data.append(_SortedROC(np.tile(target, 2), pooled, sample_weight, pos_label, op1, op2,
+                               Sp, '', 0.0))
+
+    block_rows = max(1, block_size // (2 * n))
+    exact = n < 31 and 2**n <= n_perm
+    if exact:
+        total = 2**n
+        bounds = np.r_[np.arange(0, total, block_rows), total]
+        tasks = [(p, a, b, n) for p in range(len(pairs)) for a, b in zip(bounds[:-1], bounds[1:])]
+        func = _exact_block
+    else:
+        total = n_perm
+        sizes = np.diff(np.r_[np.arange(0, n_perm, SEED_GROUP), n_perm])
+        children = np.random.SeedSequence(random_state).spawn(len(pairs))
+        tasks = [(p, seed, B, block_rows, n) for p in range(len(pairs))
+                 for seed, B in zip(children[p].spawn(sizes.size), sizes)]
+        func = _perm_block
+    if n_jobs > 1:
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(data,)) as pool:
+            blocks = list(pool.map(func, tasks))
+    else:
+        _init_worker(data)
+        try:
+            blocks = [func(task) for task in tasks]
+        finally:
+            _init_worker(None)
+
+    result = {}
+    null = {}
+    per_pair = len(blocks) // len(pairs)
+    for p, pair in enumerate(pairs):
+        dist = np.vstack(blocks[p * per_pair:(p + 1) * per_pair])
+        obs = _differences(data[p], np.zeros((1, n), dtype=bool))[0]
+        # relative tolerance, so rounding does not separate equal differences
+        tol = 1e-12 * np.maximum(np.abs(obs), 1.0)
+        count = np.count_nonzero(np.abs(dist) >= np.abs(obs) - tol, axis=0)
+        p_value = count / total if exact else (1.0 + count) / (1.0 + total)
+        result[pair] = {'auc': (obs[0], p_value[0]), 'pauc': (obs[1], p_value[1])}
+        null[pair] = dist
+
+    if return_null:
+        return result, null
+    return result
@@ -0,0 +1,452 @@
+"""
+Plotting of ROC curves and Bland-Altman plots, the metrics live in plotroc
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+from plotroc import (roc_result, delong_auc, average_precision, decimate_curve, ppv_curve,
+                     npv_curve, _threshold_index, RocResult)
+from rocchi import chi_sqr_grid
+from blandaltman import BlandAltman
+from rocprof import profiled, Laps
+
+
+@profiled
+def plot_bland_altman(data1, data2=None, *args, kind='auto', pair=0, bins=128, ax=None,
+                      show=True, alpha=0.05, **kwargs):
+    """
+    Function to draw a Bland Altman plot comparing two clinical measurements
+
+    Bias and limits of agreement (bias +/- 1.96 sd, sd the sample standard
+    deviation with ddof=1, see BlandAltman.summary) are drawn with their
+    (1 - alpha) confidence intervals as shaded bands, the samples as a
+    scatter, a hexbin or a 2-D histogram of their density
+
+    See Bland and Altman
+    STATISTICAL METHODS FOR ASSESSING AGREEMENT BETWEEN TWO METHODS OF CLINICAL
+    MEASUREMENT
+
+    Parameters
+    ----------
+    data1, data2 : array, shape = [n] or [n, n_pairs]
+        Paired measurements, alternatively data1 is a BlandAltman
+        accumulator of streamed chunks (data2 None), drawn as its histogram
+
+    kind : str, optional (default='auto')
+        'scatter', 'hexbin' or 'hist', 'auto' is a scatter of up to 10000
+        samples and a hexbin of more
+
+    pair : int, optional (default=0)
+        Which pair (column) of data1, data2 to draw
+
+    bins : int, optional (default=128)
+        Bins per axis of the hexbin or histogram
+
+    ax : matplotlib Axes, optional (default=None)
+        Axes to draw into, a new figure if None
+
+    show : boolean, optional (default=True)
+        Whether to call plt.show(), set False for non-interactive use
+
+    alpha : float, optional (default=0.05)
+        Confidence level of the shaded intervals is 1 - alpha
+
+    args, kwargs : passed to ax.scatter, ax.hexbin or ax.pcolormesh
+
+    Returns
+    -------
+    fig, ax : matplotlib Figure and Axes
+    stats : dict, BlandAltman.summary of the pair
+
+    Example: plot_bland_altman(np.random(10), np.random(10))
+    """
+    if data2 is None and isinstance(data1, BlandAltman):
+        ba = data1
+        if kind == 'auto':
+            kind = 'hist'
+        if kind != 'hist':
+            raise ValueError("an accumulator can only be drawn with kind='hist'")
+    else:
+        data1 = np.asarray(data1, dtype=np.float64)
+        data2 = np.asarray(data2, dtype=np.float64)
+        if data1.ndim == 2:
+            data1 = data1[:, pair]
+            data2 = data2[:, pair]
+            pair = 0
+        if kind == 'auto':
+            kind = 'scatter' if data1.size <= 10000 else 'hexbin'
+        ba = BlandAltman(bins if kind == 'hist' else 0).update(data1, data2)
+    stats = dict((k, v[pair] if not isinstance(v, tuple) else (v[0][pair], v[1][pair]))
+                 for k, v in ba.summary(alpha).items())
+
+    if ax is None:
+        fig, ax = plt.subplots()
+    else:
+        fig = ax.figure
+    if kind == 'scatter':
+        ax.scatter((data1 + data2) / 2, data1 - data2, *args, **kwargs)
+    elif kind == 'hexbin':
+        kwargs.setdefault('bins', 'log')
+        kwargs.setdefault('mincnt', 1)
+        ax.hexbin((data1 + data2) / 2, data1 - data2, *args, gridsize=bins, **kwargs)
+    elif kind == 'hist':
+        counts, mean_edges, diff_edges = ba.histogram(pair)
+        kwargs.setdefault('norm', 'log')
+        ax.pcolormesh(mean_edges, diff_edges, np.ma.masked_equal(counts.T, 0), *args, **kwargs)
+    else:
+        raise ValueError("kind must be 'auto', 'scatter', 'hexbin' or 'hist'")
+
+    for name, color in (('bias', 'gray'), ('upper', 'red'), ('lower', 'red')):
+        ax.axhline(stats[name], color=color, linestyle='--')
+        ax.axhspan(*stats[name + '_ci'], color=color, alpha=0.15, linewidth=0)
+    ax.set_title('Bland-Altman Plot')
+    ax.set_xlabel('Mean')
+    ax.set_ylabel('Difference')
+    if show:
+        plt.show()
+    return fig, ax, stats
+
+
+@profiled
+def plot_roc(target, score=None, plot_type='SeSp', title=None, save_pdf=False, min_err=False,
+             dec_T=0.0, ppv_npv=False, n_p='', np_min=0.95, max_J=False,
+             pos_label=None, sample_weight=None, drop_intermediate=True,
+             auc_se='hanley', ax=None, show=True, decimate=1e-3, chi_res=100, cache=None,
+             band=None):
+    """
+
+    Plot and print a Receiver Operating Characteristic (ROC) curve
+    Adds a title, a legend inculding AUC +/- standard error and saves a pdf
+
+    Note this function is limited to binary classification tasks (dichotemisers)
+    Uses roc_curve and partial_auc of plotroc
+
+    Parameters
+    ----------
+     target : array, shape = [n_samples], RocResult or StreamingROC
+         True binary labels in range {0, 1} or {-1, 1}.  If labels are not
+         binary, pos_label should be explicitly given.
+         Alternatively a computed RocResult (see roc_result), whose AUC and
+         operating point arrays are reused, or an accumulated state with a
+         roc_curve() method and the class counts Nn, Np (e.g.,
+         rocstream.StreamingROC), in which case score is not given and no
+         raw scores are needed
+
+     score : array, shape = [n_samples]
+         Target scores, can either be probability estimates of the positive
+         class, confidence values, or non-thresholded measure of decisions
+         (say, as returned by softmax).
+
+     plot_type : str, optional (default='SeSp')
+         The type of ROC to plot:
+             'SeSp' Sensitivity (TPR) v Specificty (TNR = 1 - FPR)
+             'ROC'  ROC curve true positive rate (TPR) v false positive rate (FPR)
+             'PR'   Precision (PPV = TP/(TP+FP)) v Recall (TPR = Sensitivity)
+             'IPR'  Inverse Precision-Recall,
+                    i.e., Negative Predictive Value (NPV) v Specifity (TNR)
+             'Chi'  ROC curve with Chi Squared contours where alpha = 0.05
+                    critical value = 3.84
+
+             NOTE : Both Precision (PPV) and its inverse (NPV) are class prior
+                    (skew) dependent and so only make sense when the test set on
+                    which they are measured has the "natural" priors expected in
+                    population, i.e., not an "enriched" data set Chi is dependent
+                    on both the number of positive and negative samples
+
+     title : str, optional (default=None)
+         Title to prepend to the figure title and pdf file (if saved)
+
+     save_pdf : boolean, optional (default=False)
+         Whether a pdf file of the figure is saved in current working directory
+
+     min_err : boolean, optional (default=False)
+         Whether to highlight the minimum error operating point
+         
+     dec_T : float, optional (default=0.0 = False)
+         Whether to highlight the operating point at decision threshold score value  
+         If the score is a calibrated probability 0.5 is a natural threshold value 
+
+     ppv_npv : boolean, optional (default=False)
+         Whether to highlight the NPV and PPV operating points that meet np_min below
+
+     n_p : str, optional (default=Empty)
+         Whether to find and plot the Neyman-Pearson threshold that meets a
+         minimum constraint on 'Se' or 'Sp'
+
+     np_min : float, optional (default=0.95)
+         if n_p is NOT empty
+             Find the operating point that meets this minimum 'Se' or 'Sp' value
+         elseif n_p is empty this is the npv/ppv value for best_npv/best_ppv to find
+
+     max_J : boolean, optional (default=False)
+         Whether to highlight the operating point with maximum Youden's J
+         (AKA informedness or deltaP') i.e., (TPR - FPR) max vertical distance
+         from the by-chance diagonal line
+
+     pos_label : int or str, default=None
+         Label considered as positive in target, others are considered negative.
+
+     sample_weight : array-like of shape = [n_samples], optional
+         Sample weights, default=None
+
+     drop_intermediate : boolean, optional (default=True)
+         Whether to drop some suboptimal thresholds which would not appear
+         on a plotted ROC curve. This is useful in order to create lighter
+         ROC curves.
+
+     auc_se : str, optional (default='hanley')
+         Standard error of the AUC shown as +/- in the legend
+             'hanley' Hanley & McNeil closed form (sew_auc)
+             'delong' DeLong estimate from the scores (delong_auc),
+                      requires target and score, unweighted only
+
+     ax : matplotlib Axes, optional (default=None)
+         Axes to draw on, e.g. of a figure that is not managed by pyplot for
+         headless rendering (see rocrender). By default a new pyplot figure
+
+     show : boolean, optional (default=True)
+         Whether to call plt.show(), set False for non-interactive use
+
+     decimate : float, optional (default=1e-3)
+         Tolerance of the curve decimation before plotting (see
+         decimate_curve), the plotted curve is within decimate*sqrt(2) of
+         every operating point and passes exactly through the highlighted
+         ones. AUC and the operating points use the full curve. None or 0
+         plots every threshold
+
+     chi_res : int, optional (default=100)
+         Grid points per axis of the chi-square contours of plot_type='chi',
+         grids are cached per (Nn, Np, chi_res), see rocchi.ChiSquareGrids
+
+     cache : RocCache, optional (default=None)
+         Cache of the RocResult of target and score, so plotting the same
+         predictions again (e.g., another plot_type) skips the sort, AUC and
+         operating point arrays, see roc_result
+
+     band : FoldROC, optional (default=None)
+         Cross-validation folds (see rocfold.roc_curve_folds) whose vertical
+         average is drawn with a +/- 1 std band on the 'SeSp', 'ROC' and
+         'Chi' plots
+
+    Returns
+    --------
+       fig, returns the figure handle and optionally saves it as a pdf
+
+    Example
+    --------
+
+    plot_roc(np.array([0, 0, 0, 1, 1, 1]), np.array([0.0, 0.1, 0.4, 0.35, 0.8, 1.0]),
+             plot_type='sesp', ppv_npv=True, min_err=True, n_p='Se', np_min=0.9)
+    """
+
+    #fpr, tpr, thresh = metrics.roc_curve(target, score, pos_label,
+    #                                     sample_weight, drop_intermediate)
+    # Don't drop intermediate operating points else partial AUC won't be
+    # estimated accurately
+    laps = Laps('plot_roc')
+    if isinstance(target, RocResult):
+        result = target
+    elif score is None and hasattr(target, 'roc_curve'):
+        # accumulated counts (e.g. StreamingROC) rather than raw scores
+        result = RocResult(*target.roc_curve(), target.Nn, target.Np)
+    else:
+        # the full curve (drop_intermediate=False) so partial AUC is accurate
+        result = roc_result(target, score, pos_label, sample_weight, cache)
+    fpr, tpr, thresh = result.roc_curve()
+    Nn, Np = result.Nn, result.Np
+    laps('roc_curve', fpr.size)
+    roc_auc = result.auc
+    if auc_se.lower() == 'delong':
+        if score is None:
+            raise ValueError("auc_se='delong' requires target and score")
+        if sample_weight is not None:
+            raise ValueError("auc_se='delong' does not support sample_weight")
+        sew = np.sqrt(delong_auc(target, score, pos_label)[1][0, 0])
+    else:
+        sew = result.sew
+    laps('auc', fpr.size)
+    # the operating point arrays, built once per result
+    ops = result.operating_points
+    # thresholds of the highlighted points, kept exactly when decimating
+    op_thresh = []
+    th_np = 0.0
+    if n_p.lower() == 'se':
+        fpr_np, tpr_np, th_np = ops.neyman_pearson(np_min, Se=True)
+        op_thresh.append(th_np)
+    elif n_p.lower() == 'sp':
+        fpr_np, tpr_np, th_np = ops.neyman_pearson(np_min, Se=False)
+        op_thresh.append(th_np)
+
+    # if you want to plot minimum error point figure out what and where it is
+    if min_err:
+        merr, mfpr, mtpr, mthresh = ops.bayes_error()
+        op_thresh.append(mthresh)
+
+    if dec_T:
+        Tfpr, Ttpr, Tthresh = ops.decision_threshold(dec_T)
+        op_thresh.append(Tthresh)
+    
+    if ppv_npv:
+        Bppv, Bppv_fpr, Bppv_tpr, Bppvth = ops.best_ppv(np_min)
+        Bnpv, Bnpv_fpr, Bnpv_tpr, Bnpvth = ops.best_npv(np_min)
+        op_thresh += [Bppvth, Bnpvth]
+
+    # if you want to plot the maximum Youden's J point figure out where it is
+    if max_J:
+        Jval, Jfpr, Jtpr, Jthresh = ops.max_youden_J()
+        op_thresh.append(Jthresh)
+    laps('operating_points', fpr.size)
+
+    if title:
+        title += ': Receiver Operating Characteristic'
+        fname = title + '_ROC.pdf'
+    else:
+        title = 'Receiver Operating Characteristic'
+        fname = 'ROC.pdf'
+
+    # Ensure ROC curve goes all the way to (0,0)
+    full = fpr.size
+    if tpr[0] != fpr[0]:
+        tpr = np.insert(tpr,0,0.0)
+        fpr = np.insert(fpr,0,0.0)
+    keep = _threshold_index(np.asarray(thresh), op_thresh) + (len(fpr) - len(thresh))
+
+    def steps(x, y):
+        # staircase through the points, y[i] held over (x[i-1], x[i]]
+        return np.repeat(x, 2)[:-1], np.repeat(y, 2)[1:]
+
+    def points(x, y, keep=None):
+        # the (decimated) points of a curve to plot
+        if not decimate:
+            return x, y
+        sel = decimate_curve(x, y, decimate, keep)
+        return x[sel], y[sel]
+
+    # open a figure window and plot the curve
+    if ax is None:
+        fig, ax = plt.subplots()
+    else:
+        fig = ax.figure
+    laps('figure')
+    if band is not None:
+        lo = np.clip(band.tpr_mean - band.tpr_std, 0.0, 1.0)
+        hi = np.clip(band.tpr_mean + band.tpr_std, 0.0, 1.0)
+        x = 1-band.grid if plot_type.lower() == 'sesp' else band.grid
+        if plot_type.lower() in ('sesp', 'roc', 'chi'):
+            ax.fill_between(x, lo, hi, color='grey', alpha=0.2, label='+/- 1 std. dev.')
+            ax.plot(x, band.tpr_mean, 'k:', label='Mean of {} folds, AUC = {:0.3f} +/-{:0.3f}'.format(
+                len(band), band.auc_mean, band.auc_std))
+    if plot_type.lower() == 'sesp':
+        # Plot Sp V Se
+        tnr = result.tnr if fpr.size == full else 1-fpr
+        ax.plot(*points(tnr, tpr, keep), 'b-', label='AUC = {:0.3f} +/-{:0.4f}'.format(roc_auc, sew))
+
+        if ppv_npv:
+            ax.plot(1-Bppv_fpr, Bppv_tpr,'ro', label='PPV@{:0.2f} = {:0.2f}'.format(Bppvth,Bppv))
+            ax.plot(1-Bnpv_fpr, Bnpv_tpr,'go', label='NPV@{:0.2f} = {:0.2f}'.format(Bnpvth,Bnpv))
+
+        if min_err:
+            ax.plot(1-mfpr, mtpr, 'bo', label='Error@{:0.2f} = {:0.3f}'.format(mthresh,merr))
+            
+        if dec_T:
+            ax.plot(1-Tfpr, Ttpr, 'co', label='Sp,Se@{:0.2f} = ({:0.2f},{:0.2f})'.format(Tthresh,1-Tfpr,Ttpr))
+
+        if th_np:
+            ax.plot(1-fpr_np, tpr_np, 'ko', label='Sp,Se@{:0.2f} = ({:0.2f},{:0.2f})'.format(th_np,1-fpr_np,tpr_np))
+
+        if max_J:
+            ax.plot(1-Jfpr, Jtpr, 'yo', label='J@{:0.2f} = {:0.2f}'.format(Jthresh,Jval))
+
+        ax.plot([0,1],[1,0],'k--')
+        ax.set_xlim([-0.0,1.02])
+        ax.set_ylim([0.0,1.02])
+        ax.grid(True)
+        ax.legend(loc='lower left')
+        ax.set_ylabel('Sensitivity (TPR)')
+        ax.set_xlabel('Specificity (TNR)')
+
+    elif plot_type.lower() == 'ipr':
+        # Inverse precision-recall. Plot Specificity = TNR v NPV, a step
+        # curve in increasing specificity
+        tnr = result.tnr if fpr.size == full else 1-fpr
+        npv = result.npv
+        if fpr.size != full:
+            # the point inserted at (0, 0), everything predicted negative
+            npv = np.r_[npv_curve(0.0, 0.0, Nn, Np), npv]
+        npv = npv[::-1]
+        tnr = tnr[::-1]
+
+        ax.plot(*points(*steps(tnr, npv)), 'b',
+                label='NPV-Specificity, AP = {:0.3f}'.format(average_precision(npv, tnr)))
+        ax.set_xlim([0.0,1.02])
+        ax.set_ylim([0.0,1.02])
+        ax.grid(True)
+        ax.legend(loc='lower left')
+        ax.set_ylabel('Negative Predictive Value (NPV)')
+        ax.set_xlabel('Specificity (TNR)')
+
+    elif plot_type.lower() == 'pr':
+        # Plot PR-ROC TPR v PPV, a step curve whose area is the average precision
+        precision = result.ppv
+        if fpr.size != full:
+            # the point inserted at (0, 0), nothing predicted positive
+            precision = np.r_[ppv_curve(0.0, 0.0, Nn, Np), precision]
+
+        ax.plot(*points(*steps(tpr, precision)), 'b',
+                label='Precision-Recall, AP = {:0.3f}'.format(average_precision(precision, tpr)))
+        ax.set_xlim([0.0,1.02])
+        ax.set_ylim([0.0,1.02])
+        ax.grid(True)
+        ax.legend(loc='lower left')
+        ax.set_ylabel('Precision (PPV)')
+        ax.set_xlabel('Recall (TPR)')
+
+    else:
+        # Plot FPR v TPR - ROC curve
+        ax.plot(*points(fpr, tpr, keep), 'b', label='AUC = {:0.3f} +/-{:0.4f}'.format(roc_auc, sew))
+
+        if ppv_npv:
+            ax.plot(Bppv_fpr, Bppv_tpr,'ro', label='PPV@{:0.2f} = {:0.2f}'.format(Bppvth,Bppv))
+            ax.plot(Bnpv_fpr, Bnpv_tpr,'go', label='NPV@{:0.2f} = {:0.2f}'.format(Bnpvth,Bnpv))
+
+        if min_err:
+            ax.plot(mfpr, mtpr, 'bo', label='Error@{:0.2f} = {:0.3f}'.format(mthresh,merr))
+
+        if dec_T:
+            ax.plot(Tfpr, Ttpr, 'co', label='FPR,TPR@{:0.2f} = ({:0.2f},{:0.2f})'.format(Tthresh,Tfpr,Ttpr))
+
+        if th_np:
+            ax.plot(fpr_np, tpr_np, 'ko', label='FPR,TPR@{:0.2f} = ({:0.2f},{:0.2f})'.format(th_np,fpr_np,tpr_np))
+
+        if max_J:
+            ax.plot(Jfpr, Jtpr, 'yo', label='J@{:0.2f} = {:0.3f}'.format(Jthresh,Jval))
+
+        if plot_type.lower() == 'chi':
+            laps('draw')
+            # contours of the real class counts, computed once per (Nn, Np)
+            rates, chi = chi_sqr_grid(Nn, Np, chi_res)
+            laps('chi_grid', chi.size)
+            cs = ax.contour(rates,rates,chi,colors='k',
+                            levels=[3.84,6.63,7.88,16,32,64,128,256,512,1024,2048],
+                            linestyles='dotted',linewidths=0.5)
+            ax.clabel(cs, fontsize=9, inline=1)
+            title += ' (Chi-square Contours)'
+
+        ax.plot([0,1],[0,1],'k--')
+        ax.set_xlim([-0.02,1.0])
+        ax.set_ylim([0.0,1.02])
+        ax.grid(True)
+        ax.legend(loc='lower right')
+        ax.set_ylabel('True Positive Rate (TPR)')
+        ax.set_xlabel('False Positive Rate (FPR)')
+
+    ax.set_title(title)
+    # in 'chi' mode the drawing before the grid was already timed as 'draw'
+    laps('chi_contour' if plot_type.lower() == 'chi' else 'draw')
+    if show:
+        plt.show()
+        laps('show')
+    if save_pdf:
+        fig.savefig(fname, bbox_inches='tight')
+        laps('save_pdf')
+
+    return fig, ax
@@ -0,0 +1,183 @@
+"""
+Opt-in timing of the evaluation functions and the stages of plot_roc
+
+Nothing is recorded, and the instrumented functions only pay one check per
+call, until a Profile is entered or a hook added
+
+    with Profile() as prof:
+        plot_roc(target, score, save_pdf=True, show=False)
+    print(prof.report())
+    prof.to_json('profile.json')
+
+Calls inside process pool workers (n_jobs > 1 with processes) are not seen
+"""
+import json
+import threading
+from time import perf_counter
+from functools import wraps
+from contextlib import contextmanager
+
+# entered Profile objects and hook callbacks, see _emit
+_profiles = []
+_hooks = []
+
+
+def _emit(name, elapsed, size):
+    for prof in list(_profiles):
+        prof.add(name, elapsed, size)
+    for hook in list(_hooks):
+        hook(name, elapsed, size)
+
+
+def _size(args):
+    # number of elements of the first array (or sequence) argument
+    for a in args:
+        shape = getattr(a, 'shape', None)
+        if shape:
+            n = 1
+            for k in shape:
+                n *= int(k)
+            return n
+        if isinstance(a, (list, tuple)):
+            return len(a)
+    return None
+
+
+def add_hook(hook):
+    """
+    Call hook(name, elapsed, size) after every instrumented call or stage,
+    size is the number of elements of the first array argument or None
+
+    Returns hook, for remove_hook
+    """
+    _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def profiled(func=None, name=None):
+    """
+    Decorator recording the wall time of every call of func while profiling,
+    under name (default module.qualname)
+    """
+    def decorate(func):
+        label = name or '{}.{}'.format(func.__module__, func.__qualname__)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (_profiles or _hooks):
+                return func(*args, **kwargs)
+            t0 = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _emit(label, perf_counter() - t0, _size(args))
+        return wrapper
+
+    if func is None:
+        return decorate
+    return decorate(func)
+
+
+@contextmanager
+def stage(name, size=None):
+    """Record the wall time of the with block as stage name"""
+    if not (_profiles or _hooks):
+        yield
+        return
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        _emit(name, perf_counter() - t0, size)
+
+
+class Laps(object):
+    """
+    Consecutive stages of a function, each lap records the time since the
+    previous one (or since Laps was created) as prefix.name
+
+    laps = Laps('plot_roc')
+    ...
+    laps('roc_curve', fpr.size)
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.t = perf_counter() if (_profiles or _hooks) else None
+
+    def __call__(self, name, size=None):
+        if self.t is None:
+            return
+        t = perf_counter()
+        _emit('{}.{}'.format(self.prefix, name), t - self.t, size)
+        self.t = t
+
+
+class Profile(object):
+    """
+    Aggregated wall time, call count and array sizes of every instrumented
+    function and stage called while the Profile is entered
+
+    Profiles may be nested or entered from several threads, each sees every
+    call made while it is entered
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        _profiles.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _profiles.remove(self)
+        return False
+
+    def add(self, name, elapsed, size=None):
+        with self._lock:
+            s = self.stats.get(name)
+            if s is None:
+                s = self.stats[name] = dict(calls=0, total_s=0.0, min_s=float('inf'),
+                                            max_s=0.0, total_size=0, max_size=0)
+            s['calls'] += 1
+            s['total_s'] += elapsed
+            s['min_s'] = min(s['min_s'], elapsed)
+            s['max_s'] = max(s['max_s'], elapsed)
+            if size is not None:
+                s['total_size'] += size
+                s['max_size'] = max(s['max_size'], size)
+
+    def to_dict(self):
+        """{name: {calls, total_s, mean_s, min_s, max_s, total_size, max_size}}"""
+        with self._lock:
+            out = {}
+            for name, s in self.stats.items():
+                out[name] = dict(s, mean_s=s['total_s'] / s['calls'])
+            return out
+
+    def to_json(self, path=None, indent=1):
+        """JSON of to_dict, also written to path if given"""
+        text = json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def report(self, sort='total_s'):
+        """Table of the stats, largest sort column first"""
+        rows = sorted(self.to_dict().items(), key=lambda kv: -kv[1][sort])
+        lines = ['{:48s} {:>7s} {:>10s} {:>10s} {:>12s}'.format(
+            'name', 'calls', 'total s', 'mean s', 'max size')]
+        for name, s in rows:
+            lines.append('{:48s} {:7d} {:10.4f} {:10.6f} {:12d}'.format(
+                name, s['calls'], s['total_s'], s['mean_s'], s['max_size']))
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self.stats.clear()
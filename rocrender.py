@@ -0,0 +1,113 @@
+"""
+Headless batch rendering of plot_roc reports to multi-page PDFs or PNGs
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from rocplot import plot_roc
+from rocprof import profiled
+
+
+def _draw(report, figsize):
+    # a figure outside pyplot, on the Agg canvas, freed as soon as it is dropped
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    kwargs = dict(report)
+    kwargs.update(ax=ax, show=False, save_pdf=False)
+    plot_roc(**kwargs)
+    return fig
+
+
+def _render_pdf(args):
+    reports, path, figsize = args
+    with PdfPages(path) as pdf:
+        for report in reports:
+            fig = _draw(report, figsize)
+            pdf.savefig(fig, bbox_inches='tight')
+            fig.clear()
+    return [path]
+
+
+def _render_png(args):
+    reports, paths, figsize, dpi = args
+    for report, path in zip(reports, paths):
+        fig = _draw(report, figsize)
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+        fig.clear()
+    return paths
+
+
+def _split(n, parts):
+    # contiguous (start, stop) ranges of n items over parts
+    bounds = [n * k // parts for k in range(parts + 1)]
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+@profiled
+def render_roc_reports(reports, path, fmt='pdf', n_jobs=1, figsize=(6.4, 4.8), dpi=100):
+    """
+    Render many plot_roc figures without a display or pyplot
+
+    Every figure is drawn on its own Agg canvas that pyplot never sees, plt.show
+    is never called and each figure is cleared as soon as it is written, so
+    memory stays flat however many reports are rendered.
+
+    Parameters
+    ----------
+    reports : list of dict
+        plot_roc keyword arguments of each figure, e.g.,
+        dict(target=t, score=s, plot_type='pr', title='model 1')
+
+    path : str
+        fmt='pdf', the multi-page PDF file to write. With n_jobs > 1 each
+        worker writes its contiguous share of the pages to its own file,
+        path with '-part00', '-part01', ... inserted before the extension
+        fmt='png', the directory the PNG files roc_00000.png, ... are
+        written to (created if needed), one per report in order
+
+    fmt : str, optional (default='pdf')
+        'pdf' or 'png'
+
+    n_jobs : int, optional (default=1)
+        Number of worker processes rendering in parallel
+
+    figsize : (float, float), optional (default=(6.4, 4.8))
+        Figure size in inches
+
+    dpi : int, optional (default=100)
+        Resolution of the PNG files
+
+    Returns
+    -------
+    files : list of str
+        The files written
+    """
+    reports = list(reports)
+    n_jobs = max(1, min(n_jobs, len(reports)))
+    if fmt == 'pdf':
+        if n_jobs == 1:
+            tasks = [(reports, path, figsize)]
+        else:
+            root, ext = os.path.splitext(path)
+            tasks = [(reports[a:b], '{}-part{:02d}{}'.format(root, k, ext or '.pdf'), figsize)
+                     for k, (a, b) in enumerate(_split(len(reports), n_jobs))]
+        render = _render_pdf
+    elif fmt == 'png':
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        paths = [os.path.join(path, 'roc_{:05d}.png'.format(i)) for i in range(len(reports))]
+        tasks = [(reports[a:b], paths[a:b], figsize, dpi)
+                 for a, b in _split(len(reports), 4 * n_jobs)]
+        render = _render_png
+    else:
+        raise ValueError("fmt must be 'pdf' or 'png'")
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            written = list(pool.map(render, tasks))
+    else:
+        written = [render(task) for task in tasks]
+    return [f for files in written for f in files]
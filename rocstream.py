@@ -0,0 +1,271 @@
+"""
+Streaming (chunked) ROC accumulation on a binned score grid
+"""
+import numpy as np
+from plotroc import partial_auc, OperatingPoints
+from rocprof import profiled
+
+
+class StreamingROC(object):
+    """
+    Mergeable accumulator of weighted positive and negative counts on a score grid
+
+    Chunks of (target, score) are added with update(), the raw scores are not
+    kept. The grid is either fixed (edges given) or adaptive, in which case the
+    bin width is a power of two that doubles (pooling pairs of bins) whenever
+    the scores seen so far no longer fit into n_bins bins. Because adaptive bins
+    are aligned to multiples of a power of two width, accumulators built on
+    different workers can be merged exactly in O(n_bins).
+
+    All scores in a bin are treated as tied, so the binned AUC differs from the
+    exact AUC (metrics.roc_curve on the raw scores) by at most auc_error_bound()
+
+    Parameters
+    ----------
+    n_bins : int, optional (default=4096)
+        Number of bins of the adaptive grid, ignored if edges are given
+
+    edges : array, shape = [n_bins + 1], optional (default=None)
+        Increasing bin edges of a fixed grid, bin i is [edges[i], edges[i+1]).
+        Scores outside the edges are counted in the first or last bin
+
+    pos_label : int or str, optional (default=1)
+        Label considered as positive in target, others are considered negative.
+
+    Example
+    -------
+    acc = StreamingROC()
+    for target, score in chunks:
+        acc.update(target, score)
+    acc.merge(other_worker_acc)
+    fpr, tpr, thresh = acc.roc_curve()
+    plot_roc(acc)
+    """
+
+    def __init__(self, n_bins=4096, edges=None, pos_label=1):
+        self.pos_label = pos_label
+        if edges is not None:
+            self.edges = np.asarray(edges, dtype=np.float64)
+            if self.edges.ndim != 1 or self.edges.size < 2 or np.any(np.diff(self.edges) <= 0):
+                raise ValueError('edges must be a strictly increasing array of at least 2 values')
+            self.n_bins = self.edges.size - 1
+        else:
+            if n_bins < 2:
+                raise ValueError('n_bins must be at least 2')
+            self.edges = None
+            self.n_bins = int(n_bins)
+        # adaptive grid: bin i covers [(offset + i)*2**exp, (offset + i + 1)*2**exp)
+        self.exp = None
+        self.offset = 0
+        self.pos = np.zeros(self.n_bins)
+        self.neg = np.zeros(self.n_bins)
+
+    @property
+    def Np(self):
+        """Weighted number of positive samples seen"""
+        return self.pos.sum()
+
+    @property
+    def Nn(self):
+        """Weighted number of negative samples seen"""
+        return self.neg.sum()
+
+    @property
+    def adaptive(self):
+        return self.edges is None
+
+    def _global_range(self, exp):
+        # first and last occupied bin as global indices on a grid of width 2**exp
+        occ = np.flatnonzero((self.pos != 0) | (self.neg != 0))
+        if occ.size == 0:
+            return None
+        k = exp - self.exp
+        return ((self.offset + occ[0]) >> k, (self.offset + occ[-1]) >> k)
+
+    def _rebin(self, exp, offset):
+        # move the counts onto a coarser (or equal) aligned grid
+        k = exp - self.exp
+        idx = ((self.offset + np.arange(self.n_bins)) >> k) - offset
+        keep = (self.pos != 0) | (self.neg != 0)
+        self.pos = np.bincount(idx[keep], self.pos[keep], self.n_bins)
+        self.neg = np.bincount(idx[keep], self.neg[keep], self.n_bins)
+        self.exp = exp
+        self.offset = offset
+
+    def _fit(self, ranges, exp):
+        # smallest exp >= given exp at which all (lo, hi) global ranges fit
+        while True:
+            lo = min(r[0] >> (exp - r[2]) for r in ranges)
+            hi = max(r[1] >> (exp - r[2]) for r in ranges)
+            if hi - lo < self.n_bins:
+                return exp, lo
+            exp += 1
+
+    def _index(self, score):
+        if not self.adaptive:
+            idx = np.searchsorted(self.edges, score, side='right') - 1
+            return np.clip(idx, 0, self.n_bins - 1)
+
+        lo, hi = score.min(), score.max()
+        if self.exp is None:
+            span = hi - lo
+            if span == 0:
+                span = max(abs(hi), 1.0) * 2.0**-20
+            self.exp = int(np.ceil(np.log2(span / (self.n_bins - 1))))
+            self.offset = int(np.floor(np.ldexp(lo, -self.exp)))
+        glo = int(np.floor(np.ldexp(lo, -self.exp)))
+        ghi = int(np.floor(np.ldexp(hi, -self.exp)))
+        ranges = [(glo, ghi, self.exp)]
+        occupied = self._global_range(self.exp)
+        if occupied is not None:
+            ranges.append(occupied + (self.exp,))
+        exp, offset = self._fit(ranges, self.exp)
+        if exp != self.exp or glo < self.offset or ghi >= self.offset + self.n_bins:
+            self._rebin(exp, offset)
+        return np.floor(np.ldexp(score, -self.exp)).astype(np.int64) - self.offset
+
+    @profiled
+    def update(self, target, score, sample_weight=None):
+        """
+        Add a chunk of samples to the accumulator
+
+        Parameters
+        ----------
+        target : array, shape = [n_samples]
+            True labels, pos_label is considered positive
+
+        score : array, shape = [n_samples]
+            Target scores of the chunk
+
+        sample_weight : array-like of shape = [n_samples], optional
+            Sample weights, default=None
+
+        Returns
+        -------
+        self
+        """
+        target = np.asarray(target).ravel()
+        score = np.asarray(score, dtype=np.float64).ravel()
+        if target.shape != score.shape:
+            raise ValueError('target and score must have the same length')
+        if score.size == 0:
+            return self
+        if not np.all(np.isfinite(score)):
+            raise ValueError('score must be finite')
+        if sample_weight is None:
+            w = np.ones(score.size)
+        else:
+            w = np.asarray(sample_weight, dtype=np.float64).ravel()
+        y = target == self.pos_label
+
+        idx = self._index(score)
+        self.pos += np.bincount(idx, w * y, self.n_bins)
+        self.neg += np.bincount(idx, w * ~y, self.n_bins)
+        return self
+
+    @profiled
+    def merge(self, other):
+        """
+        Merge the counts of another accumulator into this one in O(n_bins)
+
+        Both accumulators must use the same fixed edges, or both be adaptive
+        with the same n_bins
+
+        Returns
+        -------
+        self
+        """
+        if self.adaptive != other.adaptive or self.n_bins != other.n_bins:
+            raise ValueError('cannot merge accumulators with different grids')
+        if not self.adaptive:
+            if not np.array_equal(self.edges, other.edges):
+                raise ValueError('cannot merge accumulators with different edges')
+            self.pos = self.pos + other.pos
+            self.neg = self.neg + other.neg
+            return self
+
+        if other.exp is None:
+            return self
+        other = other.copy()
+        if self.exp is None:
+            self.exp, self.offset = other.exp, other.offset
+            self.pos, self.neg = other.pos, other.neg
+            return self
+        ranges = []
+        for acc in (self, other):
+            occupied = acc._global_range(acc.exp)
+            if occupied is not None:
+                ranges.append(occupied + (acc.exp,))
+        if not ranges:
+            return self
+        exp, offset = self._fit(ranges, max(self.exp, other.exp))
+        self._rebin(exp, offset)
+        other._rebin(exp, offset)
+        self.pos += other.pos
+        self.neg += other.neg
+        return self
+
+    def copy(self):
+        acc = StreamingROC.__new__(StreamingROC)
+        acc.__dict__.update(self.__dict__)
+        acc.pos = self.pos.copy()
+        acc.neg = self.neg.copy()
+        return acc
+
+    def bin_edges(self):
+        """Lower edges of the bins (the thresholds of the binned ROC curve)"""
+        if not self.adaptive:
+            return self.edges[:-1]
+        if self.exp is None:
+            return np.zeros(0)
+        return np.ldexp(np.arange(self.offset, self.offset + self.n_bins, dtype=np.float64),
+                        self.exp)
+
+    @profiled
+    def roc_curve(self):
+        """
+        ROC curve of the binned scores, predicting positive if score >= thresh
+
+        Returns
+        -------
+        fpr, tpr : array, shape = [>2]
+            Increasing false and true positive rates
+
+        thresh : array, shape = [n_thresholds]
+            Decreasing thresholds (lower bin edges), thresh[0] = inf is the
+            (0, 0) point with no instances predicted positive
+        """
+        if self.Np <= 0 or self.Nn <= 0:
+            raise ValueError('both positive and negative samples are required')
+        occ = np.flatnonzero((self.pos != 0) | (self.neg != 0))[::-1]
+        tps = np.r_[0.0, np.cumsum(self.pos[occ])]
+        fps = np.r_[0.0, np.cumsum(self.neg[occ])]
+        thresh = np.r_[np.inf, self.bin_edges()[occ]]
+        return (fps / fps[-1], tps / tps[-1], thresh)
+
+    @profiled
+    def auc(self, op1=0.0, op2=1.0, Sp=True):
+        """
+        (Partial) AUC of the binned ROC curve, see partial_auc
+        """
+        fpr, tpr, _ = self.roc_curve()
+        return partial_auc(fpr, tpr, op1, op2, Sp)
+
+    def auc_error_bound(self):
+        """
+        Bound on |binned AUC - exact AUC|
+
+        Within a bin the order of positive and negative scores is lost, the
+        binned AUC counts each such pair as half, the exact AUC anywhere from
+        none to all of them, so the error is at most 0.5 * sum(pos*neg)/(Np*Nn)
+        """
+        return 0.5 * np.dot(self.pos, self.neg) / (self.Np * self.Nn)
+
+    @profiled
+    def operating_points(self):
+        """
+        OperatingPoints engine of the binned ROC curve with the accumulated
+        class counts, e.g., acc.operating_points().max_youden_J()
+        """
+        fpr, tpr, thresh = self.roc_curve()
+        return OperatingPoints(fpr, tpr, thresh, self.Nn, self.Np)
@@ -0,0 +1,34 @@
+import numpy as np
+from scipy import stats
+import blandaltman
+
+
+def _pairs(n=1000, n_pairs=5, seed=0):
+    rng = np.random.default_rng(seed)
+    data1 = rng.normal(size=(n, n_pairs))
+    return data1, data1 + rng.normal(0.1, 0.5, size=(n, n_pairs))
+
+
+def test_streamed_summary_matches_numpy():
+    data1, data2 = _pairs()
+    ba = blandaltman.BlandAltman()
+    for i in range(0, data1.shape[0], 300):
+        ba.update(data1[i:i + 300], data2[i:i + 300])
+    s = ba.summary()
+    diff = data1 - data2
+    sd = diff.std(axis=0, ddof=1)
+    t = stats.t.ppf(0.975, diff.shape[0] - 1)
+    assert np.allclose(s['bias'], diff.mean(axis=0))
+    assert np.allclose(s['upper'], diff.mean(axis=0) + 1.96 * sd)
+    assert np.allclose(s['bias_ci'][1] - s['bias'], t * sd / np.sqrt(diff.shape[0]))
+
+
+def test_streamed_histogram_matches_histogram2d():
+    data1, data2 = _pairs()
+    ba = blandaltman.BlandAltman(bins=32, hist_range=((-4, 4), (-3, 3)))
+    for i in range(0, data1.shape[0], 300):
+        ba.update(data1[i:i + 300], data2[i:i + 300])
+    for k in range(data1.shape[1]):
+        expected, _, _ = np.histogram2d((data1[:, k] + data2[:, k]) / 2, data1[:, k] - data2[:, k],
+                                        bins=32, range=((-4, 4), (-3, 3)))
+        assert np.array_equal(ba.hist[k], expected)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from sklearn.isotonic import IsotonicRegression
+import calibration
+
+
+def _fit(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    score = rng.normal(size=n)
+    target = (rng.random(n) < 1 / (1 + np.exp(-2 * score))).astype(int)
+    return calibration.isotonic_fit(target, score), score, target, rng
+
+
+def test_isotonic_matches_sklearn_in_chunks():
+    # at the fitted scores the step function and sklearn's interpolation agree
+    cal, score, target, _ = _fit()
+    expected = IsotonicRegression().fit_transform(score, target)
+    out = cal.predict(score.reshape(40, 50), chunk_size=64, n_jobs=2)
+    assert np.allclose(out.ravel(), expected)
+
+
+def test_predict_non_contiguous_out():
+    cal, _, _, rng = _fit()
+    new = rng.normal(size=(40, 30))
+    buf = np.zeros((30, 40))
+    out = cal.predict(new, out=buf.T, chunk_size=100)
+    assert np.shares_memory(out, buf)
+    assert np.array_equal(buf.T, cal.predict(new))
+
+
+def test_predict_non_contiguous_score():
+    cal, _, _, rng = _fit()
+    new = rng.normal(size=(50, 40))[::2, ::3]
+    new[0, 0] = np.nan
+    out = cal.predict(new, chunk_size=100)
+    expected = cal.predict(np.ravel(new)).reshape(new.shape)
+    assert np.isnan(out[0, 0])
+    assert np.array_equal(out, expected, equal_nan=True)
+
+
+def test_predict_out_shape_mismatch():
+    cal, _, _, _ = _fit()
+    with pytest.raises(ValueError, match='out'):
+        cal.predict(np.zeros(10), out=np.empty(11))
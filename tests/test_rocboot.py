@@ -0,0 +1,28 @@
+import numpy as np
+import rocboot
+
+
+def _sorted_roc(n=2000, seed=1):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.1).astype(int)
+    score = rng.normal(size=n) + 1.5 * y
+    return rocboot._SortedROC(y, score, None, 1, 0.0, 1.0, True, '', 0.95)
+
+
+def test_grouped_jackknife_acceleration_matches_leave_one_out():
+    data = _sorted_roc()
+    exact = rocboot._acceleration(rocboot._jackknife(data, data.y.size, 50)[:, 0])
+    grouped = rocboot._acceleration(rocboot._jackknife(data, 400, 50, seed=0)[:, 0])
+    assert exact < 0
+    assert abs(grouped - exact) < 0.005
+
+
+def test_bca_reproducible():
+    rng = np.random.default_rng(2)
+    y = (rng.random(500) < 0.3).astype(int)
+    score = rng.normal(size=500) + y
+    ci1 = rocboot.bootstrap_roc(y, score, n_boot=200, method='bca', n_jack=100, random_state=3)
+    ci2 = rocboot.bootstrap_roc(y, score, n_boot=200, method='bca', n_jack=100, random_state=3)
+    assert ci1 == ci2
+    est, lo, hi = ci1['auc']
+    assert lo < est < hi
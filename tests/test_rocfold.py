@@ -0,0 +1,40 @@
+import numpy as np
+from sklearn.metrics import roc_auc_score
+import plotroc
+import rocfold
+
+
+def _folds(n=900, seed=0):
+    # fold 1 of 0..2 has no positives
+    rng = np.random.default_rng(seed)
+    folds = np.repeat(np.arange(3), n // 3)
+    target = (rng.random(n) < 0.3).astype(int)
+    target[folds == 1] = 0
+    score = rng.normal(size=n) + target
+    return target, score, folds
+
+
+def test_degenerate_middle_fold_matches_per_fold():
+    target, score, folds = _folds()
+    cv = rocfold.roc_curve_folds(target, score, folds, op1=0.2, op2=0.9)
+    assert np.isnan(cv.auc[1]) and np.isnan(cv.pauc[1])
+    for f in (0, 2):
+        t, s = target[folds == f], score[folds == f]
+        fpr, tpr, _ = plotroc.roc_curve(t, s, drop_intermediate=False)
+        assert np.isclose(cv.auc[f], roc_auc_score(t, s))
+        assert np.isclose(cv.pauc[f], plotroc.partial_auc(fpr, tpr, 0.2, 0.9))
+    assert np.isclose(cv.auc_mean, cv.auc[[0, 2]].mean())
+
+
+def test_vertical_average_of_the_valid_folds():
+    target, score, folds = _folds(seed=1)
+    grid = np.linspace(0.0, 1.0, 11)
+    cv = rocfold.roc_curve_folds(target, score, folds, grid=grid)
+    tprs = []
+    for f in (0, 2):
+        fpr, tpr, _ = plotroc.roc_curve(target[folds == f], score[folds == f],
+                                        drop_intermediate=False)
+        # the top of each vertical step, as the folds' tpr at fixed fpr
+        tprs.append(tpr[np.searchsorted(fpr, grid, side='right') - 1])
+    tprs[0][0] = tprs[1][0] = 0.0
+    assert np.allclose(cv.tpr_mean, np.mean(tprs, axis=0))
@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.metrics import roc_auc_score
+import plotroc
+import rocmulti
+
+
+def _data(n=600, seed=0):
+    # class 2 of 0..3 never occurs
+    rng = np.random.default_rng(seed)
+    target = rng.choice([0, 1, 3], n)
+    proba = rng.random((n, 4))
+    proba[np.arange(n), target] += 0.5
+    return target, proba
+
+
+def test_absent_middle_class_matches_per_class():
+    target, proba = _data()
+    m = rocmulti.roc_curve_multiclass(target, proba, classes=np.arange(4), op1=0.2, op2=0.9)
+    assert np.isnan(m.auc[2]) and np.isnan(m.pauc[2])
+    for k in (0, 1, 3):
+        fpr, tpr, _ = plotroc.roc_curve(target == k, proba[:, k], drop_intermediate=False)
+        assert np.isclose(m.auc[k], roc_auc_score(target == k, proba[:, k]))
+        assert np.isclose(m.pauc[k], plotroc.partial_auc(fpr, tpr, 0.2, 0.9))
+    assert np.isclose(m.macro_pauc, m.pauc[[0, 1, 3]].mean())
+
+
+def test_pauc_ranges_per_class():
+    target, proba = _data(seed=1)
+    op1 = np.array([0.0, 0.5])
+    m = rocmulti.roc_curve_multiclass(target, proba, classes=np.arange(4), op1=op1, op2=0.9,
+                                      Sp=False)
+    assert m.pauc.shape == (4, 2)
+    for k in (0, 1, 3):
+        fpr, tpr, _ = plotroc.roc_curve(target == k, proba[:, k], drop_intermediate=False)
+        assert np.allclose(m.pauc[k], plotroc.partial_auc(fpr, tpr, op1, 0.9, Sp=False))
@@ -0,0 +1,22 @@
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pytest
+import rocplot
+import rocprof
+
+
+def test_delong_se_rejects_sample_weight():
+    y = np.array([0, 0, 1, 1, 0, 1])
+    score = np.arange(6.0)
+    with pytest.raises(ValueError, match='sample_weight'):
+        rocplot.plot_roc(y, score, auc_se='delong', sample_weight=np.ones(6))
+
+
+def test_chi_mode_times_draw_once():
+    rng = np.random.default_rng(0)
+    y = (rng.random(300) < 0.4).astype(int)
+    with rocprof.Profile() as prof:
+        rocplot.plot_roc(y, rng.random(300) + y, plot_type='chi', show=False)
+    assert prof.stats['plot_roc.draw']['calls'] == 1
+    assert prof.stats['plot_roc.chi_contour']['calls'] == 1